@@ -1,6 +1,7 @@
 from . import data_agent
 from . import validation_agent
 from . import kpi_agent
+from . import monitoring_agent
 from . import anomaly_agent
 from . import rootcause_agent
 from . import forecast_agent
@@ -12,6 +13,7 @@ __all__ = [
     "data_agent",
     "validation_agent",
     "kpi_agent",
+    "monitoring_agent",
     "anomaly_agent",
     "rootcause_agent",
     "forecast_agent",
@@ -6,14 +6,17 @@ from datetime import date, timedelta
 from pathlib import Path
 
 from ..config import settings
-from ..db import get_connection
+from ..db import get_read_connection
 
 
 logger = logging.getLogger(__name__)
 
+READS = ("kpi_summary_daily", "anomaly_log", "forecast_summary", "root_cause_summary")
+WRITES: tuple[str, ...] = ()
+
 
 def _fetch_context(start_date: date, end_date: date):
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         cur = conn.cursor()
         start_str = start_date.isoformat()
         end_str = end_date.isoformat()
@@ -1,140 +1,208 @@
 from __future__ import annotations
 
+import argparse
 import logging
+import warnings
 from datetime import date
 
+import numpy as np
 import pandas as pd
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
 
 
 logger = logging.getLogger(__name__)
 
-
-def _mad_score(series: pd.Series) -> pd.Series:
-    median = series.median()
-    mad = (series - median).abs().median()
-    if mad == 0 or pd.isna(mad):
-        return pd.Series([pd.NA] * len(series), index=series.index)
-    return 0.6745 * (series - median) / mad
-
-
-def run(run_date: date | None = None, z_threshold: float = 2.0, mad_threshold: float = 3.0) -> None:
-    """Detect KPI anomalies using rolling z-scores and robust MAD checks."""
+READS = ("kpi_summary_daily", "campaign_performance_daily")
+WRITES = ("anomaly_log",)
+
+GRANULARITIES = ("segment", "campaign")
+# Observations per rolling window, including the run date itself.
+WINDOW = 15
+MIN_PERIODS = 5
+# Extra calendar days loaded before the window, so a series with a few missing
+# days still fills it (and campaign revenue growth has a previous value).
+MARGIN_DAYS = 5
+MAD_SCALE = 0.6745
+
+# (dimension, run_date, cac, revenue_growth) per series and day.
+_SEGMENT_QUERY = """
+select channel || ':' || region as dimension, run_date, cac, revenue_growth as value
+from kpi_summary_daily
+where run_date between ? and ?
+"""
+# (dimension, run_date, cac, revenue) per campaign and day; growth is derived after loading.
+_CAMPAIGN_QUERY = """
+select
+    channel || ':' || region || ':' || campaign_id as dimension,
+    run_date,
+    case when sum(leads) > 0 then sum(spend) * 1.0 / sum(leads) end as cac,
+    sum(revenue) as value
+from campaign_performance_daily
+where run_date between ? and ?
+group by campaign_id, channel, region, run_date
+"""
+
+
+def _load(granularity: str, start: str, end: str) -> pd.DataFrame:
+    query = _SEGMENT_QUERY if granularity == "segment" else _CAMPAIGN_QUERY
+    with get_read_connection() as conn:
+        return pd.read_sql(query, conn, params=(start, end))
+
+
+def _windows(
+    dimensions: pd.Series,
+    days: pd.Series,
+    run_str: str,
+    columns: list[np.ndarray],
+    growth_of: int | None = None,
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Right-aligned (series, WINDOW) matrices of each column's last WINDOW
+    observations, for the series observed on `run_str` (the last column).
+
+    With `growth_of`, that column is first replaced by its change versus the
+    series' previous observation.
+    """
+    series_codes, series = pd.factorize(dimensions)
+    day_codes, _ = pd.factorize(days, sort=True)
+    order = np.lexsort((day_codes, series_codes))
+    grouped = series_codes[order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    group = np.repeat(np.arange(len(starts)), sizes)
+    rank = np.repeat(starts + sizes, sizes) - 1 - np.arange(len(order))  # 0 = latest observation
+
+    sorted_columns = [column[order] for column in columns]
+    if growth_of is not None:
+        values = sorted_columns[growth_of]
+        previous = np.r_[np.nan, values[:-1]]
+        previous[starts] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sorted_columns[growth_of] = np.where(previous != 0, (values - previous) / previous, np.nan)
+
+    current = days.to_numpy()[order[starts + sizes - 1]] == run_str
+    row_of_group = np.cumsum(current) - 1
+    keep = (rank < WINDOW) & current[group]
+    rows, cols = row_of_group[group[keep]], WINDOW - 1 - rank[keep]
+    matrices = []
+    for values in sorted_columns:
+        matrix = np.full((int(current.sum()), WINDOW), np.nan)
+        matrix[rows, cols] = values[keep]
+        matrices.append(matrix)
+    return np.asarray(series, dtype=object)[current], matrices
+
+
+def _latest_scores(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rolling mean, z-score (sample std) and MAD score of each row's last value
+    against the row's window; NaN where the window has fewer than
+    MIN_PERIODS values, zero spread or no value on the run date.
+    """
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=1)
+    latest = matrix[:, -1]
+    mean = np.full(len(matrix), np.nan)
+    z_scores = np.full(len(matrix), np.nan)
+    mad_scores = np.full(len(matrix), np.nan)
+    rows = np.flatnonzero((counts >= MIN_PERIODS) & present[:, -1])
+    if not rows.size:
+        return mean, z_scores, mad_scores
+
+    window = matrix[rows]
+    mean[rows] = np.nansum(window, axis=1) / counts[rows]
+    deviations = np.where(present[rows], window - mean[rows, None], 0.0)
+    std = np.sqrt((deviations * deviations).sum(axis=1) / (counts[rows] - 1))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(window, axis=1)
+        mad = np.nanmedian(np.abs(window - median[:, None]), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z_scores[rows] = np.where(std > 0, (latest[rows] - mean[rows]) / std, np.nan)
+        mad_scores[rows] = np.where(mad > 0, MAD_SCALE * (latest[rows] - median) / mad, np.nan)
+    return mean, z_scores, mad_scores
+
+
+def _hits(
+    run_str: str,
+    granularity: str,
+    dimensions: np.ndarray,
+    metric: str,
+    kind: str,
+    values: np.ndarray,
+    spike: bool,
+    z_threshold: float,
+    mad_threshold: float,
+) -> list[tuple]:
+    """anomaly_log rows for series whose latest value spikes above (or drops below) the thresholds."""
+    mean, z_scores, mad_scores = _latest_scores(values)
+    latest = values[:, -1]
+    with np.errstate(invalid="ignore"):
+        z_mask = z_scores > z_threshold if spike else z_scores < -z_threshold
+        mad_mask = mad_scores > mad_threshold if spike else mad_scores < -mad_threshold
+    records = [
+        (run_str, metric, dimensions[i], f"{kind}_zscore", float(latest[i]), float(mean[i]),
+         float(z_scores[i]), "Detected by rolling z-score", granularity)
+        for i in np.flatnonzero(z_mask)
+    ]
+    records += [
+        (run_str, metric, dimensions[i], f"{kind}_mad", float(latest[i]), None,
+         float(mad_scores[i]), "Detected by MAD robust score", granularity)
+        for i in np.flatnonzero(mad_mask)
+    ]
+    return records
+
+
+def run(
+    run_date: date | None = None,
+    z_threshold: float = 2.0,
+    mad_threshold: float = 3.0,
+    granularity: str = "segment",
+) -> None:
+    """
+    Detect CAC spikes and revenue growth drops on `run_date` using rolling
+    z-scores and MAD scores over each series' last WINDOW observations.
+
+    `granularity` "segment" scores kpi_summary_daily per channel and region;
+    "campaign" derives CAC and revenue growth per campaign_id from
+    campaign_performance_daily. Only the trailing WINDOW + MARGIN_DAYS days
+    are loaded, and every series is scored at once.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
     run_date = run_date or date.today()
     run_str = run_date.isoformat()
-    logger.info("Anomaly Agent: detecting anomalies for %s", run_str)
-
-    with get_connection() as conn:
-        df = pd.read_sql(
-            """
-            select
-                run_date,
-                channel,
-                region,
-                cac,
-                revenue_growth
-            from kpi_summary_daily
-            order by run_date
-            """,
-            conn,
-        )
-
-    if df.empty:
-        logger.info("Anomaly Agent: no KPI data available")
-        return
+    start = date.fromordinal(run_date.toordinal() - WINDOW - MARGIN_DAYS).isoformat()
+    logger.info("Anomaly Agent: detecting %s anomalies for %s", granularity, run_str)
 
-    df["run_date"] = pd.to_datetime(df["run_date"])
+    frame = _load(granularity, start, run_str)
     anomalies: list[tuple] = []
-
-    for (channel, region), group in df.groupby(["channel", "region"]):
-        group = group.sort_values("run_date").reset_index(drop=True)
-        if group.empty:
-            continue
-
-        # Rolling z-score catches short-term spikes compared to recent behavior.
-        roll = group.rolling(window=15, on="run_date", min_periods=5)
-        mean_cac = roll["cac"].mean()
-        std_cac = roll["cac"].std()
-        mean_rev = roll["revenue_growth"].mean()
-        std_rev = roll["revenue_growth"].std()
-
-        z_cac = (group["cac"] - mean_cac) / std_cac.replace(0, pd.NA)
-        z_rev = (group["revenue_growth"] - mean_rev) / std_rev.replace(0, pd.NA)
-
-        # MAD is more robust when heavy tails distort standard deviation.
-        mad_cac = _mad_score(group["cac"].fillna(0.0))
-        mad_rev = _mad_score(group["revenue_growth"].fillna(0.0))
-
-        for idx, row in group.iterrows():
-            day = row["run_date"].date().isoformat()
-            if day != run_str:
-                continue
-
-            cac = row["cac"]
-            rev_growth = row["revenue_growth"]
-            zc = z_cac.loc[idx]
-            zr = z_rev.loc[idx]
-            mc = mad_cac.loc[idx]
-            mr = mad_rev.loc[idx]
-
-            if pd.notna(zc) and zc > z_threshold:
-                anomalies.append(
-                    (
-                        day,
-                        "cac",
-                        f"{channel}:{region}",
-                        "cac_spike_zscore",
-                        float(cac) if cac is not None else None,
-                        float(mean_cac.loc[idx]) if pd.notna(mean_cac.loc[idx]) else None,
-                        float(zc),
-                        "Detected by rolling z-score",
-                    )
-                )
-            if pd.notna(mc) and mc > mad_threshold:
-                anomalies.append(
-                    (
-                        day,
-                        "cac",
-                        f"{channel}:{region}",
-                        "cac_spike_mad",
-                        float(cac) if cac is not None else None,
-                        None,
-                        float(mc),
-                        "Detected by MAD robust score",
-                    )
-                )
-
-            if pd.notna(zr) and zr < -z_threshold:
-                anomalies.append(
-                    (
-                        day,
-                        "revenue_growth",
-                        f"{channel}:{region}",
-                        "revenue_drop_zscore",
-                        float(rev_growth) if rev_growth is not None else None,
-                        float(mean_rev.loc[idx]) if pd.notna(mean_rev.loc[idx]) else None,
-                        float(zr),
-                        "Detected by rolling z-score",
-                    )
-                )
-            if pd.notna(mr) and mr < -mad_threshold:
-                anomalies.append(
-                    (
-                        day,
-                        "revenue_growth",
-                        f"{channel}:{region}",
-                        "revenue_drop_mad",
-                        float(rev_growth) if rev_growth is not None else None,
-                        None,
-                        float(mr),
-                        "Detected by MAD robust score",
-                    )
-                )
+    if not frame.empty:
+        series, (cac_window, revenue_window) = _windows(
+            frame["dimension"],
+            frame["run_date"],
+            run_str,
+            [frame["cac"].to_numpy(dtype=float), frame["value"].to_numpy(dtype=float)],
+            growth_of=1 if granularity == "campaign" else None,
+        )
+        anomalies = _hits(
+            run_str, granularity, series, "cac", "cac_spike", cac_window, True, z_threshold, mad_threshold
+        )
+        anomalies += _hits(
+            run_str,
+            granularity,
+            series,
+            "revenue_growth",
+            "revenue_drop",
+            revenue_window,
+            False,
+            z_threshold,
+            mad_threshold,
+        )
 
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute("delete from anomaly_log where run_date = ?", (run_str,))
+        cur.execute("delete from anomaly_log where run_date = ? and granularity = ?", (run_str, granularity))
         if anomalies:
             cur.executemany(
                 """
@@ -146,9 +214,10 @@ def run(run_date: date | None = None, z_threshold: float = 2.0, mad_threshold: f
                     current_value,
                     expected_value,
                     z_score,
-                    details
+                    details,
+                    granularity
                 )
-                values (?,?,?,?,?,?,?,?)
+                values (?,?,?,?,?,?,?,?,?)
                 """,
                 anomalies,
             )
@@ -158,3 +227,12 @@ def run(run_date: date | None = None, z_threshold: float = 2.0, mad_threshold: f
         return
 
     logger.info("Anomaly Agent: inserted %d anomalies", len(anomalies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect KPI anomalies for one run date.")
+    parser.add_argument("--run-date", type=date.fromisoformat, help="ISO date (default: today)")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="segment")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    run(args.run_date, granularity=args.granularity)
@@ -9,6 +9,19 @@ from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+READS = (
+    "campaign_daily_segment",
+    "data_quality_log",
+    "dataset_summary_daily",
+    "kpi_summary_daily",
+    "kpi_rule_status",
+    "kpi_campaign_rule_status",
+    "anomaly_log",
+    "root_cause_summary",
+    "forecast_summary",
+)
+WRITES: tuple[str, ...] = ()
+
 
 def run() -> Path:
     """
@@ -2,13 +2,20 @@ from __future__ import annotations
 
 import logging
 from datetime import date
+from itertools import groupby
 from random import randint, uniform, choice
 
 from ..db import get_connection
+from ..pipeline_state import ROLLUP_CHANGED_SINCE, mark_changed_since
+from ..segment_metrics import SEGMENT_METRICS, derive_metrics
+from ..sketches import QuantileSketch
 
 
 logger = logging.getLogger(__name__)
 
+READS = ("campaign_performance_daily", "campaign_daily_segment", "segment_metric_sketch")
+WRITES = ("campaign_performance_daily", "campaign_daily_segment", "segment_metric_sketch", "pipeline_state")
+
 
 CHANNELS = ["paid_search", "paid_social", "email", "organic"]
 REGIONS = ["APAC", "EMEA", "NA"]
@@ -20,7 +27,8 @@ def _generate_campaign_rows(run_date: date, days_back: int = 30) -> list[tuple]:
         day = run_date.fromordinal(run_date.toordinal() - d)
         for channel in CHANNELS:
             for region in REGIONS:
-                campaign_id = f"{channel}_{region}_{d % 5}"
+                # Keyed on the date itself so a day's campaigns do not depend on the ingest window.
+                campaign_id = f"{channel}_{region}_{day.toordinal() % 5}"
                 impressions = randint(5_000, 50_000)
                 clicks = int(impressions * uniform(0.01, 0.08))
                 spend = round(uniform(200.0, 5_000.0), 2)
@@ -48,20 +56,104 @@ def _generate_campaign_rows(run_date: date, days_back: int = 30) -> list[tuple]:
     return rows
 
 
-def run(run_date: date | None = None) -> None:
-    """Fetch (simulated) campaign/CRM/revenue data and append to the warehouse."""
+def refresh_segment_rollup(cur, since: str, until: str = "9999-12-31") -> int:
+    """
+    Rebuild campaign_daily_segment rows for run dates in [since, until].
+
+    Also records `since` as the earliest changed rollup date, which is where
+    kpi_agent's next incremental refresh starts.
+    """
+    cur.execute(
+        "delete from campaign_daily_segment where run_date between ? and ?",
+        (since, until),
+    )
+    mark_changed_since(cur, ROLLUP_CHANGED_SINCE, since)
+    cur.execute(
+        """
+        insert into campaign_daily_segment (
+            run_date,
+            channel,
+            region,
+            campaign_count,
+            impressions,
+            clicks,
+            spend,
+            leads,
+            opportunities,
+            signups,
+            revenue
+        )
+        select
+            run_date,
+            channel,
+            region,
+            count(*),
+            sum(impressions),
+            sum(clicks),
+            sum(spend),
+            sum(leads),
+            sum(opportunities),
+            sum(signups),
+            sum(revenue)
+        from campaign_performance_daily
+        where run_date between ? and ?
+        group by run_date, channel, region
+        """,
+        (since, until),
+    )
+    return cur.rowcount
+
+
+def refresh_segment_sketches(cur, since: str, until: str = "9999-12-31") -> int:
+    """Rebuild segment_metric_sketch rows for run dates in [since, until]."""
+    cur.execute(
+        "delete from segment_metric_sketch where run_date between ? and ?",
+        (since, until),
+    )
+    cur.execute(
+        """
+        select run_date, channel, region, impressions, clicks, leads, spend, revenue
+        from campaign_performance_daily
+        where run_date between ? and ?
+        order by run_date, channel, region
+        """,
+        (since, until),
+    )
+    records = []
+    for (run_date, channel, region), group in groupby(cur.fetchall(), key=lambda row: row[:3]):
+        values = derive_metrics([row[3:] for row in group])
+        for metric in SEGMENT_METRICS:
+            sketch = QuantileSketch().update(values[metric])
+            if sketch.n:
+                records.append((metric, run_date, channel, region, sketch.n, sketch.to_bytes()))
+    cur.executemany(
+        """
+        insert into segment_metric_sketch (metric, run_date, channel, region, value_count, sketch)
+        values (?,?,?,?,?,?)
+        """,
+        records,
+    )
+    return len(records)
+
+
+def run(run_date: date | None = None, days_back: int = 30) -> None:
+    """
+    Fetch (simulated) campaign/CRM/revenue data for the `days_back` days
+    ending on `run_date` and replace those days in the warehouse.
+    """
     run_date = run_date or date.today()
-    logger.info("Data Agent: starting ingestion for %s", run_date)
+    logger.info("Data Agent: starting ingestion for %s (%d days)", run_date, days_back)
 
-    campaign_rows = _generate_campaign_rows(run_date)
+    campaign_rows = _generate_campaign_rows(run_date, days_back)
 
     with get_connection() as conn:
         cur = conn.cursor()
         # store dates as ISO strings in SQLite
-        cutoff = run_date.fromordinal(run_date.toordinal() - 30).isoformat()
+        cutoff = run_date.fromordinal(run_date.toordinal() - days_back + 1).isoformat()
+        until = run_date.isoformat()
         cur.execute(
-            "delete from campaign_performance_daily where run_date >= ?",
-            (cutoff,),
+            "delete from campaign_performance_daily where run_date between ? and ?",
+            (cutoff, until),
         )
         cur.executemany(
             """
@@ -83,5 +175,14 @@ def run(run_date: date | None = None) -> None:
             [(d.isoformat(), *rest) for (d, *rest) in campaign_rows],
         )
 
+        # A warehouse created before the rollup existed gets its full history rolled up once.
+        cur.execute("select exists(select 1 from campaign_daily_segment)")
+        rollup_since = cutoff if cur.fetchone()[0] else ""
+        segments = refresh_segment_rollup(cur, rollup_since, until)
+        cur.execute("select exists(select 1 from segment_metric_sketch)")
+        sketches = refresh_segment_sketches(cur, cutoff if cur.fetchone()[0] else "", until)
+
     logger.info("Data Agent: ingested %d campaign rows", len(campaign_rows))
+    logger.info("Data Agent: refreshed %d daily segment rollup rows", segments)
+    logger.info("Data Agent: refreshed %d segment metric sketches", sketches)
 
@@ -8,11 +8,14 @@ import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
 
 
 logger = logging.getLogger(__name__)
 
+READS = ("campaign_performance_daily",)
+WRITES = ("forecast_summary",)
+
 
 def _fit_trend(df: pd.DataFrame, value_col: str, horizon_days: int = 28) -> dict:
     if df.empty:
@@ -43,7 +46,7 @@ def run(run_date: date | None = None) -> None:
     run_date = run_date or date.today()
     logger.info("Forecast Agent: building forecasts as of %s", run_date)
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         revenue_df = pd.read_sql(
             """
             select run_date, sum(revenue) as revenue
@@ -64,9 +67,10 @@ def run(run_date: date | None = None) -> None:
             conn,
         )
 
-        revenue_forecast = _fit_trend(revenue_df, "revenue")
-        leads_forecast = _fit_trend(leads_df, "leads")
+    revenue_forecast = _fit_trend(revenue_df, "revenue")
+    leads_forecast = _fit_trend(leads_df, "leads")
 
+    with get_connection() as conn:
         cur = conn.cursor()
         if revenue_forecast:
             cur.execute(
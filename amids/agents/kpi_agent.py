@@ -1,31 +1,53 @@
 from __future__ import annotations
 
+import argparse
 import logging
 from datetime import date
-from pathlib import Path
 
 from ..config import BASE_DIR
 from ..db import get_connection
+from ..pipeline_state import ROLLUP_CHANGED_SINCE, clear_state, get_state
 
 
 logger = logging.getLogger(__name__)
 
+READS = ("campaign_daily_segment", "pipeline_state")
+WRITES = ("kpi_summary_daily", "pipeline_state")
 
-def run(run_date: date | None = None) -> None:
-    """Compute marketing KPIs and store in kpi_summary_daily."""
-    run_date = run_date or date.today()
-    logger.info("KPI Agent: computing KPIs up to %s", run_date)
 
-    sql_path = BASE_DIR / "sql" / "kpi_models.sql"
+def run(run_date: date | None = None, full_rebuild: bool = False) -> None:
+    """
+    Refresh kpi_summary_daily for the run dates whose rollup rows changed.
 
-    with sql_path.open("r", encoding="utf-8") as f:
-        sql = f.read()
+    data_agent records the earliest rollup date it rewrote; KPI rows from that
+    date onwards are replaced and older rows are kept, so the daily cost
+    follows the ingested window rather than the full history. `full_rebuild`
+    (also used when no KPIs exist yet) recomputes every date.
+    """
+    run_date = run_date or date.today()
+    sql = (BASE_DIR / "sql" / "kpi_models.sql").read_text(encoding="utf-8")
 
     with get_connection() as conn:
         cur = conn.cursor()
-        # For simplicity we recompute KPIs using all available history.
-        cur.execute("delete from kpi_summary_daily where run_date <= ?", (run_date.isoformat(),))
-        cur.executescript(sql)
-
-    logger.info("KPI Agent: KPI snapshot refreshed")
-
+        since = get_state(cur, ROLLUP_CHANGED_SINCE)
+        if full_rebuild or not cur.execute("select exists(select 1 from kpi_summary_daily)").fetchone()[0]:
+            since = ""
+        if since is None:
+            logger.info("KPI Agent: KPIs up to date as of %s", run_date)
+            return
+
+        logger.info("KPI Agent: recomputing KPIs from %s (as of %s)", since or "the first run date", run_date)
+        cur.execute("delete from kpi_summary_daily where run_date >= ?", (since,))
+        cur.execute(sql, {"start_date": since})
+        inserted = cur.rowcount
+        clear_state(cur, ROLLUP_CHANGED_SINCE)
+
+    logger.info("KPI Agent: KPI snapshot refreshed (%d rows)", inserted)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh kpi_summary_daily from the segment rollup.")
+    parser.add_argument("--full-rebuild", action="store_true", help="recompute every run date")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    run(full_rebuild=args.full_rebuild)
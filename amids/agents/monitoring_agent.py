@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import date
+
+import numpy as np
+
+from ..db import get_connection, get_read_connection
+from ..rules import STATUS_LABELS, load_rule_set
+from ..segment_metrics import MetricMatrices, metric_matrices
+
+
+logger = logging.getLogger(__name__)
+
+READS = ("campaign_daily_segment", "campaign_performance_daily")
+WRITES = ("kpi_rule_status", "kpi_campaign_rule_status")
+
+_SEGMENT_QUERY = """
+select run_date, channel, region, impressions, clicks, leads, spend, revenue
+from campaign_daily_segment
+where run_date between ? and ?
+"""
+
+_CAMPAIGN_QUERY = """
+select run_date, campaign_id, channel, region, sum(impressions), sum(clicks), sum(leads), sum(spend), sum(revenue)
+from campaign_performance_daily
+where run_date between ? and ?
+group by run_date, campaign_id, channel, region
+"""
+
+
+def _stack(layouts: list[MetricMatrices]) -> tuple[list[str], dict[str, np.ndarray]]:
+    """Stack the layouts' series into one set of matrices over the union of their dates."""
+    dates = sorted({run_date for layout in layouts for run_date in layout.dates})
+    position = {run_date: idx for idx, run_date in enumerate(dates)}
+    matrices = {}
+    for name in layouts[0].matrices:
+        blocks = []
+        for layout in layouts:
+            block = np.full((len(layout.series), len(dates)), np.nan)
+            block[:, [position[run_date] for run_date in layout.dates]] = layout.matrices[name]
+            blocks.append(block)
+        matrices[name] = np.vstack(blocks)
+    return dates, matrices
+
+
+def run(run_date: date | None = None) -> None:
+    """Evaluate the configured KPI rules for every segment and campaign and store the day's status."""
+    run_date = run_date or date.today()
+    run_str = run_date.isoformat()
+    rule_set = load_rule_set()
+    # pct_change and consecutive_breach rules need history before the run date.
+    lookback = max((rule.periods for rule in rule_set.rules), default=1)
+    start = run_date.fromordinal(run_date.toordinal() - lookback).isoformat()
+    logger.info("Monitoring Agent: evaluating %d KPI rules for %s", len(rule_set.rules), run_str)
+
+    with get_read_connection() as conn:
+        segment_rows = conn.execute(_SEGMENT_QUERY, (start, run_str)).fetchall()
+        campaign_rows = conn.execute(_CAMPAIGN_QUERY, (start, run_str)).fetchall()
+    segments = metric_matrices(segment_rows, ("channel", "region"))
+    campaigns = metric_matrices(campaign_rows, ("campaign_id", "channel", "region"))
+    if run_str not in segments.dates and run_str not in campaigns.dates:
+        logger.info("Monitoring Agent: no segment data found for %s", run_str)
+        return
+
+    # Segments and campaigns are rows of the same matrices, so every rule is
+    # evaluated once across both granularities.
+    dates, matrices = _stack([segments, campaigns])
+    evaluation = rule_set.evaluate(matrices)
+    day = dates.index(run_str)
+    records = []
+    for idx, key in enumerate(segments.series + campaigns.series):
+        breached = [rule.name for rule, mask in zip(evaluation.rules, evaluation.breaches) if mask[idx, day]]
+        records.append(
+            (
+                run_str,
+                *key,
+                STATUS_LABELS[int(evaluation.status[idx, day]) + 1],
+                json.dumps(breached),
+                rule_set.version,
+            )
+        )
+    segment_records = records[: len(segments.series)]
+    # Only campaigns that ran on the day get a status; the others are lookback history.
+    campaign_records = [record for record in records[len(segments.series) :] if record[-3] != "no_data"]
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("delete from kpi_rule_status where run_date = ?", (run_str,))
+        cur.executemany(
+            """
+            insert into kpi_rule_status (run_date, channel, region, status, breached_rules, rules_version)
+            values (?,?,?,?,?,?)
+            """,
+            segment_records,
+        )
+        cur.execute("delete from kpi_campaign_rule_status where run_date = ?", (run_str,))
+        cur.executemany(
+            """
+            insert into kpi_campaign_rule_status
+                (run_date, campaign_id, channel, region, status, breached_rules, rules_version)
+            values (?,?,?,?,?,?,?)
+            """,
+            campaign_records,
+        )
+
+    for label, stored in (("segments", segment_records), ("campaigns", campaign_records)):
+        flagged = sum(1 for record in stored if record[-3] in ("warning", "critical"))
+        logger.info("Monitoring Agent: %d of %d %s breached at least one rule", flagged, len(stored), label)
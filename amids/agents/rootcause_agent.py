@@ -7,6 +7,9 @@ from ..db import get_connection
 
 logger = logging.getLogger(__name__)
 
+READS = ("anomaly_log", "kpi_summary_daily", "root_cause_summary")
+WRITES = ("root_cause_summary",)
+
 
 def run() -> None:
     """For each anomaly, attribute impact across channel/region/segment."""
@@ -3,11 +3,14 @@ from __future__ import annotations
 import logging
 from datetime import date
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
 
 
 logger = logging.getLogger(__name__)
 
+READS = ("campaign_performance_daily",)
+WRITES = ("dataset_summary_daily",)
+
 
 def run(run_date: date | None = None) -> None:
     """Persist daily dataset summary metrics for monitoring and reporting."""
@@ -15,7 +18,7 @@ def run(run_date: date | None = None) -> None:
     run_str = run_date.isoformat()
     logger.info("Summary Stats Agent: computing dataset summaries for %s", run_str)
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         cur = conn.cursor()
 
         cur.execute(
@@ -44,6 +47,8 @@ def run(run_date: date | None = None) -> None:
             ("avg_signups", row[4] or 0.0),
         ]
 
+    with get_connection() as conn:
+        cur = conn.cursor()
         cur.execute(
             "delete from dataset_summary_daily where run_date = ? and dataset_name = ?",
             (run_str, "campaign_performance_daily"),
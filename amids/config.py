@@ -16,6 +16,23 @@ class Settings:
     log_dir: Path = BASE_DIR / "logs"
     reports_dir: Path = BASE_DIR / "reports"
     dashboard_dir: Path = BASE_DIR / "dashboard"
+    kpi_rules_path: Path = Path(os.getenv("AMIDS_KPI_RULES_PATH", BASE_DIR / "kpi_rules.json"))
+
+    # SQLite tuning shared by the pipeline writer and the API read pool.
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_temp_store: str = "memory"
+    sqlite_busy_timeout_ms: int = 30_000
+    sqlite_read_pool_size: int = int(os.getenv("AMIDS_SQLITE_READ_POOL_SIZE", "8"))
+    sqlite_statement_cache_size: int = 256
+
+    # Worker threads for independent pipeline steps (1 runs them one at a time).
+    pipeline_max_workers: int = int(os.getenv("AMIDS_PIPELINE_MAX_WORKERS", "4"))
+    # Trace allocations while agents run to report their peak memory. Off by default: tracing
+    # slows every allocation in the process, which would skew the recorded timings.
+    pipeline_trace_memory: bool = os.getenv("AMIDS_TRACE_MEMORY", "0") == "1"
 
 
 settings = Settings()
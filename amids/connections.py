@@ -0,0 +1,203 @@
+"""
+Shared SQLite connection management for the AMIDS pipeline and the API.
+
+One ConnectionManager exists per database file. It hands out pooled read-only
+connections for request handlers and a single long-lived writer connection for
+pipeline steps, all tuned from `Settings` (WAL, synchronous level, mmap, page
+cache, temp store) and with a per-connection prepared statement cache.
+
+While a `RowCounters` is bound to `row_counters` (see amids.telemetry), rows
+fetched through these connections and rows changed by writer transactions are
+added to it, which is how per-agent rows read/written are measured. Counting
+overrides every fetch in Python, so readers borrowed with no counters bound
+(the API) come from a separate pool of plain connections, and the writer only
+uses counting cursors while counters are bound.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+import sqlite3
+import threading
+
+from .config import Settings, settings
+
+
+@dataclass
+class RowCounters:
+    read: int = 0
+    written: int = 0
+
+
+row_counters: ContextVar[RowCounters | None] = ContextVar("amids_row_counters", default=None)
+
+
+def _count_read(rows: int) -> None:
+    counters = row_counters.get()
+    if counters is not None:
+        counters.read += rows
+
+
+class _CountingCursor(sqlite3.Cursor):
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count_read(1)
+        return row
+
+    def fetchmany(self, size: int | None = None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _count_read(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _count_read(len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        _count_read(1)
+        return row
+
+
+class _CountingConnection(sqlite3.Connection):
+    """Connection whose cursors (including `execute` shortcuts) count fetched rows while counters are bound."""
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = _CountingCursor if row_counters.get() is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters, /):
+        return self.cursor().executemany(sql, parameters)
+
+
+class ConnectionManager:
+    def __init__(self, path: Path, config: Settings = settings) -> None:
+        self.path = Path(path)
+        self.config = config
+        # Idle readers, keyed by whether they count rows.
+        self._idle: dict[bool, list[sqlite3.Connection]] = {False: [], True: []}
+        self._pool_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+
+    def _connect(self, readonly: bool, counting: bool = True) -> sqlite3.Connection:
+        if readonly:
+            target, uri = f"file:{self.path.as_posix()}?mode=ro", True
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            target, uri = str(self.path), False
+        conn = sqlite3.connect(
+            target,
+            uri=uri,
+            timeout=self.config.sqlite_busy_timeout_ms / 1000.0,
+            check_same_thread=False,
+            cached_statements=self.config.sqlite_statement_cache_size,
+            factory=_CountingConnection if counting else sqlite3.Connection,
+        )
+        if not readonly:
+            # Journal mode is persistent in the file, so only the writer sets it.
+            conn.execute(f"pragma journal_mode={self.config.sqlite_journal_mode}")
+        conn.execute(f"pragma synchronous={self.config.sqlite_synchronous}")
+        conn.execute(f"pragma mmap_size={int(self.config.sqlite_mmap_size)}")
+        conn.execute(f"pragma cache_size=-{int(self.config.sqlite_cache_size_kib)}")
+        conn.execute(f"pragma temp_store={self.config.sqlite_temp_store}")
+        conn.execute(f"pragma busy_timeout={int(self.config.sqlite_busy_timeout_ms)}")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled read-only connection."""
+        counting = row_counters.get() is not None
+        with self._pool_lock:
+            idle = self._idle[counting]
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = self._connect(readonly=True, counting=counting)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._pool_lock:
+                idle = self._idle[counting]
+                if len(idle) < self.config.sqlite_read_pool_size:
+                    idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @contextmanager
+    def write(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Use the shared writer connection inside one transaction.
+
+        Writers are serialized per process. Nested calls on the same thread
+        join the outer transaction. `immediate=True` takes the write lock up
+        front, which avoids lock-upgrade failures for read-then-write work.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect(readonly=False)
+            conn = self._writer
+            outermost = self._writer_depth == 0
+            if outermost and immediate and not conn.in_transaction:
+                conn.execute("begin immediate")
+            changes = conn.total_changes
+            self._writer_depth += 1
+            try:
+                yield conn
+                if outermost:
+                    conn.commit()
+                    counters = row_counters.get()
+                    if counters is not None:
+                        counters.written += conn.total_changes - changes
+            except Exception:
+                if outermost:
+                    conn.rollback()
+                raise
+            finally:
+                self._writer_depth -= 1
+
+    def close(self) -> None:
+        """Close the writer and every idle reader."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._pool_lock:
+            idle = [conn for pool in self._idle.values() for conn in pool]
+            self._idle = {False: [], True: []}
+        for conn in idle:
+            conn.close()
+
+
+_managers: dict[Path, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(path: Path | str | None = None) -> ConnectionManager:
+    """Return the process-wide manager for `path` (default: the AMIDS warehouse)."""
+    key = Path(path or settings.db_path).resolve()
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = ConnectionManager(key)
+        return manager
+
+
+def close_all() -> None:
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close()
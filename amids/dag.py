@@ -0,0 +1,139 @@
+"""
+Dependency-ordered parallel execution of pipeline steps.
+
+Each `Node` declares the warehouse tables it reads and writes. Given nodes in
+their canonical (sequential) order, a later node depends on an earlier one
+when it reads a table the earlier node writes, writes a table the earlier
+node reads, or writes the same table. Running the resulting DAG on a thread
+pool preserves every result the sequential order would produce while letting
+independent steps overlap, so wall-clock time approaches the critical path.
+
+A failed node does not stop unrelated work: its transitive dependents are
+skipped and every other node still runs.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Callable, Sequence
+import time
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    run: Callable[[], object]
+    reads: frozenset[str] = frozenset()
+    writes: frozenset[str] = frozenset()
+
+    @classmethod
+    def for_agent(cls, agent: ModuleType, run: Callable[[], object]) -> "Node":
+        """Build a node from an agent module's READS/WRITES declarations."""
+        return cls(
+            name=agent.__name__.rsplit(".", 1)[-1],
+            run=run,
+            reads=frozenset(getattr(agent, "READS", ())),
+            writes=frozenset(getattr(agent, "WRITES", ())),
+        )
+
+
+@dataclass
+class NodeResult:
+    name: str
+    status: str  # "completed", "failed" or "skipped"
+    seconds: float = 0.0
+    error: BaseException | None = None
+    blocked_by: list[str] = field(default_factory=list)
+
+
+def dependencies(nodes: Sequence[Node]) -> dict[str, set[str]]:
+    """Map each node name to the names of the earlier nodes it must wait for."""
+    names = [node.name for node in nodes]
+    if len(set(names)) != len(names):
+        raise ValueError("node names must be unique")
+    deps: dict[str, set[str]] = {node.name: set() for node in nodes}
+    for idx, later in enumerate(nodes):
+        for earlier in nodes[:idx]:
+            if (
+                earlier.writes & later.reads
+                or earlier.reads & later.writes
+                or earlier.writes & later.writes
+            ):
+                deps[later.name].add(earlier.name)
+    return deps
+
+
+def critical_path(nodes: Sequence[Node], seconds: dict[str, float]) -> tuple[list[str], float]:
+    """Longest dependency chain by the given per-node durations."""
+    deps = dependencies(nodes)
+    finish: dict[str, float] = {}
+    previous: dict[str, str | None] = {}
+    for node in nodes:
+        parent = max(deps[node.name], key=lambda name: finish[name], default=None)
+        finish[node.name] = (finish[parent] if parent else 0.0) + seconds.get(node.name, 0.0)
+        previous[node.name] = parent
+    if not finish:
+        return [], 0.0
+    tail: str | None = max(finish, key=finish.__getitem__)
+    total = finish[tail]
+    path = []
+    while tail is not None:
+        path.append(tail)
+        tail = previous[tail]
+    return path[::-1], total
+
+
+def execute(
+    nodes: Sequence[Node],
+    max_workers: int = 4,
+    on_skip: Callable[[Node, list[str]], None] | None = None,
+) -> dict[str, NodeResult]:
+    """
+    Run `nodes` as a DAG on up to `max_workers` threads.
+
+    Ready nodes are started in their declared order. Returns one result per
+    node, in declared order.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be >= 1")
+    deps = dependencies(nodes)
+    by_name = {node.name: node for node in nodes}
+    results: dict[str, NodeResult] = {}
+    pending = [node.name for node in nodes]
+    running: dict[Future, str] = {}
+
+    def timed(node: Node) -> float:
+        started = time.perf_counter()
+        node.run()
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="amids-node") as pool:
+        while pending or running:
+            # Dependencies always point at earlier nodes, so while nothing is
+            # running the first pending node is ready and this loop progresses.
+            for name in list(pending):
+                if len(running) >= max_workers:
+                    break
+                if deps[name] - results.keys():
+                    continue
+                pending.remove(name)
+                failed = sorted(dep for dep in deps[name] if results[dep].status != "completed")
+                if failed:
+                    results[name] = NodeResult(name, "skipped", blocked_by=failed)
+                    if on_skip is not None:
+                        on_skip(by_name[name], failed)
+                else:
+                    running[pool.submit(timed, by_name[name])] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    results[name] = NodeResult(name, "completed", seconds=future.result())
+                else:
+                    results[name] = NodeResult(name, "failed", error=error)
+    return {node.name: results[node.name] for node in nodes}
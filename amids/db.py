@@ -3,21 +3,21 @@ from pathlib import Path
 from typing import Iterator
 import sqlite3
 
-from .config import settings
+from .connections import get_manager
 
 
 @contextmanager
 def get_connection() -> Iterator[sqlite3.Connection]:
-    """Return a SQLite connection to the local AMIDS DB file."""
-    conn = sqlite3.connect(settings.db_path)
-    try:
+    """Return the shared, tuned writer connection to the local AMIDS DB file."""
+    with get_manager().write() as conn:
+        yield conn
+
+
+@contextmanager
+def get_read_connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled read-only connection to the local AMIDS DB file."""
+    with get_manager().read() as conn:
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
 
 
 def execute_sql_file(path: Path) -> None:
@@ -25,4 +25,3 @@ def execute_sql_file(path: Path) -> None:
         sql = f.read()
     with get_connection() as conn:
         conn.executescript(sql)
-
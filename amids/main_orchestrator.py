@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import argparse
 import logging
-import sqlite3
+from dataclasses import replace
 from datetime import date, datetime, timezone
 from pathlib import Path
+from types import ModuleType
+from typing import Callable
 import sys
 
 if __package__ in (None, ""):
     PROJECT_ROOT = Path(__file__).resolve().parents[1]
     if str(PROJECT_ROOT) not in sys.path:
         sys.path.insert(0, str(PROJECT_ROOT))
-    from amids.config import BASE_DIR, settings
-    from amids.db import execute_sql_file
+    from amids.config import settings
+    from amids.connections import close_all
+    from amids.dag import Node, NodeResult, critical_path, execute
+    from amids.db import get_connection, get_read_connection
+    from amids.schema import migrate
+    from amids.telemetry import measure
     from amids.agents import (
         ai_insight_agent,
         anomaly_agent,
@@ -19,13 +26,18 @@ if __package__ in (None, ""):
         data_agent,
         forecast_agent,
         kpi_agent,
+        monitoring_agent,
         rootcause_agent,
         summary_stats_agent,
         validation_agent,
     )
 else:
-    from .config import BASE_DIR, settings
-    from .db import execute_sql_file
+    from .config import settings
+    from .connections import close_all
+    from .dag import Node, NodeResult, critical_path, execute
+    from .db import get_connection, get_read_connection
+    from .schema import migrate
+    from .telemetry import measure
     from .agents import (
         ai_insight_agent,
         anomaly_agent,
@@ -33,6 +45,7 @@ else:
         data_agent,
         forecast_agent,
         kpi_agent,
+        monitoring_agent,
         rootcause_agent,
         summary_stats_agent,
         validation_agent,
@@ -51,23 +64,36 @@ def _setup_logging() -> None:
     )
 
 
-def _ensure_schema() -> None:
-    schema_path = BASE_DIR / "database" / "schema.sql"
-    execute_sql_file(schema_path)
+class PipelineError(RuntimeError):
+    """Raised by run_daily / run_range when at least one pipeline node failed."""
 
+    def __init__(self, results: dict[str, NodeResult]) -> None:
+        self.results = results
+        failed = [name for name, result in results.items() if result.status == "failed"]
+        super().__init__(f"AMIDS pipeline nodes failed: {', '.join(failed)}")
 
-def _insert_execution_start() -> int:
-    with sqlite3.connect(settings.db_path) as conn:
+
+def _insert_execution_start(
+    run_date: str,
+    parent_id: int | None = None,
+    node: str | None = None,
+    details: str = "AMIDS orchestrator started",
+    status: str = "running",
+) -> int:
+    with get_connection() as conn:
         cur = conn.cursor()
         cur.execute(
-            "insert into execution_log (status, details) values (?, ?)",
-            ("running", "AMIDS orchestrator started"),
+            """
+            insert into execution_log (status, details, parent_id, node, run_date)
+            values (?, ?, ?, ?, ?)
+            """,
+            (status, details, parent_id, node, run_date),
         )
         return int(cur.lastrowid)
 
 
 def _close_execution(run_id: int, status: str, details: str) -> None:
-    with sqlite3.connect(settings.db_path) as conn:
+    with get_connection() as conn:
         conn.execute(
             """
             update execution_log
@@ -78,34 +104,292 @@ def _close_execution(run_id: int, status: str, details: str) -> None:
         )
 
 
-def run_daily(run_date: date | None = None) -> None:
-    """Run the full AMIDS daily analytics workflow."""
+def pipeline_nodes(run_date: date) -> list[Node]:
+    """The daily pipeline in its canonical order; dependencies come from agent READS/WRITES."""
+    return [
+        Node.for_agent(data_agent, lambda: data_agent.run(run_date)),
+        Node.for_agent(validation_agent, lambda: validation_agent.run(run_date)),
+        Node.for_agent(summary_stats_agent, lambda: summary_stats_agent.run(run_date)),
+        Node.for_agent(kpi_agent, lambda: kpi_agent.run(run_date)),
+        Node.for_agent(monitoring_agent, lambda: monitoring_agent.run(run_date)),
+        Node.for_agent(anomaly_agent, lambda: anomaly_agent.run(run_date)),
+        Node.for_agent(rootcause_agent, rootcause_agent.run),
+        Node.for_agent(forecast_agent, lambda: forecast_agent.run(run_date)),
+        Node.for_agent(ai_insight_agent, lambda: ai_insight_agent.run(run_date)),
+        Node.for_agent(dashboard_agent, dashboard_agent.run),
+    ]
+
+
+def _logged(node: Node, run_id: int, run_str: str) -> Node:
+    """
+    Wrap a node so its start, outcome and error are recorded in execution_log
+    and its resource use in agent_run_metrics.
+    """
+    logger = logging.getLogger("amids.orchestrator")
+
+    def run() -> None:
+        node_id = _insert_execution_start(run_str, run_id, node.name, f"{node.name} started")
+        try:
+            with measure(node.name, run_id, run_str):
+                node.run()
+        except Exception as exc:
+            _close_execution(node_id, "failed", f"{type(exc).__name__}: {exc}")
+            logger.exception("AMIDS node %s failed for %s", node.name, run_str)
+            raise
+        _close_execution(node_id, "completed", f"{node.name} completed")
+
+    return replace(node, run=run)
+
+
+def run_daily(run_date: date | None = None, max_workers: int | None = None) -> dict[str, NodeResult]:
+    """
+    Run the full AMIDS daily analytics workflow as a dependency DAG.
+
+    Independent agents run concurrently on up to `max_workers` threads
+    (default `settings.pipeline_max_workers`). A failed agent's dependents
+    are skipped, the rest still run, and PipelineError is raised at the end.
+    """
     run_date = run_date or date.today()
+    run_str = run_date.isoformat()
+    max_workers = max_workers or settings.pipeline_max_workers
     logger = logging.getLogger("amids.orchestrator")
-    logger.info("Starting AMIDS daily run for %s", run_date)
+    logger.info("Starting AMIDS daily run for %s (max_workers=%d)", run_date, max_workers)
 
-    _ensure_schema()
-    run_id = _insert_execution_start()
+    migrate()
+    run_id = _insert_execution_start(run_str)
 
+    def record_skip(node: Node, blocked_by: list[str]) -> None:
+        node_id = _insert_execution_start(run_str, run_id, node.name, status="skipped")
+        _close_execution(node_id, "skipped", f"upstream failed: {', '.join(blocked_by)}")
+
+    nodes = pipeline_nodes(run_date)
     try:
-        data_agent.run(run_date)
-        validation_agent.run(run_date)
-        summary_stats_agent.run(run_date)
-        kpi_agent.run(run_date)
-        anomaly_agent.run(run_date)
-        rootcause_agent.run()
-        forecast_agent.run(run_date)
-        ai_insight_agent.run(run_date)
-        dashboard_agent.run()
+        results = execute([_logged(node, run_id, run_str) for node in nodes], max_workers, on_skip=record_skip)
     except Exception as exc:
         _close_execution(run_id, "failed", str(exc))
         logger.exception("AMIDS daily run failed for %s", run_date)
+        close_all()
         raise
 
+    failed = [name for name, result in results.items() if result.status == "failed"]
+    if failed:
+        skipped = [name for name, result in results.items() if result.status == "skipped"]
+        details = f"failed: {', '.join(failed)}"
+        if skipped:
+            details += f"; skipped: {', '.join(skipped)}"
+        _close_execution(run_id, "failed", details)
+        logger.error("AMIDS daily run failed for %s (%s)", run_date, details)
+        close_all()
+        raise PipelineError(results) from results[failed[0]].error
+
     _close_execution(run_id, "completed", "AMIDS orchestrator completed successfully")
-    logger.info("Completed AMIDS daily run for %s", run_date)
+    # The writer connection lives for one run; release it with the pool.
+    close_all()
+    path, seconds = critical_path(nodes, {name: result.seconds for name, result in results.items()})
+    logger.info(
+        "Completed AMIDS daily run for %s; critical path %s (%.2fs)",
+        run_date,
+        " -> ".join(path),
+        seconds,
+    )
+    return results
+
+
+BACKFILL_INGEST = "backfill.ingest"
+BACKFILL_ANALYZE = "backfill.analyze"
+BACKFILL_CHUNK_DAYS = 30
+
+
+def _completed_dates(node: str, start: str, end: str) -> set[str]:
+    """Run dates in [start, end] with a completed `node` checkpoint from any earlier run."""
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            """
+            select distinct run_date
+            from execution_log
+            where node = ? and status = 'completed' and run_date between ? and ?
+            """,
+            (node, start, end),
+        ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _chunks(days: list[date], size: int) -> list[list[date]]:
+    """Split ascending dates into runs of at most `size` consecutive days."""
+    chunks: list[list[date]] = []
+    for day in days:
+        if chunks and len(chunks[-1]) < size and day.toordinal() == chunks[-1][-1].toordinal() + 1:
+            chunks[-1].append(day)
+        else:
+            chunks.append([day])
+    return chunks
+
+
+def _checkpointed(run_id: int, node: str, days: list[date], step: Callable[[date], None]) -> None:
+    """Run `step` per day, recording one execution_log checkpoint row per day."""
+    for day in days:
+        row_id = _insert_execution_start(day.isoformat(), run_id, node, f"{node} started")
+        try:
+            step(day)
+        except Exception as exc:
+            _close_execution(row_id, "failed", f"{type(exc).__name__}: {exc}")
+            raise
+        _close_execution(row_id, "completed", f"{node} completed")
+
+
+def _run_agent(run_id: int, agent: ModuleType, run_date: date, **kwargs) -> None:
+    """Call `agent.run(run_date, **kwargs)` under agent_run_metrics telemetry."""
+    with measure(agent.__name__.rsplit(".", 1)[-1], run_id, run_date):
+        agent.run(run_date, **kwargs)
+
+
+def _ingest_chunk(run_id: int, days: list[date]) -> Node:
+    def run() -> None:
+        _run_agent(run_id, data_agent, days[-1], days_back=len(days))
+
+        def validate(day: date) -> None:
+            _run_agent(run_id, validation_agent, day)
+            _run_agent(run_id, summary_stats_agent, day)
+
+        _checkpointed(run_id, BACKFILL_INGEST, days, validate)
+
+    return Node(f"{BACKFILL_INGEST} {days[0]}..{days[-1]}", run)
+
+
+def _analyze_chunk(run_id: int, days: list[date]) -> Node:
+    def analyze(day: date) -> None:
+        _run_agent(run_id, monitoring_agent, day)
+        _run_agent(run_id, anomaly_agent, day)
+
+    return Node(f"{BACKFILL_ANALYZE} {days[0]}..{days[-1]}", lambda: _checkpointed(run_id, BACKFILL_ANALYZE, days, analyze))
+
+
+def run_range(
+    start: date,
+    end: date,
+    max_workers: int | None = None,
+    chunk_days: int = BACKFILL_CHUNK_DAYS,
+    resume: bool = True,
+) -> dict[str, NodeResult]:
+    """
+    Backfill the pipeline for every run date in [start, end].
+
+    Runs in phases, each a DAG on up to `max_workers` threads:
+
+    1. ingest, validate and summarize chunks of up to `chunk_days` dates,
+       one chunk at a time: this phase is almost all writes, and every write
+       goes through the single writer connection, so threads would only queue;
+    2. refresh KPIs once (incrementally, from the earliest ingested date);
+    3. one forecast as of `end`, alongside KPI rule monitoring and anomaly
+       detection per date chunk;
+    4. root-cause attribution, the executive summary and the dashboard marker.
+
+    Per-date ingestion and analysis are checkpointed in execution_log
+    (`node` = BACKFILL_INGEST / BACKFILL_ANALYZE). With `resume`, dates
+    already completed by an earlier backfill are not redone, so a crashed
+    backfill picks up where it stopped.
+    """
+    if end < start:
+        raise ValueError("end must not be before start")
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be >= 1")
+    max_workers = max_workers or settings.pipeline_max_workers
+    start_str, end_str = start.isoformat(), end.isoformat()
+    days = [date.fromordinal(ordinal) for ordinal in range(start.toordinal(), end.toordinal() + 1)]
+    logger = logging.getLogger("amids.orchestrator")
+    logger.info("Starting AMIDS backfill %s..%s (%d days, max_workers=%d)", start, end, len(days), max_workers)
+
+    migrate()
+    run_id = _insert_execution_start(end_str, details=f"AMIDS backfill {start_str}..{end_str} started")
+
+    def pending(node: str) -> list[date]:
+        done = _completed_dates(node, start_str, end_str) if resume else set()
+        return [day for day in days if day.isoformat() not in done]
+
+    def record_skip(node: Node, blocked_by: list[str]) -> None:
+        node_id = _insert_execution_start(end_str, run_id, node.name, status="skipped")
+        _close_execution(node_id, "skipped", f"upstream failed: {', '.join(blocked_by)}")
+
+    # (build, workers) per phase. Later phases mostly read, which runs in
+    # parallel on pooled reader connections.
+    phases: list[tuple[Callable[[], list[Node]], int]] = [
+        (lambda: [_ingest_chunk(run_id, chunk) for chunk in _chunks(pending(BACKFILL_INGEST), chunk_days)], 1),
+        (lambda: [_logged(Node.for_agent(kpi_agent, lambda: kpi_agent.run(end)), run_id, end_str)], 1),
+        (
+            lambda: [_logged(Node.for_agent(forecast_agent, lambda: forecast_agent.run(end)), run_id, end_str)]
+            + [_analyze_chunk(run_id, chunk) for chunk in _chunks(pending(BACKFILL_ANALYZE), chunk_days)],
+            max_workers,
+        ),
+        (
+            lambda: [
+                _logged(node, run_id, end_str)
+                for node in (
+                    Node.for_agent(rootcause_agent, rootcause_agent.run),
+                    Node.for_agent(ai_insight_agent, lambda: ai_insight_agent.run(end)),
+                    Node.for_agent(dashboard_agent, dashboard_agent.run),
+                )
+            ],
+            max_workers,
+        ),
+    ]
+
+    results: dict[str, NodeResult] = {}
+    try:
+        for build, workers in phases:
+            phase = execute(build(), workers, on_skip=record_skip)
+            results.update(phase)
+            if any(result.status == "failed" for result in phase.values()):
+                break
+    except Exception as exc:
+        _close_execution(run_id, "failed", str(exc))
+        logger.exception("AMIDS backfill %s..%s failed", start, end)
+        close_all()
+        raise
+
+    failed = [name for name, result in results.items() if result.status == "failed"]
+    if failed:
+        _close_execution(run_id, "failed", f"failed: {', '.join(failed)}")
+        logger.error("AMIDS backfill %s..%s failed (%s); rerun to resume", start, end, ", ".join(failed))
+        close_all()
+        raise PipelineError(results) from results[failed[0]].error
+
+    _close_execution(run_id, "completed", f"AMIDS backfill {start_str}..{end_str} completed")
+    close_all()
+    logger.info("Completed AMIDS backfill %s..%s", start, end)
+    return results
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the AMIDS daily pipeline or backfill a date range.")
+    parser.add_argument("--run-date", type=date.fromisoformat, help="ISO date (default: today)")
+    parser.add_argument("--start", type=date.fromisoformat, help="backfill from this ISO date")
+    parser.add_argument("--end", type=date.fromisoformat, help="backfill through this ISO date (default: today)")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS, help="dates per backfill chunk")
+    parser.add_argument("--restart", action="store_true", help="ignore backfill checkpoints and redo every date")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=settings.pipeline_max_workers,
+        help="threads for independent agents (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    if args.run_date and (args.start or args.end):
+        parser.error("--run-date cannot be combined with --start/--end")
+    if args.end and not args.start:
+        parser.error("--end requires --start")
+    return args
 
 
 if __name__ == "__main__":
+    args = _parse_args()
     _setup_logging()
-    run_daily()
+    if args.start:
+        run_range(
+            args.start,
+            args.end or date.today(),
+            max_workers=args.max_workers,
+            chunk_days=args.chunk_days,
+            resume=not args.restart,
+        )
+    else:
+        run_daily(args.run_date, max_workers=args.max_workers)
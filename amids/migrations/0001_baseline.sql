@@ -1,4 +1,4 @@
--- Core AMIDS schema (SQLite compatible)
+-- Core AMIDS schema (SQLite compatible) as first released; later changes are separate migrations.
 
 create table if not exists campaign_performance_daily (
     id integer primary key autoincrement,
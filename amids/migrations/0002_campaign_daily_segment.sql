@@ -0,0 +1,19 @@
+-- Daily (run_date, channel, region) rollup of campaign_performance_daily.
+-- Maintained by data_agent for every ingested date; dashboards and KPI models read it
+-- instead of re-aggregating raw campaign rows. data_agent rolls up the full history
+-- the first time it runs against an empty rollup.
+create table if not exists campaign_daily_segment (
+    run_date text not null,
+    channel text not null,
+    region text not null,
+    campaign_count integer not null,
+    impressions integer not null,
+    clicks integer not null,
+    spend real not null,
+    leads integer not null,
+    opportunities integer not null,
+    signups integer not null,
+    revenue real not null,
+    refreshed_at text not null default (datetime('now')),
+    primary key (run_date, channel, region)
+) without rowid;
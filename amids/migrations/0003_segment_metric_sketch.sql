@@ -0,0 +1,12 @@
+-- Serialized KLL quantile sketches (amids/sketches.py) of campaign-level metric values,
+-- one per (metric, run_date, channel, region). Maintained by data_agent alongside the
+-- rollup; the API merges them to answer median/percentile/MAD queries for any window.
+create table if not exists segment_metric_sketch (
+    metric text not null,
+    run_date text not null,
+    channel text not null,
+    region text not null,
+    value_count integer not null,
+    sketch blob not null,
+    primary key (metric, run_date, channel, region)
+) without rowid;
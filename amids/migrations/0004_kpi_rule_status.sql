@@ -0,0 +1,11 @@
+-- Daily KPI rule status per segment, written by monitoring_agent from the rules in
+-- amids/kpi_rules.json (`breached_rules` is a JSON list of rule names).
+create table if not exists kpi_rule_status (
+    run_date text not null,
+    channel text not null,
+    region text not null,
+    status text not null,
+    breached_rules text not null,
+    rules_version text not null,
+    primary key (run_date, channel, region)
+) without rowid;
@@ -0,0 +1,20 @@
+"""
+execution_log: one row per orchestrator run (parent_id null) plus one per
+pipeline node or backfill checkpoint (parent_id, node, run_date).
+
+Warehouses created while these columns were added on the fly may already
+have some of them, so only the missing ones are added.
+"""
+
+COLUMNS = (
+    ("parent_id", "integer references execution_log(id)"),
+    ("node", "text"),
+    ("run_date", "text"),
+)
+
+
+def upgrade(conn):
+    existing = {row[1] for row in conn.execute("pragma table_info(execution_log)")}
+    for name, ddl in COLUMNS:
+        if name not in existing:
+            conn.execute(f"alter table execution_log add column {name} {ddl}")
@@ -0,0 +1,10 @@
+-- Watermarks and other small pieces of pipeline state, keyed by name.
+create table if not exists pipeline_state (
+    key text primary key,
+    value text not null,
+    updated_at text not null default (datetime('now'))
+);
+
+-- Per-segment history lookups (e.g. the previous day for lag-based KPIs).
+create index if not exists idx_campaign_daily_segment_series
+    on campaign_daily_segment (channel, region, run_date);
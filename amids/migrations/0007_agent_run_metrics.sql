@@ -0,0 +1,18 @@
+-- One row per agent invocation: timings, traced memory peak and warehouse rows.
+create table if not exists agent_run_metrics (
+    id integer primary key autoincrement,
+    execution_id integer references execution_log(id),
+    agent text not null,
+    run_date text,
+    status text not null,
+    started_at text not null,
+    wall_seconds real not null,
+    cpu_seconds real not null,
+    peak_memory_bytes integer,
+    max_rss_bytes integer,
+    rows_read integer not null default 0,
+    rows_written integer not null default 0
+);
+
+create index if not exists idx_agent_run_metrics_execution
+    on agent_run_metrics (execution_id, agent);
@@ -0,0 +1,7 @@
+-- Node rows of a run (run_report, dashboards' data version) and backfill checkpoint
+-- lookups by node and run date no longer scan the whole log.
+create index if not exists idx_execution_log_parent
+    on execution_log (parent_id);
+
+create index if not exists idx_execution_log_node
+    on execution_log (node, run_date);
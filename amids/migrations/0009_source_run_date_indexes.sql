@@ -0,0 +1,6 @@
+-- validation_agent checks every source table for one run date per day.
+create index if not exists idx_crm_leads_daily_run_date
+    on crm_leads_daily (run_date);
+
+create index if not exists idx_revenue_daily_run_date
+    on revenue_daily (run_date);
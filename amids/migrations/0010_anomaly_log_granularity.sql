@@ -0,0 +1,3 @@
+-- anomaly_agent scores channel:region segments or channel:region:campaign_id series;
+-- each granularity replaces only its own rows for a run date.
+alter table anomaly_log add column granularity text not null default 'segment';
@@ -0,0 +1,2 @@
+-- Change in resident memory over each agent invocation (max_rss_bytes is process-wide).
+alter table agent_run_metrics add column rss_delta_bytes integer;
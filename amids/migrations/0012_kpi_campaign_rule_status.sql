@@ -0,0 +1,12 @@
+-- Daily KPI rule status per campaign, evaluated by monitoring_agent alongside the
+-- per-segment kpi_rule_status rows.
+create table if not exists kpi_campaign_rule_status (
+    run_date text not null,
+    campaign_id text not null,
+    channel text not null,
+    region text not null,
+    status text not null,
+    breached_rules text not null,
+    rules_version text not null,
+    primary key (run_date, campaign_id)
+) without rowid;
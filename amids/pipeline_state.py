@@ -0,0 +1,45 @@
+"""
+Small named values persisted in the `pipeline_state` table.
+
+Used for incremental processing: a producer records the earliest date it
+changed (`mark_changed_since`), and the consumer reads that key, reprocesses
+from there and clears it in the same transaction.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+# Earliest campaign_daily_segment run_date rewritten or removed since kpi_agent last ran.
+ROLLUP_CHANGED_SINCE = "campaign_daily_segment.changed_since"
+
+
+def get_state(cur: sqlite3.Cursor, key: str) -> str | None:
+    row = cur.execute("select value from pipeline_state where key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state(cur: sqlite3.Cursor, key: str, value: str) -> None:
+    cur.execute(
+        """
+        insert into pipeline_state (key, value) values (?, ?)
+        on conflict (key) do update set value = excluded.value, updated_at = datetime('now')
+        """,
+        (key, value),
+    )
+
+
+def mark_changed_since(cur: sqlite3.Cursor, key: str, since: str) -> None:
+    """Lower the stored date to `since`; an earlier pending date is kept."""
+    cur.execute(
+        """
+        insert into pipeline_state (key, value) values (?, ?)
+        on conflict (key) do update
+        set value = min(value, excluded.value), updated_at = datetime('now')
+        """,
+        (key, since),
+    )
+
+
+def clear_state(cur: sqlite3.Cursor, key: str) -> None:
+    cur.execute("delete from pipeline_state where key = ?", (key,))
@@ -0,0 +1,151 @@
+"""
+Declarative data quality checks evaluated with one aggregate scan per table.
+
+Each `QualityCheck` is a SQL aggregate expression over one table's rows for a
+run date, a threshold and the status recorded when the comparison fails.
+`compile_checks` folds every check on a table into a single
+``select <expr>, <expr>, ... from <table> where run_date = ?``, so adding a
+check adds a column to an existing scan rather than another scan.
+
+`violations` builds the common case: the number of rows matching a row-level
+predicate, which passes when it is zero.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+import sqlite3
+
+SEVERITIES = ("warn", "fail")
+COMPARISONS = ("<=", ">=")
+
+
+@dataclass(frozen=True)
+class QualityCheck:
+    name: str
+    table: str
+    # Aggregate over the table's rows for one run date; null counts as 0.
+    expression: str
+    threshold: float = 0.0
+    comparison: str = "<="  # passes when `observed <comparison> threshold`
+    severity: str = "fail"
+    details: str = ""
+
+    def __post_init__(self) -> None:
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"check {self.name!r}: severity must be one of {', '.join(SEVERITIES)}")
+        if self.comparison not in COMPARISONS:
+            raise ValueError(f"check {self.name!r}: comparison must be one of {', '.join(COMPARISONS)}")
+
+    def status(self, observed: float) -> str:
+        passed = observed <= self.threshold if self.comparison == "<=" else observed >= self.threshold
+        return "pass" if passed else self.severity
+
+
+def violations(name: str, table: str, predicate: str, details: str, severity: str = "fail") -> QualityCheck:
+    """A check counting the rows that match `predicate`; passes when there are none."""
+    return QualityCheck(name, table, f"sum(case when {predicate} then 1 else 0 end)", severity=severity, details=details)
+
+
+QUALITY_CHECKS: tuple[QualityCheck, ...] = (
+    violations(
+        "null_check_spend",
+        "campaign_performance_daily",
+        "spend is null",
+        "Spend should never be null in campaign data.",
+    ),
+    violations(
+        "null_check_revenue",
+        "campaign_performance_daily",
+        "revenue is null",
+        "Revenue should never be null in campaign data.",
+    ),
+    QualityCheck(
+        "duplicate_campaign_day",
+        "campaign_performance_daily",
+        "count(*) - count(distinct campaign_id)",
+        details="Campaign/day records should be unique (extra rows per campaign and day).",
+    ),
+    QualityCheck(
+        "funnel_consistency",
+        "campaign_performance_daily",
+        "sum((clicks > impressions) + (leads > clicks) + (signups > opportunities))",
+        details="Click <= impression, lead <= click, signup <= opportunity.",
+    ),
+    QualityCheck(
+        "roi_sanity",
+        "campaign_performance_daily",
+        "case when sum(spend) > 0 then sum(revenue) * 1.0 / sum(spend) else 0 end",
+        threshold=0.1,
+        comparison=">=",
+        severity="warn",
+        details="Daily ROI is unusually low when below 0.1.",
+    ),
+    QualityCheck(
+        "crm_duplicate_segment_day",
+        "crm_leads_daily",
+        "count(*) - count(distinct segment)",
+        details="CRM segment/day records should be unique (extra rows per segment and day).",
+    ),
+    QualityCheck(
+        "crm_funnel_consistency",
+        "crm_leads_daily",
+        "sum((opportunities > leads) + (customers > opportunities))",
+        details="Opportunity <= lead, customer <= opportunity.",
+    ),
+    violations(
+        "crm_negative_revenue",
+        "crm_leads_daily",
+        "revenue < 0",
+        "CRM revenue should not be negative.",
+    ),
+    QualityCheck(
+        "revenue_duplicate_segment_day",
+        "revenue_daily",
+        "count(*) - count(distinct channel || '|' || region)",
+        details="Revenue channel/region/day records should be unique (extra rows per segment and day).",
+    ),
+    violations(
+        "revenue_negative",
+        "revenue_daily",
+        "revenue < 0",
+        "Daily revenue should not be negative.",
+    ),
+)
+
+
+def tables(checks: Iterable[QualityCheck] = QUALITY_CHECKS) -> tuple[str, ...]:
+    """Tables the checks read, in first-use order."""
+    return tuple(dict.fromkeys(check.table for check in checks))
+
+
+def compile_checks(checks: Sequence[QualityCheck] = QUALITY_CHECKS) -> dict[str, tuple[str, list[QualityCheck]]]:
+    """Map each table to its single-scan aggregate query and the checks it answers, in column order."""
+    names = [check.name for check in checks]
+    if len(set(names)) != len(names):
+        raise ValueError("quality check names must be unique")
+    compiled: dict[str, tuple[str, list[QualityCheck]]] = {}
+    for table in tables(checks):
+        selected = [check for check in checks if check.table == table]
+        columns = ",\n    ".join(f"{check.expression} as {check.name}" for check in selected)
+        compiled[table] = (f"select\n    {columns}\nfrom {table}\nwhere run_date = ?", selected)
+    return compiled
+
+
+def evaluate(
+    conn: sqlite3.Connection,
+    run_date: str,
+    checks: Sequence[QualityCheck] = QUALITY_CHECKS,
+) -> list[tuple]:
+    """
+    Run every check for `run_date` and return data_quality_log rows
+    (run_date, check_name, status, observed_value, threshold_value, details).
+    """
+    results: list[tuple] = []
+    for sql, selected in compile_checks(checks).values():
+        row = conn.execute(sql, (run_date,)).fetchone()
+        for check, value in zip(selected, row):
+            observed = float(value or 0)
+            results.append((run_date, check.name, check.status(observed), observed, check.threshold, check.details))
+    return results
@@ -0,0 +1,224 @@
+"""
+Declarative KPI threshold rules evaluated over (series x day) matrices.
+
+Rules are loaded from JSON (`settings.kpi_rules_path`) and compiled once per
+file version: rules of the same kind on the same metric are stacked so one
+broadcast comparison evaluates all of them for every series and day. Four
+kinds are supported:
+
+- ``min`` / ``max``: value below / above ``threshold``.
+- ``pct_change``: change versus ``periods`` days earlier crosses ``threshold``
+  (``direction`` ``"below"`` for drops such as ``-0.4``, ``"above"`` for spikes).
+- ``consecutive_breach``: value on the ``direction`` side of ``threshold`` for
+  at least ``periods`` days in a row.
+
+Cells that breach no rule are ``healthy``; otherwise they take the highest
+severity among the breached rules. Cells without data are ``no_data``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping
+import hashlib
+import json
+
+import numpy as np
+
+from .config import settings
+
+RULE_KINDS = ("min", "max", "pct_change", "consecutive_breach")
+SEVERITIES = ("warning", "critical")
+# Status codes used in status matrices; index = code + 1.
+STATUS_LABELS = ("no_data", "healthy", "warning", "critical")
+NO_DATA, HEALTHY, WARNING, CRITICAL = -1, 0, 1, 2
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    metric: str
+    kind: str
+    threshold: float
+    periods: int = 1
+    direction: str = "below"
+    severity: str = "critical"
+
+    def __post_init__(self) -> None:
+        if self.kind not in RULE_KINDS:
+            raise ValueError(f"rule {self.name!r}: kind must be one of {', '.join(RULE_KINDS)}")
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"rule {self.name!r}: severity must be one of {', '.join(SEVERITIES)}")
+        if self.direction not in ("below", "above"):
+            raise ValueError(f"rule {self.name!r}: direction must be 'below' or 'above'")
+        if self.periods < 1:
+            raise ValueError(f"rule {self.name!r}: periods must be >= 1")
+
+    @property
+    def severity_code(self) -> int:
+        return SEVERITIES.index(self.severity) + 1
+
+
+def _crosses(values: np.ndarray, thresholds: np.ndarray, below: np.ndarray) -> np.ndarray:
+    """(rules, series, days) mask; `thresholds` and `below` are per-rule vectors."""
+    limit = thresholds[:, None, None]
+    with np.errstate(invalid="ignore"):
+        return np.where(below[:, None, None], values[None] < limit, values[None] > limit)
+
+
+def _run_lengths(mask: np.ndarray) -> np.ndarray:
+    """Length of the run of True values ending at each cell along the last axis."""
+    counts = np.cumsum(mask, axis=-1)
+    resets = np.maximum.accumulate(np.where(mask, 0, counts), axis=-1)
+    return counts - resets
+
+
+@dataclass
+class RuleEvaluation:
+    rules: tuple[Rule, ...]
+    breaches: np.ndarray  # (rules, series, days) bool
+    status: np.ndarray  # (series, days) int8 status codes
+    values: dict[str, np.ndarray]
+
+    def status_labels(self) -> list[list[str]]:
+        return [[STATUS_LABELS[code + 1] for code in row] for row in self.status.tolist()]
+
+    def breach_records(self, series: list[dict], dates: list[str]) -> list[dict]:
+        """One record per breached (rule, series, day), most recent day first."""
+        rule_ids, series_ids, day_ids = np.nonzero(self.breaches)
+        order = np.lexsort((rule_ids, series_ids, -day_ids))
+        records = []
+        for rule_idx, series_idx, day_idx in zip(
+            rule_ids[order].tolist(), series_ids[order].tolist(), day_ids[order].tolist()
+        ):
+            rule = self.rules[rule_idx]
+            records.append(
+                {
+                    "run_date": dates[day_idx],
+                    **series[series_idx],
+                    "rule": rule.name,
+                    "metric": rule.metric,
+                    "kind": rule.kind,
+                    "severity": rule.severity,
+                    "value": round(float(self.values[rule.metric][series_idx, day_idx]), 4),
+                    "threshold": rule.threshold,
+                }
+            )
+        return records
+
+
+@dataclass
+class RuleSet:
+    rules: tuple[Rule, ...]
+    version: str = ""
+    # Content hash of the source config; changes whenever any rule changes.
+    fingerprint: str = ""
+    _groups: list[tuple] = field(init=False, default_factory=list, repr=False)
+
+    def __post_init__(self) -> None:
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("rule names must be unique")
+        # Compile: per (metric, kind, periods), the rule indexes with their
+        # threshold and direction vectors for one broadcast comparison.
+        grouped: dict[tuple, list[int]] = {}
+        for idx, rule in enumerate(self.rules):
+            grouped.setdefault((rule.metric, rule.kind, rule.periods), []).append(idx)
+        for (metric, kind, periods), ids in grouped.items():
+            rules = [self.rules[idx] for idx in ids]
+            thresholds = np.array([rule.threshold for rule in rules])
+            if kind in ("min", "max"):
+                below = np.full(len(rules), kind == "min")
+            else:
+                below = np.array([rule.direction == "below" for rule in rules])
+            self._groups.append((metric, kind, periods, np.array(ids), thresholds, below))
+
+    @classmethod
+    def from_dict(cls, config: Mapping) -> "RuleSet":
+        rules = tuple(Rule(**rule) for rule in config.get("rules", []))
+        fingerprint = hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        return cls(rules=rules, version=str(config.get("version", "")) or fingerprint, fingerprint=fingerprint)
+
+    def metrics(self) -> set[str]:
+        return {rule.metric for rule in self.rules}
+
+    def evaluate(self, matrices: Mapping[str, np.ndarray]) -> RuleEvaluation:
+        """
+        Evaluate every rule whose metric is present in `matrices`.
+
+        All matrices must share one (series, days) shape with days ascending.
+        """
+        shape = tuple(np.shape(next(iter(matrices.values())))) if matrices else (0, 0)
+        values = {name: np.asarray(matrix, dtype=float).reshape(shape) for name, matrix in matrices.items()}
+        breaches = np.zeros((len(self.rules),) + shape, dtype=bool)
+
+        for metric, kind, periods, ids, thresholds, below in self._groups:
+            matrix = values.get(metric)
+            if matrix is None:
+                continue
+            if kind == "pct_change":
+                previous = np.full_like(matrix, np.nan)
+                if periods < matrix.shape[-1]:
+                    previous[:, periods:] = matrix[:, :-periods]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    change = np.where(previous != 0, (matrix - previous) / np.abs(previous), np.nan)
+                breaches[ids] = _crosses(change, thresholds, below)
+            elif kind == "consecutive_breach":
+                breaches[ids] = _run_lengths(_crosses(matrix, thresholds, below)) >= periods
+            else:
+                breaches[ids] = _crosses(matrix, thresholds, below)
+
+        active = np.array([rule.metric in values for rule in self.rules], dtype=bool)
+        rules = tuple(rule for rule, keep in zip(self.rules, active) if keep)
+        breaches = breaches[active]
+        severity = np.array([rule.severity_code for rule in rules], dtype=np.int8)
+        status = np.zeros(shape, dtype=np.int8)
+        if rules:
+            status = np.where(breaches, severity[:, None, None], 0).max(axis=0).astype(np.int8)
+        if values:
+            observed = np.zeros(shape, dtype=bool)
+            for metric in {rule.metric for rule in rules} or values:
+                observed |= ~np.isnan(values[metric])
+            status[~observed] = NO_DATA
+        return RuleEvaluation(rules=rules, breaches=breaches, status=status, values=values)
+
+    def summary_statuses(self, metrics: Mapping[str, float]) -> list[dict]:
+        """
+        Evaluate scalar metrics (one value each) in the `monitor_kpis` output shape.
+
+        Only min/max rules apply to scalars; `status` is the worst breached severity.
+        """
+        names = list(metrics)
+        evaluation = self.evaluate({name: np.array([[float(metrics[name])]]) for name in names})
+        bounds: dict[str, dict[str, float | None]] = {name: {"min": None, "max": None} for name in names}
+        for rule in evaluation.rules:
+            if rule.kind in ("min", "max"):
+                bounds[rule.metric][rule.kind] = rule.threshold
+        codes = {}
+        for rule, mask in zip(evaluation.rules, evaluation.breaches):
+            if mask.any():
+                codes[rule.metric] = max(codes.get(rule.metric, HEALTHY), rule.severity_code)
+        return [
+            {
+                "metric": name,
+                "value": round(float(metrics[name]), 4),
+                "min_threshold": bounds[name]["min"],
+                "max_threshold": bounds[name]["max"],
+                "status": STATUS_LABELS[codes.get(name, HEALTHY) + 1],
+            }
+            for name in names
+        ]
+
+
+@lru_cache(maxsize=8)
+def _load(path: str, mtime_ns: int) -> RuleSet:
+    with open(path, encoding="utf-8") as handle:
+        return RuleSet.from_dict(json.load(handle))
+
+
+def load_rule_set(path: Path | None = None) -> RuleSet:
+    """Load and compile the KPI rules file; recompiled only when the file changes."""
+    target = Path(path or settings.kpi_rules_path)
+    return _load(str(target), target.stat().st_mtime_ns)
@@ -0,0 +1,186 @@
+"""
+Versioned warehouse schema migrations.
+
+Migrations live in amids/migrations as `NNNN_name.sql`, or `NNNN_name.py`
+with an `upgrade(conn)` function, and are applied in version order. Each runs
+in its own immediate transaction together with its `schema_version` row, so
+it is applied exactly once per warehouse even when the pipeline and the API
+start at the same time.
+
+`migrate()` first reads the applied versions over a pooled read-only
+connection; an up-to-date warehouse never takes the write lock.
+
+SQLite builds an index in a single statement. In WAL mode readers keep
+serving the previous snapshot while it runs and only writers wait, so new
+indexes can land on a live warehouse; a progress handler logs statements
+that run for a while.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .config import BASE_DIR
+from .connections import ConnectionManager, get_manager
+
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = BASE_DIR / "migrations"
+PROGRESS_LOG_SECONDS = 5.0
+# SQLite VM instructions between progress handler calls.
+_PROGRESS_STEPS = 100_000
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def label(self) -> str:
+        return f"{self.version:04d}_{self.name}"
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Migration files in `directory`, ordered by version."""
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.iterdir()):
+        match = _MIGRATION_FILE.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"duplicate migration version {version:04d}: {path.name}")
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_versions(manager: ConnectionManager | None = None) -> set[int]:
+    """Versions recorded in schema_version (empty for a new or unversioned warehouse)."""
+    manager = manager or get_manager()
+    if not manager.path.exists():
+        return set()
+    try:
+        with manager.read() as conn:
+            return {row[0] for row in conn.execute("select version from schema_version")}
+    except sqlite3.OperationalError:
+        return set()
+
+
+def _statements(sql: str) -> Iterator[str]:
+    buffer = ""
+    for line in sql.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer.strip()
+            buffer = ""
+    rest = "\n".join(line for line in buffer.splitlines() if not line.lstrip().startswith("--")).strip()
+    if rest:
+        raise ValueError(f"incomplete SQL statement: {rest[:80]}")
+
+
+def _progress_logger(migration: Migration) -> Callable[[], int]:
+    started = time.monotonic()
+    next_log = started + PROGRESS_LOG_SECONDS
+
+    def progress() -> int:
+        nonlocal next_log
+        now = time.monotonic()
+        if now >= next_log:
+            logger.info("Migration %s still running (%.0fs)", migration.label, now - started)
+            next_log = now + PROGRESS_LOG_SECONDS
+        return 0
+
+    return progress
+
+
+def _apply(conn: sqlite3.Connection, migration: Migration) -> None:
+    if migration.path.suffix == ".py":
+        spec = importlib.util.spec_from_file_location(f"amids_migration_{migration.label}", migration.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(conn)
+        return
+    for statement in _statements(migration.path.read_text(encoding="utf-8")):
+        if statement.lower().startswith("create index"):
+            logger.info("Migration %s: %s", migration.label, " ".join(statement.split()))
+        conn.execute(statement)
+
+
+def migrate(
+    target: int | None = None,
+    manager: ConnectionManager | None = None,
+    directory: Path = MIGRATIONS_DIR,
+) -> list[Migration]:
+    """
+    Apply pending migrations (up to version `target`) and return those applied.
+
+    Warehouses created before versioning have no schema_version table; every
+    migration is written to be a no-op for objects that already exist, so
+    they are brought up to date the same way as a new file.
+    """
+    manager = manager or get_manager()
+    pending = [
+        migration
+        for migration in discover(directory)
+        if target is None or migration.version <= target
+    ]
+    done = applied_versions(manager)
+    pending = [migration for migration in pending if migration.version not in done]
+
+    applied: list[Migration] = []
+    for migration in pending:
+        with manager.write(immediate=True) as conn:
+            conn.execute(
+                """
+                create table if not exists schema_version (
+                    version integer primary key,
+                    name text not null,
+                    applied_at text not null default (datetime('now')),
+                    seconds real not null
+                )
+                """
+            )
+            if conn.execute("select 1 from schema_version where version = ?", (migration.version,)).fetchone():
+                continue  # applied by another process since the check above
+            logger.info("Applying migration %s", migration.label)
+            started = time.perf_counter()
+            conn.set_progress_handler(_progress_logger(migration), _PROGRESS_STEPS)
+            try:
+                _apply(conn, migration)
+            finally:
+                conn.set_progress_handler(None, 0)
+            seconds = time.perf_counter() - started
+            conn.execute(
+                "insert into schema_version (version, name, seconds) values (?, ?, ?)",
+                (migration.version, migration.name, seconds),
+            )
+        logger.info("Applied migration %s in %.2fs", migration.label, seconds)
+        applied.append(migration)
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply AMIDS warehouse schema migrations.")
+    parser.add_argument("--target", type=int, help="apply migrations up to this version")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations only")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    if args.status:
+        done = applied_versions()
+        for migration in discover():
+            print(f"{migration.label:<40}{'applied' if migration.version in done else 'pending'}")
+    else:
+        applied = migrate(target=args.target)
+        print(f"Applied {len(applied)} migration(s)." if applied else "Schema is up to date.")
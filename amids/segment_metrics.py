@@ -0,0 +1,70 @@
+"""
+Derived campaign metrics and (series x day) matrices.
+
+Raw warehouse rows carry additive counters (impressions, clicks, leads, spend,
+revenue). Ratios are derived here in one place so the anomaly scan, the
+quantile sketches and the KPI rules engine agree on CAC, CTR and ROI.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+SEGMENT_METRICS = ("revenue", "spend", "cac", "ctr", "roi")
+# Order of the counter columns expected by `derive_metrics`.
+COUNTER_COLUMNS = ("impressions", "clicks", "leads", "spend", "revenue")
+
+
+def derive_metrics(counters: np.ndarray) -> dict[str, np.ndarray]:
+    """Map an (n, 5) array of COUNTER_COLUMNS to metric vectors; undefined ratios are NaN."""
+    impressions, clicks, leads, spend, revenue = np.asarray(counters, dtype=float).reshape(-1, 5).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "revenue": revenue,
+            "spend": spend,
+            "cac": np.where(leads > 0, spend / leads, np.nan),
+            "ctr": np.where(impressions > 0, clicks / impressions, np.nan),
+            "roi": np.where(spend > 0, revenue / spend, np.nan),
+        }
+
+
+@dataclass
+class MetricMatrices:
+    """Metric values laid out as (series, day) matrices; missing cells are NaN."""
+
+    dimensions: tuple[str, ...]
+    series: list[tuple]
+    dates: list[str]
+    matrices: dict[str, np.ndarray]
+
+    def series_labels(self) -> list[dict]:
+        return [dict(zip(self.dimensions, key)) for key in self.series]
+
+
+def metric_matrices(rows: Sequence[tuple], dimensions: tuple[str, ...]) -> MetricMatrices:
+    """
+    Pivot `(run_date, *dimensions, *COUNTER_COLUMNS)` rows into per-metric matrices.
+
+    Series appear in first-seen order and dates ascending.
+    """
+    width = len(dimensions)
+    dates = sorted({row[0] for row in rows})
+    date_index = {run_date: idx for idx, run_date in enumerate(dates)}
+    series_index: dict[tuple, int] = {}
+    series_ids = np.fromiter(
+        (series_index.setdefault(tuple(row[1 : width + 1]), len(series_index)) for row in rows),
+        dtype=np.intp,
+        count=len(rows),
+    )
+    day_ids = np.fromiter((date_index[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+    counters = np.array([row[width + 1 :] for row in rows], dtype=float).reshape(-1, len(COUNTER_COLUMNS))
+
+    matrices = {}
+    for name, vector in derive_metrics(counters).items():
+        matrix = np.full((len(series_index), len(dates)), np.nan)
+        matrix[series_ids, day_ids] = vector
+        matrices[name] = matrix
+    return MetricMatrices(dimensions, list(series_index), dates, matrices)
@@ -0,0 +1,191 @@
+"""
+Mergeable quantile sketches (KLL) for medians, percentiles and MAD.
+
+A `QuantileSketch` keeps a bounded number of weighted samples in a stack of
+compactors: level ``h`` holds items of weight ``2**h``. When a level is full
+it is sorted and every other item (random offset) is promoted to the next
+level, so memory stays O(k log(n/k)) however many values are added. Sketches
+built over disjoint data (one per day and segment) merge into a sketch of the
+union that carries the same guarantee.
+
+Error bounds: while at most ``k`` values have been seen the sketch is exact.
+Beyond that, the rank of any returned quantile is within ``rank_error() * n``
+of the requested rank with ~99% confidence, where ``rank_error()`` follows the
+empirical KLL constant ``2.296 / k**0.9723`` (about 1.3% for the default
+``k=200``). The approximate MAD is the median of ``|x - median|`` over the
+weighted samples, so it inherits the same rank error twice (once for the
+median, once for the deviations).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+import math
+import random
+import struct
+
+import numpy as np
+
+DEFAULT_K = 200
+_CAPACITY_DECAY = 2.0 / 3.0
+_MIN_CAPACITY = 2
+_MAGIC = b"KLL1"
+_HEADER = struct.Struct("<4sHQddH")
+
+
+class QuantileSketch:
+    def __init__(self, k: int = DEFAULT_K, seed: int | None = None) -> None:
+        if k < 8:
+            raise ValueError("k must be >= 8")
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(_MIN_CAPACITY, int(math.ceil(self.k * _CAPACITY_DECAY**depth)))
+
+    def _retained(self) -> int:
+        return sum(items.size for items in self.levels)
+
+    def _compress(self) -> None:
+        while self._retained() > sum(self._capacity(h) for h in range(len(self.levels))):
+            for level, items in enumerate(self.levels):
+                if items.size >= self._capacity(level):
+                    break
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            keep = items[-1:] if items.size % 2 else items[:0]
+            pairs = items[: items.size - keep.size]
+            promoted = pairs[self._rng.randint(0, 1) :: 2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values: float | Sequence[float] | np.ndarray) -> "QuantileSketch":
+        """Add one value or an array of values; NaN values are ignored."""
+        arr = np.asarray(values, dtype=float).reshape(-1)
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return self
+        self.n += int(arr.size)
+        self.min = min(self.min, float(arr.min()))
+        self.max = max(self.max, float(arr.max()))
+        self.levels[0] = np.concatenate([self.levels[0], arr])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch into this one (in place) and return self."""
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @classmethod
+    def merged(cls, sketches: Iterable["QuantileSketch"], k: int = DEFAULT_K) -> "QuantileSketch":
+        """Merge many sketches with a single compression pass."""
+        result = cls(k=k)
+        parts: list[list[np.ndarray]] = []
+        for sketch in sketches:
+            if sketch.n == 0:
+                continue
+            for level, items in enumerate(sketch.levels):
+                if level == len(parts):
+                    parts.append([])
+                parts[level].append(items)
+            result.n += sketch.n
+            result.min = min(result.min, sketch.min)
+            result.max = max(result.max, sketch.max)
+        if parts:
+            result.levels = [np.concatenate(level) for level in parts]
+            result._compress()
+        return result
+
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(items.size, float(2**level)) for level, items in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, fractions: Sequence[float]) -> list[float | None]:
+        """Approximate values at each fraction in [0, 1]; None for an empty sketch."""
+        if self.n == 0:
+            return [None for _ in fractions]
+        values, cumulative = self._weighted()
+        out: list[float | None] = []
+        for fraction in fractions:
+            if not 0.0 <= fraction <= 1.0:
+                raise ValueError("quantile fractions must be within [0, 1]")
+            if fraction == 0.0:
+                out.append(self.min)
+            elif fraction == 1.0:
+                out.append(self.max)
+            else:
+                idx = int(np.searchsorted(cumulative, fraction * cumulative[-1], side="left"))
+                out.append(float(values[min(idx, values.size - 1)]))
+        return out
+
+    def quantile(self, fraction: float) -> float | None:
+        return self.quantiles([fraction])[0]
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of values <= `value`."""
+        if self.n == 0:
+            return 0.0
+        values, cumulative = self._weighted()
+        idx = int(np.searchsorted(values, value, side="right"))
+        return float(cumulative[idx - 1] / cumulative[-1]) if idx else 0.0
+
+    def median_absolute_deviation(self) -> float | None:
+        """Approximate median of |x - median| over the weighted samples."""
+        if self.n == 0:
+            return None
+        values, cumulative = self._weighted()
+        weights = np.diff(cumulative, prepend=0.0)
+        idx = int(np.searchsorted(cumulative, 0.5 * cumulative[-1], side="left"))
+        deviations = np.abs(values - values[min(idx, values.size - 1)])
+        order = np.argsort(deviations, kind="stable")
+        dev_cumulative = np.cumsum(weights[order])
+        pos = int(np.searchsorted(dev_cumulative, 0.5 * dev_cumulative[-1], side="left"))
+        return float(deviations[order][min(pos, order.size - 1)])
+
+    def rank_error(self) -> float:
+        """Normalized rank error bound (~99% confidence); 0.0 while the sketch is exact."""
+        if len(self.levels) == 1 or all(items.size == 0 for items in self.levels[1:]):
+            return 0.0
+        return 2.296 / self.k**0.9723
+
+    def to_bytes(self) -> bytes:
+        counts = struct.pack(f"<{len(self.levels)}I", *(items.size for items in self.levels))
+        items = np.concatenate(self.levels).astype("<f8").tobytes()
+        header = _HEADER.pack(_MAGIC, self.k, self.n, self.min, self.max, len(self.levels))
+        return header + counts + items
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "QuantileSketch":
+        magic, k, n, low, high, num_levels = _HEADER.unpack_from(blob)
+        if magic != _MAGIC:
+            raise ValueError("not a serialized QuantileSketch")
+        counts = struct.unpack_from(f"<{num_levels}I", blob, _HEADER.size)
+        items = np.frombuffer(blob, dtype="<f8", offset=_HEADER.size + 4 * num_levels)
+        sketch = cls(k=k)
+        sketch.n, sketch.min, sketch.max = n, low, high
+        bounds = np.cumsum((0,) + counts)
+        sketch.levels = [items[start:stop].astype(float) for start, stop in zip(bounds[:-1], bounds[1:])]
+        return sketch
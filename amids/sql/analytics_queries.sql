@@ -1,12 +1,13 @@
 -- Portfolio SQL queries for recruiter demos.
 -- These statements intentionally showcase joins, group-by logic, and window functions.
+-- They read the campaign_daily_segment rollup (one row per run_date, channel, region).
 
 -- 1) Revenue trend with moving average and day-over-day delta.
 with daily_revenue as (
     select
         run_date,
         sum(revenue) as revenue
-    from campaign_performance_daily
+    from campaign_daily_segment
     group by run_date
 )
 select
@@ -23,19 +24,19 @@ order by run_date;
 
 -- 2) Engagement and funnel performance by channel and region.
 select
-    c.channel,
-    c.region,
-    sum(c.impressions) as impressions,
-    sum(c.clicks) as clicks,
-    sum(c.leads) as leads,
-    sum(c.signups) as signups,
-    sum(c.spend) as spend,
-    sum(c.revenue) as revenue,
-    case when sum(c.impressions) > 0 then sum(c.clicks) * 1.0 / sum(c.impressions) end as ctr,
-    case when sum(c.clicks) > 0 then sum(c.leads) * 1.0 / sum(c.clicks) end as click_to_lead_rate,
-    case when sum(c.leads) > 0 then sum(c.signups) * 1.0 / sum(c.leads) end as lead_to_signup_rate
-from campaign_performance_daily c
-group by c.channel, c.region
+    s.channel,
+    s.region,
+    sum(s.impressions) as impressions,
+    sum(s.clicks) as clicks,
+    sum(s.leads) as leads,
+    sum(s.signups) as signups,
+    sum(s.spend) as spend,
+    sum(s.revenue) as revenue,
+    case when sum(s.impressions) > 0 then sum(s.clicks) * 1.0 / sum(s.impressions) end as ctr,
+    case when sum(s.clicks) > 0 then sum(s.leads) * 1.0 / sum(s.clicks) end as click_to_lead_rate,
+    case when sum(s.leads) > 0 then sum(s.signups) * 1.0 / sum(s.leads) end as lead_to_signup_rate
+from campaign_daily_segment s
+group by s.channel, s.region
 order by revenue desc;
 
 
@@ -55,16 +56,7 @@ with joined as (
             order by k.channel_roi desc
         ) as roi_rank
     from kpi_summary_daily k
-    join (
-        select
-            run_date,
-            channel,
-            region,
-            sum(revenue) as revenue,
-            sum(spend) as spend
-        from campaign_performance_daily
-        group by run_date, channel, region
-    ) c
+    join campaign_daily_segment c
       on k.run_date = c.run_date
      and k.channel = c.channel
      and k.region = c.region
@@ -87,13 +79,12 @@ order by run_date desc, roi_rank asc;
 -- 4) Risk score distribution for campaign segments.
 with segment_risk as (
     select
-        c.run_date,
-        c.channel,
-        c.region,
-        case when sum(c.leads) > 0 then sum(c.spend) * 1.0 / sum(c.leads) end as cac,
-        case when sum(c.signups) > 0 then sum(c.revenue) * 1.0 / sum(c.signups) end as ltv
-    from campaign_performance_daily c
-    group by c.run_date, c.channel, c.region
+        s.run_date,
+        s.channel,
+        s.region,
+        case when s.leads > 0 then s.spend * 1.0 / s.leads end as cac,
+        case when s.signups > 0 then s.revenue * 1.0 / s.signups end as ltv
+    from campaign_daily_segment s
 ),
 scored as (
     select
@@ -1,14 +1,50 @@
-with base as (
+-- KPI models per (run_date, channel, region) from the daily segment rollup.
+-- Recomputes run dates >= :start_date ('' rebuilds everything). For each segment the
+-- latest rollup row before :start_date is read as well so that revenue_growth's lag()
+-- sees the same previous day as a full rebuild; those lookback rows are not inserted.
+with recent_segments as (
+    select distinct channel, region
+    from campaign_daily_segment
+    where run_date >= :start_date
+),
+lookback as (
+    select
+        g.channel,
+        g.region,
+        (
+            select max(p.run_date)
+            from campaign_daily_segment p
+            where p.channel = g.channel
+              and p.region = g.region
+              and p.run_date < :start_date
+        ) as run_date
+    from recent_segments g
+),
+base as (
+    select
+        s.run_date,
+        s.channel,
+        s.region,
+        s.spend,
+        s.leads,
+        s.signups as customers,
+        s.revenue
+    from campaign_daily_segment s
+    where s.run_date >= :start_date
+    union all
     select
-        c.run_date,
-        c.channel,
-        c.region,
-        sum(c.spend) as spend,
-        sum(c.leads) as leads,
-        sum(c.signups) as customers,
-        sum(c.revenue) as revenue
-    from campaign_performance_daily c
-    group by c.run_date, c.channel, c.region
+        s.run_date,
+        s.channel,
+        s.region,
+        s.spend,
+        s.leads,
+        s.signups as customers,
+        s.revenue
+    from lookback l
+    join campaign_daily_segment s
+        on s.run_date = l.run_date
+       and s.channel = l.channel
+       and s.region = l.region
 ),
 mom as (
     select
@@ -59,5 +95,5 @@ select
     channel_roi,
     dense_rank() over (partition by run_date order by channel_roi desc) as campaign_rank,
     revenue_growth as mom_performance
-from with_kpis;
-
+from with_kpis
+where run_date >= :start_date;
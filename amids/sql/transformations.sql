@@ -1,29 +1,33 @@
 -- Reusable SQL transformations and analytical views for AMIDS.
+-- Views read the campaign_daily_segment rollup maintained by data_agent, so their cost
+-- scales with (run_date, channel, region) segments rather than raw campaign rows.
+-- Views are dropped and recreated so definition changes reach existing warehouses.
 
-create view if not exists vw_daily_channel_performance as
+drop view if exists vw_daily_channel_performance;
+create view vw_daily_channel_performance as
 select
-    c.run_date,
-    c.channel,
-    c.region,
-    sum(c.impressions) as impressions,
-    sum(c.clicks) as clicks,
-    sum(c.leads) as leads,
-    sum(c.signups) as signups,
-    sum(c.spend) as spend,
-    sum(c.revenue) as revenue,
-    case when sum(c.impressions) > 0 then sum(c.clicks) * 1.0 / sum(c.impressions) end as ctr,
-    case when sum(c.clicks) > 0 then sum(c.leads) * 1.0 / sum(c.clicks) end as click_to_lead_rate,
-    case when sum(c.spend) > 0 then sum(c.revenue) * 1.0 / sum(c.spend) end as roi
-from campaign_performance_daily c
-group by c.run_date, c.channel, c.region;
+    s.run_date,
+    s.channel,
+    s.region,
+    s.impressions,
+    s.clicks,
+    s.leads,
+    s.signups,
+    s.spend,
+    s.revenue,
+    case when s.impressions > 0 then s.clicks * 1.0 / s.impressions end as ctr,
+    case when s.clicks > 0 then s.leads * 1.0 / s.clicks end as click_to_lead_rate,
+    case when s.spend > 0 then s.revenue * 1.0 / s.spend end as roi
+from campaign_daily_segment s;
 
 
-create view if not exists vw_revenue_trends as
+drop view if exists vw_revenue_trends;
+create view vw_revenue_trends as
 with daily as (
     select
         run_date,
         sum(revenue) as daily_revenue
-    from campaign_performance_daily
+    from campaign_daily_segment
     group by run_date
 )
 select
@@ -37,20 +41,20 @@ select
 from daily;
 
 
-create view if not exists vw_risk_score_distribution as
+drop view if exists vw_risk_score_distribution;
+create view vw_risk_score_distribution as
 with channel_day as (
     select
-        c.run_date,
-        c.channel,
-        c.region,
-        sum(c.spend) as spend,
-        sum(c.revenue) as revenue,
-        sum(c.leads) as leads,
-        sum(c.signups) as signups,
-        case when sum(c.leads) > 0 then sum(c.spend) * 1.0 / sum(c.leads) end as cac,
-        case when sum(c.signups) > 0 then sum(c.revenue) * 1.0 / sum(c.signups) end as ltv
-    from campaign_performance_daily c
-    group by c.run_date, c.channel, c.region
+        s.run_date,
+        s.channel,
+        s.region,
+        s.spend,
+        s.revenue,
+        s.leads,
+        s.signups,
+        case when s.leads > 0 then s.spend * 1.0 / s.leads end as cac,
+        case when s.signups > 0 then s.revenue * 1.0 / s.signups end as ltv
+    from campaign_daily_segment s
 ),
 scored as (
     select
@@ -0,0 +1,363 @@
+"""
+Per-agent performance telemetry for pipeline runs.
+
+`measure` wraps one agent invocation and records a row in
+`agent_run_metrics`:
+
+- wall time and the CPU time of the running thread;
+- the change in the process's resident memory from start to end (Linux),
+  the process-wide max RSS and, with AMIDS_TRACE_MEMORY=1, the traced
+  (tracemalloc) allocation peak above the memory in use at start;
+- rows fetched from and rows changed in the warehouse, counted by the
+  connection manager (amids.connections.row_counters).
+
+Timings and row counts are per invocation even when agents run in parallel.
+Memory figures are process-wide underneath: the RSS delta of overlapping agents
+includes their neighbours' allocations, and the tracemalloc peak is only reset
+while no other agent is being measured, so for overlapping agents it is an
+upper bound. Max RSS is the process high-water mark, not a per-agent figure.
+
+`run_report` compares the latest runs and flags the slowest agents and the
+agents whose wall time regressed against the median of earlier runs; it backs
+`python -m amids.telemetry` and the API's /api/pipeline/report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import mmap
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from statistics import median
+from typing import Iterator
+
+from .config import settings
+from .connections import RowCounters, row_counters
+from .db import get_connection, get_read_connection
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+REPORT_RUNS = 5
+REGRESSION_THRESHOLD = 0.25
+# Agents faster than this are never flagged; their timings are mostly noise.
+REGRESSION_MIN_SECONDS = 0.05
+
+
+@dataclass
+class AgentRun:
+    agent: str
+    run_date: str | None
+    status: str
+    started_at: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_memory_bytes: int | None
+    rss_delta_bytes: int | None
+    max_rss_bytes: int | None
+    rows_read: int
+    rows_written: int
+
+
+_memory_lock = threading.Lock()
+_memory_active = 0
+_memory_started = False
+
+
+def _memory_start() -> int:
+    global _memory_active, _memory_started
+    with _memory_lock:
+        if _memory_active == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _memory_started = True
+            tracemalloc.reset_peak()
+        _memory_active += 1
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _memory_stop(baseline: int) -> int:
+    global _memory_active, _memory_started
+    with _memory_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _memory_active -= 1
+        if _memory_active == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+    return max(peak - baseline, 0)
+
+
+def _current_rss_bytes() -> int | None:
+    """Resident set size now; only available where /proc/self/statm exists (Linux)."""
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            return int(handle.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+@contextmanager
+def measure(agent: str, execution_id: int | None = None, run_date: date | str | None = None) -> Iterator[AgentRun]:
+    """
+    Measure the enclosed agent invocation and store it in agent_run_metrics.
+
+    The yielded AgentRun is filled in when the block exits; a raised
+    exception is recorded as status "failed" and re-raised.
+    """
+    if isinstance(run_date, date):
+        run_date = run_date.isoformat()
+    record = AgentRun(
+        agent, run_date, "completed", datetime.now(timezone.utc).isoformat(), 0.0, 0.0, None, None, None, 0, 0
+    )
+    counters = RowCounters()
+    token = row_counters.set(counters)
+    baseline = _memory_start() if settings.pipeline_trace_memory else None
+    rss_start = _current_rss_bytes()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    except BaseException:
+        record.status = "failed"
+        raise
+    finally:
+        record.wall_seconds = time.perf_counter() - wall
+        record.cpu_seconds = time.thread_time() - cpu
+        if baseline is not None:
+            record.peak_memory_bytes = _memory_stop(baseline)
+        row_counters.reset(token)
+        rss_end = _current_rss_bytes()
+        if rss_start is not None and rss_end is not None:
+            record.rss_delta_bytes = rss_end - rss_start
+        record.max_rss_bytes = _max_rss_bytes()
+        record.rows_read, record.rows_written = counters.read, counters.written
+        try:
+            _store(record, execution_id)
+        except Exception:
+            # Telemetry must never fail the agent it measures.
+            logger.exception("Could not record metrics for %s", agent)
+
+
+def _store(record: AgentRun, execution_id: int | None) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            insert into agent_run_metrics (
+                execution_id,
+                agent,
+                run_date,
+                status,
+                started_at,
+                wall_seconds,
+                cpu_seconds,
+                peak_memory_bytes,
+                rss_delta_bytes,
+                max_rss_bytes,
+                rows_read,
+                rows_written
+            )
+            values (?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                execution_id,
+                record.agent,
+                record.run_date,
+                record.status,
+                record.started_at,
+                record.wall_seconds,
+                record.cpu_seconds,
+                record.peak_memory_bytes,
+                record.rss_delta_bytes,
+                record.max_rss_bytes,
+                record.rows_read,
+                record.rows_written,
+            ),
+        )
+
+
+def empty_report(threshold: float = REGRESSION_THRESHOLD) -> dict:
+    return {"runs": [], "agents": [], "slowest": [], "regressions": [], "threshold": threshold}
+
+
+def run_report(
+    runs: int = REPORT_RUNS,
+    threshold: float = REGRESSION_THRESHOLD,
+    min_seconds: float = REGRESSION_MIN_SECONDS,
+) -> dict:
+    """
+    Summarize the latest `runs` orchestrator runs that recorded agent metrics.
+
+    Agent figures are totals per run (a backfill calls most agents once per
+    date). The newest run is compared with the median of the earlier ones: an
+    agent regressed when its wall time grew by more than `threshold` (a
+    fraction) and by at least `min_seconds`.
+    """
+    with get_read_connection() as conn:
+        run_rows = conn.execute(
+            """
+            select e.id, e.run_date, e.status, e.started_at, e.finished_at, e.details
+            from execution_log e
+            where e.parent_id is null
+              and exists (select 1 from agent_run_metrics m where m.execution_id = e.id)
+            order by e.id desc
+            limit ?
+            """,
+            (runs,),
+        ).fetchall()
+        run_ids = [row[0] for row in run_rows]
+        metric_rows: list[tuple] = []
+        if run_ids:
+            metric_rows = conn.execute(
+                f"""
+                select
+                    execution_id,
+                    agent,
+                    count(*),
+                    sum(status = 'failed'),
+                    sum(wall_seconds),
+                    sum(cpu_seconds),
+                    max(peak_memory_bytes),
+                    max(rss_delta_bytes),
+                    max(max_rss_bytes),
+                    sum(rows_read),
+                    sum(rows_written)
+                from agent_run_metrics
+                where execution_id in ({",".join("?" * len(run_ids))})
+                group by execution_id, agent
+                """,
+                run_ids,
+            ).fetchall()
+
+    per_run: dict[int, dict[str, dict]] = {run_id: {} for run_id in run_ids}
+    for (run_id, agent, calls, failures, wall, cpu, peak, rss_delta, rss, read, written) in metric_rows:
+        per_run[run_id][agent] = {
+            "agent": agent,
+            "invocations": calls,
+            "failures": failures,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "peak_memory_bytes": peak,
+            "rss_delta_bytes": rss_delta,
+            "max_rss_bytes": rss,
+            "rows_read": read,
+            "rows_written": written,
+        }
+
+    report = empty_report(threshold)
+    report["runs"] = [
+        {
+            "execution_id": run_id,
+            "run_date": run_date,
+            "status": status,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "details": details,
+            "agent_seconds": round(sum(a["wall_seconds"] for a in per_run[run_id].values()), 4),
+        }
+        for (run_id, run_date, status, started_at, finished_at, details) in run_rows
+    ]
+    if not run_ids:
+        return report
+
+    latest, earlier = per_run[run_ids[0]], [per_run[run_id] for run_id in run_ids[1:]]
+    total = sum(agent["wall_seconds"] for agent in latest.values()) or 1.0
+    for name, agent in sorted(latest.items(), key=lambda item: -item[1]["wall_seconds"]):
+        history = [run[name]["wall_seconds"] for run in earlier if name in run]
+        baseline = median(history) if history else None
+        change = (agent["wall_seconds"] - baseline) / baseline if baseline else None
+        regressed = (
+            baseline is not None
+            and agent["wall_seconds"] > baseline * (1 + threshold)
+            and agent["wall_seconds"] - baseline >= min_seconds
+        )
+        report["agents"].append(
+            {
+                **agent,
+                "share": round(agent["wall_seconds"] / total, 4),
+                "baseline_wall_seconds": None if baseline is None else round(baseline, 4),
+                "change": None if change is None else round(change, 4),
+                "regressed": regressed,
+            }
+        )
+        if regressed:
+            report["regressions"].append(name)
+    report["slowest"] = [agent["agent"] for agent in report["agents"][:3]]
+    return report
+
+
+def _format_bytes(value: int | None, signed: bool = False) -> str:
+    if value is None:
+        return "-"
+    return f"{value / (1024 * 1024):{'+' if signed else ''}.1f}M"
+
+
+def format_report(report: dict) -> str:
+    if not report["runs"]:
+        return "No pipeline runs with agent metrics yet."
+    latest = report["runs"][0]
+    lines = [
+        f"Run {latest['execution_id']} ({latest['run_date']}, {latest['status']}) "
+        f"vs median of {len(report['runs']) - 1} earlier run(s)",
+        "",
+        f"{'agent':<22}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'share':>8}{'base s':>10}"
+        f"{'change':>9}{'rss delta':>10}{'peak mem':>10}{'rows in':>10}{'rows out':>10}",
+    ]
+    for agent in report["agents"]:
+        base = "-" if agent["baseline_wall_seconds"] is None else f"{agent['baseline_wall_seconds']:.3f}"
+        change = "-" if agent["change"] is None else f"{agent['change']:+.0%}"
+        flag = "  REGRESSED" if agent["regressed"] else ""
+        lines.append(
+            f"{agent['agent']:<22}{agent['invocations']:>6}{agent['wall_seconds']:>10.3f}"
+            f"{agent['cpu_seconds']:>10.3f}{agent['share']:>8.0%}{base:>10}{change:>9}"
+            f"{_format_bytes(agent['rss_delta_bytes'], signed=True):>10}{_format_bytes(agent['peak_memory_bytes']):>10}"
+            f"{agent['rows_read']:>10}"
+            f"{agent['rows_written']:>10}{flag}"
+        )
+    process_rss = max((agent["max_rss_bytes"] or 0 for agent in report["agents"]), default=0) or None
+    lines += [
+        "",
+        f"Slowest: {', '.join(report['slowest'])}",
+        f"Process max RSS (whole run, not per agent): {_format_bytes(process_rss)}",
+    ]
+    if report["regressions"]:
+        lines.append(f"Regressions (> {report['threshold']:.0%} slower): {', '.join(report['regressions'])}")
+    else:
+        lines.append("No regressions.")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-agent metrics of recent AMIDS pipeline runs.")
+    parser.add_argument("--runs", type=int, default=REPORT_RUNS, help="runs to compare (default: %(default)s)")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="wall-time growth that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on any regression")
+    args = parser.parse_args()
+    result = run_report(runs=max(args.runs, 1), threshold=args.threshold)
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
+    if args.fail_on_regression and result["regressions"]:
+        raise SystemExit(1)
@@ -2,14 +2,30 @@ from .metrics import (
     calculate_summary_statistics,
     detect_anomalies_mad,
     detect_anomalies_zscore,
+    mad_mask,
     monitor_kpis,
+    rowwise_mad_mask,
+    rowwise_zscore_mask,
+    zscore_mask,
+)
+from .risk_model import (
+    score_cache_stats,
+    score_prediction,
+    score_prediction_batch,
+    score_prediction_row,
 )
-from .risk_model import score_prediction
 
 __all__ = [
     "score_prediction",
+    "score_prediction_batch",
+    "score_prediction_row",
+    "score_cache_stats",
     "calculate_summary_statistics",
     "detect_anomalies_zscore",
     "detect_anomalies_mad",
+    "zscore_mask",
+    "mad_mask",
+    "rowwise_zscore_mask",
+    "rowwise_mad_mask",
     "monitor_kpis",
 ]
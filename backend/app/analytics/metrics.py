@@ -1,12 +1,41 @@
 from __future__ import annotations
 
-from statistics import fmean, median, pvariance
-from typing import Sequence
+from typing import Sequence, Union
+import warnings
 
+import numpy as np
 
-def calculate_summary_statistics(values: Sequence[float]) -> dict:
+# Lists, tuples, NumPy arrays and pandas Series are all accepted.
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+MAD_SCALE = 0.6745
+
+
+def _as_array(values: ArrayLike) -> np.ndarray:
+    return np.asarray(values, dtype=float).reshape(-1)
+
+
+def _median(arr: np.ndarray) -> float:
+    """Median via np.partition (O(n)) instead of a full sort."""
+    n = arr.size
+    mid = n // 2
+    if n % 2:
+        return float(np.partition(arr, mid)[mid])
+    lower, upper = np.partition(arr, (mid - 1, mid))[mid - 1 : mid + 1]
+    return float((lower + upper) / 2.0)
+
+
+def _moments(arr: np.ndarray) -> tuple[float, float]:
+    """Return (mean, population variance) of a non-empty array."""
+    mean = float(arr.sum() / arr.size)
+    deviations = arr - mean
+    return mean, float(deviations @ deviations / arr.size)
+
+
+def calculate_summary_statistics(values: ArrayLike) -> dict:
     """Return core summary stats used across dashboards and reports."""
-    if not values:
+    arr = _as_array(values)
+    if arr.size == 0:
         return {
             "count": 0,
             "mean": None,
@@ -16,70 +45,127 @@ def calculate_summary_statistics(values: Sequence[float]) -> dict:
             "max": None,
         }
 
-    numeric = [float(v) for v in values]
+    mean, variance = _moments(arr)
     return {
-        "count": len(numeric),
-        "mean": round(fmean(numeric), 4),
-        "median": round(median(numeric), 4),
-        "variance": round(pvariance(numeric), 4) if len(numeric) > 1 else 0.0,
-        "min": round(min(numeric), 4),
-        "max": round(max(numeric), 4),
+        "count": int(arr.size),
+        "mean": round(mean, 4),
+        "median": round(_median(arr), 4),
+        "variance": round(variance, 4) if arr.size > 1 else 0.0,
+        "min": round(float(arr.min()), 4),
+        "max": round(float(arr.max()), 4),
     }
 
 
-def detect_anomalies_zscore(values: Sequence[float], threshold: float = 2.5) -> list[dict]:
+def zscore_mask(values: ArrayLike, threshold: float = 2.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return (z-scores, |z| >= threshold mask) for every value.
+
+    Scores are all zero (and the mask all False) for fewer than three values
+    or zero variance.
+    """
+    arr = _as_array(values)
+    scores = np.zeros(arr.size)
+    if arr.size < 3:
+        return scores, scores.astype(bool)
+    mean, variance = _moments(arr)
+    if variance > 0:
+        scores = (arr - mean) / np.sqrt(variance)
+    return scores, np.abs(scores) >= threshold
+
+
+def mad_mask(values: ArrayLike, threshold: float = 3.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return (modified z-scores, |score| >= threshold mask) using the median absolute deviation.
+
+    Scores are all zero (and the mask all False) for fewer than three values
+    or a zero MAD.
+    """
+    arr = _as_array(values)
+    scores = np.zeros(arr.size)
+    if arr.size < 3:
+        return scores, scores.astype(bool)
+    med = _median(arr)
+    mad = _median(np.abs(arr - med))
+    if mad > 0:
+        scores = MAD_SCALE * (arr - med) / mad
+    return scores, np.abs(scores) >= threshold
+
+
+def rowwise_zscore_mask(matrix: np.ndarray, threshold: float = 2.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Z-scores for every row of a (series, periods) matrix, ignoring NaN cells.
+
+    Rows with fewer than three observations or zero variance score zero;
+    NaN cells score NaN and are never flagged.
+    """
+    arr = np.asarray(matrix, dtype=float)
+    present = ~np.isnan(arr)
+    counts = present.sum(axis=1, keepdims=True)
+    filled = np.where(present, arr, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=1, keepdims=True) / counts
+        deviations = np.where(present, arr - mean, 0.0)
+        std = np.sqrt((deviations * deviations).sum(axis=1, keepdims=True) / counts)
+        usable = (counts >= 3) & (std > 0)
+        scores = np.where(usable, deviations / np.where(usable, std, 1.0), 0.0)
+    scores[~present] = np.nan
+    return scores, present & (np.abs(np.nan_to_num(scores)) >= threshold)
+
+
+def rowwise_mad_mask(matrix: np.ndarray, threshold: float = 3.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Modified z-scores (MAD) for every row of a (series, periods) matrix, ignoring NaN cells.
+
+    Rows with fewer than three observations or a zero MAD score zero;
+    NaN cells score NaN and are never flagged.
+    """
+    arr = np.asarray(matrix, dtype=float)
+    present = ~np.isnan(arr)
+    scores = np.zeros_like(arr)
+    counts = present.sum(axis=1)
+    rows = np.flatnonzero(counts >= 3)
+    if rows.size:
+        sub = arr[rows]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            med = np.nanmedian(sub, axis=1, keepdims=True)
+            mad = np.nanmedian(np.abs(sub - med), axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores[rows] = np.where(mad > 0, MAD_SCALE * (sub - med) / np.where(mad > 0, mad, 1.0), 0.0)
+    scores[~present] = np.nan
+    return scores, present & (np.abs(np.nan_to_num(scores)) >= threshold)
+
+
+def _anomaly_records(
+    values: ArrayLike,
+    scores: np.ndarray,
+    mask: np.ndarray,
+    method: str,
+    threshold: float,
+) -> list[dict]:
+    arr = _as_array(values)
+    return [
+        {
+            "index": int(idx),
+            "value": float(arr[idx]),
+            "method": method,
+            "score": round(float(scores[idx]), 4),
+            "threshold": threshold,
+        }
+        for idx in np.flatnonzero(mask)
+    ]
+
+
+def detect_anomalies_zscore(values: ArrayLike, threshold: float = 2.5) -> list[dict]:
     """Detect outliers using standard z-score for normally distributed metrics."""
-    if len(values) < 3:
-        return []
-
-    stats = calculate_summary_statistics(values)
-    mean = stats["mean"]
-    variance = stats["variance"]
-    if mean is None or variance in (None, 0):
-        return []
-
-    std = variance ** 0.5
-    anomalies: list[dict] = []
-    for idx, value in enumerate(values):
-        z_score = (float(value) - mean) / std if std > 0 else 0.0
-        if abs(z_score) >= threshold:
-            anomalies.append(
-                {
-                    "index": idx,
-                    "value": float(value),
-                    "method": "zscore",
-                    "score": round(z_score, 4),
-                    "threshold": threshold,
-                }
-            )
-    return anomalies
-
-
-def detect_anomalies_mad(values: Sequence[float], threshold: float = 3.5) -> list[dict]:
+    scores, mask = zscore_mask(values, threshold)
+    return _anomaly_records(values, scores, mask, "zscore", threshold)
+
+
+def detect_anomalies_mad(values: ArrayLike, threshold: float = 3.5) -> list[dict]:
     """Detect robust outliers using median absolute deviation (MAD)."""
-    if len(values) < 3:
-        return []
-
-    med = median(values)
-    abs_dev = [abs(float(v) - med) for v in values]
-    mad = median(abs_dev)
-    if mad == 0:
-        return []
-
-    anomalies: list[dict] = []
-    for idx, value in enumerate(values):
-        modified_z = 0.6745 * (float(value) - med) / mad
-        if abs(modified_z) >= threshold:
-            anomalies.append(
-                {
-                    "index": idx,
-                    "value": float(value),
-                    "method": "mad",
-                    "score": round(modified_z, 4),
-                    "threshold": threshold,
-                }
-            )
-    return anomalies
+    scores, mask = mad_mask(values, threshold)
+    return _anomaly_records(values, scores, mask, "mad", threshold)
 
 
 def monitor_kpis(
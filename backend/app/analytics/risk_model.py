@@ -1,6 +1,13 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from typing import Hashable, Mapping, Sequence
 import math
+import os
+import threading
+import time
+
+import numpy as np
 
 from ..schemas import PredictRequest, PredictResponse, RiskFactor
 
@@ -13,6 +20,16 @@ WEIGHTS = {
     "support_intensity": 0.15,
 }
 
+# (signal, minimum normalized value, action) evaluated in order for every account.
+SIGNAL_ACTIONS = (
+    ("platform_stability", 0.55, "Prioritize reliability fixes and set endpoint-level alert thresholds."),
+    ("engagement_drop", 0.50, "Trigger activation campaign with guided onboarding for at-risk accounts."),
+    ("support_intensity", 0.45, "Create a customer success queue for high-severity unresolved feedback."),
+    ("behavioral_load", 0.60, "Investigate heavy usage cohorts for friction points and feature regressions."),
+)
+ESCALATION_ACTION = "Escalate to account management within 24 hours with a retention playbook."
+DEFAULT_ACTION = "Maintain weekly monitoring and continue product usage experiments."
+
 
 def _priority(score: int) -> str:
     if score >= 70:
@@ -33,31 +50,131 @@ def _normalize_signals(req: PredictRequest) -> dict[str, float]:
 
 
 def _recommended_actions(score: int, normalized: dict[str, float]) -> list[str]:
-    actions: list[str] = []
-    if normalized["platform_stability"] >= 0.55:
-        actions.append("Prioritize reliability fixes and set endpoint-level alert thresholds.")
-    if normalized["engagement_drop"] >= 0.50:
-        actions.append("Trigger activation campaign with guided onboarding for at-risk accounts.")
-    if normalized["support_intensity"] >= 0.45:
-        actions.append("Create a customer success queue for high-severity unresolved feedback.")
-    if normalized["behavioral_load"] >= 0.60:
-        actions.append("Investigate heavy usage cohorts for friction points and feature regressions.")
+    actions = [action for name, minimum, action in SIGNAL_ACTIONS if normalized[name] >= minimum]
     if score >= 70:
-        actions.append("Escalate to account management within 24 hours with a retention playbook.")
+        actions.append(ESCALATION_ACTION)
     if not actions:
-        actions.append("Maintain weekly monitoring and continue product usage experiments.")
+        actions.append(DEFAULT_ACTION)
     return actions
 
 
-def score_prediction(req: PredictRequest) -> PredictResponse:
+class ScoreCache:
+    """
+    LRU + TTL cache of the account-independent part of a PredictResponse.
+
+    Keys include FORMULA_VERSION and the current WEIGHTS, so changing either
+    makes old entries unreachable; they age out through LRU eviction or TTL.
+    Cached values are shared between responses, so their nested parts are
+    stored as tuples and each response gets fresh lists, dicts and models.
+    """
+
+    def __init__(self, max_entries: int = 65_536, ttl: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+SCORE_CACHE = ScoreCache(
+    max_entries=int(os.getenv("CITTAAI_SCORE_CACHE_SIZE", "65536")),
+    ttl=float(os.getenv("CITTAAI_SCORE_CACHE_TTL_SECONDS", "3600")),
+)
+
+
+def score_cache_stats() -> dict:
+    return SCORE_CACHE.stats()
+
+
+def _cached_parts(req: PredictRequest) -> dict:
     normalized = _normalize_signals(req)
+    signal_volume = min((req.events_last_7d + req.feedback_count_last_30d) / 40.0, 1.0)
+    key = (FORMULA_VERSION, tuple(WEIGHTS.items()), tuple(normalized.values()), signal_volume)
+    parts = SCORE_CACHE.get(key)
+    if parts is None:
+        parts = _score_parts(normalized, signal_volume)
+        SCORE_CACHE.put(key, parts)
+    return parts
+
+
+def score_prediction(req: PredictRequest) -> PredictResponse:
+    fields = _cached_parts(req)["fields"]
+    # Fields were validated when the parts were built; only account_id varies per call.
+    return PredictResponse.model_construct(
+        account_id=req.account_id,
+        risk_score=fields["risk_score"],
+        priority_band=fields["priority_band"],
+        confidence=fields["confidence"],
+        formula_version=fields["formula_version"],
+        risk_factors=[factor.model_copy() for factor in fields["risk_factors"]],
+        recommended_actions=list(fields["recommended_actions"]),
+    )
+
+
+def score_prediction_row(req: PredictRequest) -> dict:
+    """Equivalent to `score_prediction(req).model_dump()` without building the model."""
+    row = _cached_parts(req)["row"]
+    return {
+        "account_id": req.account_id,
+        **row,
+        "risk_factors": [dict(items) for items in row["risk_factors"]],
+        "recommended_actions": list(row["recommended_actions"]),
+    }
+
+
+def _score_parts(normalized: dict[str, float], signal_volume: float) -> dict:
     weighted_risk = sum(normalized[name] * WEIGHTS[name] for name in WEIGHTS)
 
     # Logistic calibration keeps risk in 0-100 while increasing sensitivity near tipping points.
     risk_score = int(round(100.0 / (1.0 + math.exp(-8.0 * (weighted_risk - 0.50)))))
     risk_score = max(0, min(100, risk_score))
 
-    signal_volume = min((req.events_last_7d + req.feedback_count_last_30d) / 40.0, 1.0)
     confidence = 0.58 + (0.25 * signal_volume) + (0.14 * (1.0 - abs(weighted_risk - 0.50)))
     confidence = round(min(confidence, 0.97), 2)
 
@@ -71,12 +188,116 @@ def score_prediction(req: PredictRequest) -> PredictResponse:
         for name, weight in WEIGHTS.items()
     ]
 
-    return PredictResponse(
-        account_id=req.account_id,
-        risk_score=risk_score,
-        priority_band=_priority(risk_score),
-        confidence=confidence,
-        formula_version=FORMULA_VERSION,
-        risk_factors=risk_factors,
-        recommended_actions=_recommended_actions(risk_score, normalized),
+    fields = {
+        "risk_score": risk_score,
+        "priority_band": _priority(risk_score),
+        "confidence": confidence,
+        "formula_version": FORMULA_VERSION,
+        "risk_factors": tuple(risk_factors),
+        "recommended_actions": tuple(_recommended_actions(risk_score, normalized)),
+    }
+    row = {
+        **fields,
+        "risk_factors": tuple(tuple(factor.model_dump().items()) for factor in risk_factors),
+    }
+    return {"fields": fields, "row": row}
+
+
+def _normalize_signal_arrays(
+    events: np.ndarray,
+    active_minutes: np.ndarray,
+    error_rate: np.ndarray,
+    feedback_count: np.ndarray,
+) -> dict[str, np.ndarray]:
+    # Array form of _normalize_signals; both must stay in sync.
+    return {
+        "behavioral_load": np.minimum(events / 30.0, 1.0),
+        "engagement_drop": np.maximum(0.0, 1.0 - np.minimum(active_minutes / 420.0, 1.0)),
+        "platform_stability": np.minimum(error_rate / 0.20, 1.0),
+        "support_intensity": np.minimum(feedback_count / 12.0, 1.0),
+    }
+
+
+def _action_lists(scores: np.ndarray, normalized: dict[str, np.ndarray]) -> list[list[str]]:
+    """Resolve recommended actions for every account from boolean rule masks."""
+    texts = [action for _, _, action in SIGNAL_ACTIONS] + [ESCALATION_ACTION]
+    masks = np.column_stack(
+        [normalized[name] >= minimum for name, minimum, _ in SIGNAL_ACTIONS] + [scores >= 70]
+    )
+    # Encode each row's mask as a bit pattern so the action list is built once per combination.
+    codes = masks @ (1 << np.arange(len(texts)))
+    combos: dict[int, tuple[str, ...]] = {}
+    for code in np.unique(codes).tolist():
+        chosen = tuple(text for bit, text in enumerate(texts) if code & (1 << bit))
+        combos[code] = chosen or (DEFAULT_ACTION,)
+    return [list(combos[code]) for code in codes.tolist()]
+
+
+def score_prediction_batch(columns: Mapping[str, Sequence]) -> list[dict]:
+    """
+    Score many accounts in one vectorized pass.
+
+    `columns` maps each PredictRequest field to an equally sized sequence of
+    already validated values. Returns rows shaped like PredictResponse.model_dump().
+    """
+    account_ids = list(columns["account_id"])
+    if not account_ids:
+        return []
+
+    events = np.asarray(columns["events_last_7d"], dtype=float)
+    feedback_count = np.asarray(columns["feedback_count_last_30d"], dtype=float)
+    normalized = _normalize_signal_arrays(
+        events,
+        np.asarray(columns["active_minutes_last_7d"], dtype=float),
+        np.asarray(columns["error_rate"], dtype=float),
+        feedback_count,
     )
+
+    weighted_risk = np.zeros(len(account_ids))
+    for name, weight in WEIGHTS.items():
+        weighted_risk = weighted_risk + normalized[name] * weight
+
+    scores = np.rint(100.0 / (1.0 + np.exp(-8.0 * (weighted_risk - 0.50))))
+    scores = np.clip(scores, 0, 100).astype(int)
+
+    signal_volume = np.minimum((events + feedback_count) / 40.0, 1.0)
+    confidence = 0.58 + (0.25 * signal_volume) + (0.14 * (1.0 - np.abs(weighted_risk - 0.50)))
+    confidence = np.minimum(confidence, 0.97)
+
+    bands = np.where(scores >= 70, "high", np.where(scores >= 40, "medium", "low"))
+    actions = _action_lists(scores, normalized)
+
+    factor_columns = [
+        (
+            name,
+            weight,
+            normalized[name].tolist(),
+            (normalized[name] * weight * 100.0).tolist(),
+        )
+        for name, weight in WEIGHTS.items()
+    ]
+
+    rows: list[dict] = []
+    for idx, (account_id, score, band, conf) in enumerate(
+        zip(account_ids, scores.tolist(), bands.tolist(), confidence.tolist())
+    ):
+        rows.append(
+            {
+                "account_id": account_id,
+                "risk_score": score,
+                "priority_band": band,
+                "confidence": round(conf, 2),
+                "formula_version": FORMULA_VERSION,
+                "risk_factors": [
+                    {
+                        "name": name,
+                        "weight": weight,
+                        "normalized_value": round(values[idx], 4),
+                        "contribution": round(contributions[idx], 2),
+                    }
+                    for name, weight, values, contributions in factor_columns
+                ],
+                "recommended_actions": actions[idx],
+            }
+        )
+    return rows
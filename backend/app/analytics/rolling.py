@@ -0,0 +1,210 @@
+"""
+Rolling-window kernels for trend analytics.
+
+Every kernel accepts a 1-D series or a 2-D array of shape
+``(n_series, n_periods)`` and works along the last (time) axis, so many
+series are processed in one call. NaN marks a missing observation; windows
+with fewer than ``min_periods`` observations yield NaN.
+"""
+
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .metrics import ArrayLike
+
+# Largest growth factor allowed inside one EWMA block before rescaling.
+_EWMA_BLOCK_RANGE = 1e150
+# Window cells (series x periods x window) one rolling_median block may materialize.
+_MEDIAN_BLOCK_CELLS = 1 << 20
+
+
+def _as_2d(values: ArrayLike) -> tuple[np.ndarray, bool]:
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 1:
+        return arr[np.newaxis, :], True
+    if arr.ndim != 2:
+        raise ValueError("expected a 1-D series or a 2-D (series, periods) array")
+    return arr, False
+
+
+def _restore(arr: np.ndarray, squeeze: bool) -> np.ndarray:
+    return arr[0] if squeeze else arr
+
+
+def _check_window(window: int, min_periods: int | None) -> int:
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    if min_periods is None:
+        return window
+    if not 1 <= min_periods <= window:
+        raise ValueError("min_periods must be between 1 and window")
+    return min_periods
+
+
+def _window_sums(arr: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums along axis 1 from a zero-padded cumulative sum."""
+    csum = np.zeros((arr.shape[0], arr.shape[1] + 1))
+    np.cumsum(arr, axis=1, out=csum[:, 1:])
+    upper = csum[:, 1:]
+    lower = np.concatenate(
+        [np.zeros((arr.shape[0], min(window, arr.shape[1]))), csum[:, 1 : arr.shape[1] - window + 1]],
+        axis=1,
+    )
+    return upper - lower
+
+
+def rolling_mean(values: ArrayLike, window: int, min_periods: int | None = 1) -> np.ndarray:
+    """Trailing moving average in O(n) per series via cumulative sums."""
+    min_periods = _check_window(window, min_periods)
+    arr, squeeze = _as_2d(values)
+    present = ~np.isnan(arr)
+    sums = _window_sums(np.where(present, arr, 0.0), window)
+    counts = _window_sums(present.astype(float), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(counts >= min_periods, sums / counts, np.nan)
+    return _restore(out, squeeze)
+
+
+def rolling_std(
+    values: ArrayLike,
+    window: int,
+    min_periods: int | None = None,
+    ddof: int = 1,
+) -> np.ndarray:
+    """
+    Trailing moving standard deviation in O(n) per series.
+
+    Each series is centred on its own mean before the cumulative sums of
+    squares are taken, which keeps cancellation error small for series with
+    a large offset. ``min_periods`` defaults to two observations.
+    """
+    min_periods = _check_window(window, min(2, window) if min_periods is None else min_periods)
+    arr, squeeze = _as_2d(values)
+    present = ~np.isnan(arr)
+    counts = _window_sums(present.astype(float), window)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centre = np.nanmean(arr, axis=1, keepdims=True)
+    shifted = np.where(present, arr - np.nan_to_num(centre), 0.0)
+    sums = _window_sums(shifted, window)
+    squares = _window_sums(shifted * shifted, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (squares - sums * sums / counts) / (counts - ddof)
+        out = np.where(
+            (counts >= min_periods) & (counts > ddof),
+            np.sqrt(np.clip(variance, 0.0, None)),
+            np.nan,
+        )
+    return _restore(out, squeeze)
+
+
+def ewma(values: ArrayLike, span: float) -> np.ndarray:
+    """
+    Exponentially weighted moving average (``adjust=True`` weighting, as in pandas).
+
+    Missing observations carry the previous average forward. The recursion is
+    evaluated in closed form over blocks of periods, so the cost is a handful
+    of vectorised passes rather than a Python loop per period.
+    """
+    if span < 1:
+        raise ValueError("span must be >= 1")
+    arr, squeeze = _as_2d(values)
+    decay = 1.0 - 2.0 / (span + 1.0)
+    present = ~np.isnan(arr)
+    filled = np.where(present, arr, 0.0)
+    weights = present.astype(float)
+    n_series, n_periods = arr.shape
+    out = np.empty_like(arr)
+    if n_periods == 0:
+        return _restore(out, squeeze)
+
+    if decay <= 0.0:
+        block = n_periods
+    else:
+        block = max(1, int(np.log(_EWMA_BLOCK_RANGE) / -np.log(decay)))
+    num_carry = np.zeros(n_series)
+    den_carry = np.zeros(n_series)
+    for start in range(0, n_periods, block):
+        stop = min(start + block, n_periods)
+        steps = np.arange(stop - start, dtype=float)
+        if decay <= 0.0:
+            num = filled[:, start:stop]
+            den = weights[:, start:stop]
+        else:
+            # num_t = sum_i decay^(t-i) x_i  ==  decay^t * cumsum(x_i * decay^-i)
+            grow = decay ** -steps
+            shrink = decay ** steps
+            carry_scale = decay ** (steps + 1.0)
+            num = shrink * np.cumsum(filled[:, start:stop] * grow, axis=1) + num_carry[:, None] * carry_scale
+            den = shrink * np.cumsum(weights[:, start:stop] * grow, axis=1) + den_carry[:, None] * carry_scale
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, start:stop] = np.where(den > 0, num / den, np.nan)
+        num_carry = num[:, -1]
+        den_carry = den[:, -1]
+    # Periods with a missing value report the last available average.
+    if not present.all():
+        out = np.where(present | (den_carry[:, None] == 0), out, np.nan)
+        out = _forward_fill(out)
+    return _restore(out, squeeze)
+
+
+def _forward_fill(arr: np.ndarray) -> np.ndarray:
+    idx = np.where(~np.isnan(arr), np.arange(arr.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(arr, idx, axis=1)
+    return filled
+
+
+def rolling_median(values: ArrayLike, window: int, min_periods: int | None = 1) -> np.ndarray:
+    """
+    Trailing moving median over strided window views, processed in blocks.
+
+    Each window is reduced by selection (``np.nanmedian`` partitions rather
+    than sorts), so the cost is O(n * window) per series. Blocks of series
+    and periods are sized so that at most ``_MEDIAN_BLOCK_CELLS`` window
+    cells are materialized at once, instead of the full n x window array.
+    """
+    min_periods = _check_window(window, min_periods)
+    arr, squeeze = _as_2d(values)
+    n_series, n_periods = arr.shape
+    if n_periods == 0:
+        return _restore(arr.copy(), squeeze)
+    padded = np.concatenate([np.full((n_series, window - 1), np.nan), arr], axis=1)
+    counts = _window_sums((~np.isnan(arr)).astype(float), window)
+    medians = np.empty_like(arr)
+    series_step = max(1, _MEDIAN_BLOCK_CELLS // window)
+    for top in range(0, n_series, series_step):
+        rows = slice(top, min(top + series_step, n_series))
+        period_step = max(1, _MEDIAN_BLOCK_CELLS // ((rows.stop - rows.start) * window))
+        for start in range(0, n_periods, period_step):
+            stop = min(start + period_step, n_periods)
+            windows = sliding_window_view(padded[rows, start : stop + window - 1], window, axis=1)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                medians[rows, start:stop] = np.nanmedian(windows, axis=2)
+    out = np.where(counts >= min_periods, medians, np.nan)
+    return _restore(out, squeeze)
+
+
+def lag(values: ArrayLike, periods: int = 1) -> np.ndarray:
+    """Shift each series by ``periods`` (negative values lead); vacated slots are NaN."""
+    arr, squeeze = _as_2d(values)
+    out = np.full_like(arr, np.nan)
+    if periods == 0:
+        out[:] = arr
+    elif abs(periods) < arr.shape[1]:
+        if periods > 0:
+            out[:, periods:] = arr[:, :-periods]
+        else:
+            out[:, :periods] = arr[:, -periods:]
+    return _restore(out, squeeze)
+
+
+def delta(values: ArrayLike, periods: int = 1) -> np.ndarray:
+    """Difference between each value and the value ``periods`` earlier."""
+    arr = np.asarray(values, dtype=float)
+    return arr - lag(arr, periods)
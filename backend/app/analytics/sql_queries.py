@@ -1,49 +1,17 @@
-REVENUE_TREND_QUERY = """
-with daily as (
-    select
-        c.run_date,
-        sum(c.revenue) as revenue,
-        sum(c.spend) as spend,
-        sum(c.clicks) as clicks,
-        sum(c.impressions) as impressions
-    from campaign_performance_daily c
-    where c.run_date >= date('now', ?)
-    group by c.run_date
-),
-trend as (
-    select
-        run_date,
-        revenue,
-        spend,
-        case
-            when impressions > 0 then clicks * 1.0 / impressions
-        end as ctr,
-        avg(revenue) over (
-            order by run_date
-            rows between 6 preceding and current row
-        ) as revenue_ma7
-    from daily
-)
-select run_date, revenue, spend, ctr, revenue_ma7
-from trend
-order by run_date
-"""
-
-
 ENGAGEMENT_PERFORMANCE_QUERY = """
 with perf as (
     select
-        c.run_date,
-        c.channel,
-        c.region,
-        sum(c.impressions) as impressions,
-        sum(c.clicks) as clicks,
-        sum(c.leads) as leads,
-        sum(c.revenue) as revenue,
-        sum(c.spend) as spend
-    from campaign_performance_daily c
-    where c.run_date >= date('now', ?)
-    group by c.run_date, c.channel, c.region
+        s.run_date,
+        s.channel,
+        s.region,
+        s.impressions,
+        s.clicks,
+        s.leads,
+        s.signups,
+        s.revenue,
+        s.spend
+    from campaign_daily_segment s
+    where s.run_date >= date('now', ?)
 ),
 joined as (
     select
@@ -53,6 +21,7 @@ joined as (
         p.impressions,
         p.clicks,
         p.leads,
+        p.signups,
         p.revenue,
         p.spend,
         k.cac,
@@ -75,6 +44,7 @@ select
     impressions,
     clicks,
     leads,
+    signups,
     revenue,
     spend,
     cac,
@@ -85,63 +55,43 @@ from joined
 order by run_date desc, roi_rank asc
 """
 
-
-RISK_DISTRIBUTION_QUERY = """
-with signals as (
-    select
-        run_date,
-        channel,
-        region,
-        sum(leads) as leads,
-        sum(signups) as signups,
-        sum(spend) as spend,
-        sum(revenue) as revenue,
-        case when sum(leads) > 0 then sum(spend) * 1.0 / sum(leads) end as cac,
-        case when sum(signups) > 0 then sum(revenue) * 1.0 / sum(signups) end as ltv
-    from campaign_performance_daily
-    where run_date >= date('now', ?)
-    group by run_date, channel, region
-),
-scored as (
-    select
-        run_date,
-        channel,
-        region,
-        coalesce(cac, 0.0) as cac,
-        coalesce(ltv, 0.0) as ltv,
-        min(100.0, (coalesce(cac, 0.0) / (coalesce(ltv, 1.0) + 1.0)) * 120.0) as risk_score
-    from signals
-)
+# Raw daily inputs for the anomaly scan, one row per (run_date, series).
+# Ratios (CAC, CTR, ROI) are derived in NumPy so every metric comes from one fetch.
+SEGMENT_METRIC_INPUTS_QUERY = """
 select
-    case
-        when risk_score < 35 then 'low'
-        when risk_score < 70 then 'medium'
-        else 'high'
-    end as risk_band,
-    count(*) as segments,
-    round(avg(risk_score), 2) as avg_risk_score
-from scored
-group by risk_band
-order by avg_risk_score
+    run_date,
+    channel,
+    region,
+    impressions,
+    clicks,
+    leads,
+    spend,
+    revenue
+from campaign_daily_segment
+where run_date >= date('now', ?)
 """
 
-
-SUMMARY_STATS_QUERY = """
+CAMPAIGN_METRIC_INPUTS_QUERY = """
 select
-    count(*) as row_count,
-    round(avg(revenue), 2) as avg_revenue,
-    round(avg(spend), 2) as avg_spend,
-    round(avg(clicks), 2) as avg_clicks,
-    round(avg(leads), 2) as avg_leads
-from (
-    select
-        run_date,
-        sum(revenue) as revenue,
-        sum(spend) as spend,
-        sum(clicks) as clicks,
-        sum(leads) as leads
-    from campaign_performance_daily
-    where run_date >= date('now', ?)
-    group by run_date
-) daily
+    run_date,
+    campaign_id,
+    channel,
+    region,
+    sum(impressions),
+    sum(clicks),
+    sum(leads),
+    sum(spend),
+    sum(revenue)
+from campaign_performance_daily
+where run_date >= date('now', ?)
+group by run_date, campaign_id, channel, region
+"""
+
+# Per-day segment sketches inside the window; `{filters}` adds optional
+# `and ...` clauses (metric list, channel, region) with bound parameters.
+SEGMENT_SKETCHES_QUERY = """
+select metric, channel, region, sketch
+from segment_metric_sketch
+where run_date >= date('now', ?)
+{filters}
 """
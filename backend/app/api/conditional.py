@@ -0,0 +1,93 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read-only routes.
+
+ETags are derived from data versions only, so deciding whether a client is
+up to date never requires running the underlying queries. Results served from
+the versioned dashboard cache may lag the current version while they refresh;
+`versioned_json` labels such a response with the version it was computed
+from, so a client holding it revalidates again instead of getting a 304.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Hashable
+import hashlib
+
+from fastapi import Request, Response
+
+from .responses import FastJSONResponse
+
+API_VERSION = "2.0.0"
+
+
+def etag_for(*parts: Any) -> str:
+    """Build a strong ETag from the route identity and the data versions it depends on."""
+    digest = hashlib.sha1(repr((API_VERSION, *parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix.
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_json(
+    request: Request,
+    etag: str,
+    produce: Callable[[], Any],
+    last_modified: datetime | None = None,
+) -> Response:
+    """Answer 304 when the client's copy is current, otherwise call `produce`."""
+    headers = _validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content=produce(), headers=headers)
+
+
+def versioned_json(
+    request: Request,
+    current: Hashable,
+    validators: Callable[[Hashable], tuple[str, datetime | None]],
+    produce: Callable[[], tuple[Hashable, Any]],
+) -> Response:
+    """
+    `conditional_json` for results that carry their own data version.
+
+    `validators(version)` returns the (ETag, Last-Modified) pair for a data
+    version. The client is checked against the `current` version; a body is
+    sent with the validators of the version `produce` reports it came from.
+    """
+    etag, last_modified = validators(current)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=_validator_headers(etag, last_modified))
+    version, content = produce()
+    if version != current:
+        etag, last_modified = validators(version)
+    return FastJSONResponse(content=content, headers=_validator_headers(etag, last_modified))
+
+
+def _validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
@@ -0,0 +1,24 @@
+"""
+orjson-backed JSON response used as the application's default response class.
+
+Encoding goes straight to bytes in one C call, and NumPy scalars and arrays
+produced by the analytics kernels serialize without a `.tolist()` pass.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
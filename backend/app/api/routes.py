@@ -1,21 +1,53 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from ..analytics import score_prediction
-from ..schemas import FeedbackRequest, PredictRequest
+from ..analytics import score_cache_stats, score_prediction_batch, score_prediction_row
+from ..analytics.risk_model import FORMULA_VERSION
+from ..schemas import (
+    FeedbackRecord,
+    FeedbackRequest,
+    PredictBatchRequest,
+    PredictBatchResponse,
+    PredictRequest,
+    PredictResponse,
+)
 from ..services import (
+    ANOMALY_METRICS,
+    BUNDLE_SECTIONS,
+    QUANTILE_METRICS,
+    TREND_EWMA_SPAN,
+    TREND_WINDOW_MAX,
+    TREND_WINDOWS,
     append_feedback,
-    append_prediction,
+    append_predictions,
     compute_metrics,
-    get_kpi_dashboard,
-    get_performance_metrics,
-    get_trend_analysis,
+    dashboard_cache_stats,
+    get_dashboard_bundle_versioned,
+    get_kpi_dashboard_versioned,
+    get_kpi_status_versioned,
+    get_metric_quantiles_versioned,
+    get_performance_metrics_versioned,
+    get_pipeline_report,
+    get_segment_anomalies_versioned,
+    get_trend_analysis_versioned,
+    history_page,
+    iter_history,
+    kpi_rules_version,
     load_feedback,
     load_roadmap,
+    log_version,
+    persistence_stats,
+    queue_prediction,
+    warehouse_last_modified,
+    warehouse_version,
 )
+from .conditional import conditional_json, etag_for, versioned_json
+from .responses import FastJSONResponse, dumps
 
 router = APIRouter()
 
@@ -35,38 +67,273 @@ def roadmap() -> dict:
     return load_roadmap()
 
 
-@router.post("/api/predict")
-def predict(payload: PredictRequest) -> dict:
-    scored = score_prediction(payload)
-    append_prediction(scored.model_dump())
-    return scored.model_dump()
+# Routes below return FastJSONResponse directly: their payloads are already
+# validated models or rows built from them, so FastAPI's response
+# re-validation and jsonable_encoder pass is skipped. `response_model`
+# only documents the shape.
+@router.post("/api/predict", response_model=PredictResponse)
+def predict(payload: PredictRequest) -> Response:
+    row = score_prediction_row(payload)
+    queue_prediction(row)
+    return FastJSONResponse(row)
+
+
+@router.post("/api/predict/batch", response_model=PredictBatchResponse)
+def predict_batch(payload: PredictBatchRequest) -> Response:
+    scored = score_prediction_batch(payload.to_columns())
+    append_predictions(scored)
+    return FastJSONResponse(
+        {
+            "count": len(scored),
+            "formula_version": FORMULA_VERSION,
+            "predictions": scored,
+        }
+    )
+
+
+@router.get("/api/feedback", response_model=list[FeedbackRecord])
+def feedback(limit: int | None = Query(default=None, ge=1)) -> Response:
+    return FastJSONResponse(load_feedback(limit))
+
+
+@router.post("/api/feedback", response_model=FeedbackRecord)
+def submit_feedback(payload: FeedbackRequest) -> Response:
+    return FastJSONResponse(append_feedback(payload.model_dump()))
 
 
-@router.get("/api/feedback")
-def feedback() -> list[dict]:
-    return load_feedback()
+def _history_response(
+    kind: str,
+    output: str,
+    limit: int | None,
+    cursor: str | None,
+    since: datetime | None,
+    until: datetime | None,
+    **filters: str | None,
+) -> Response:
+    try:
+        if output == "ndjson":
+            rows = iter_history(kind, limit=limit, cursor=cursor, since=since, until=until, **filters)
+            first = next(rows, None)  # surfaces a malformed cursor before streaming starts
+        else:
+            page = history_page(
+                kind,
+                limit=limit or 50,
+                cursor=cursor,
+                since=since,
+                until=until,
+                **filters,
+            )
+            return FastJSONResponse(page)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
 
+    def lines():
+        if first is None:
+            return
+        yield dumps(first) + b"\n"
+        for row in rows:
+            yield dumps(row) + b"\n"
 
-@router.post("/api/feedback")
-def submit_feedback(payload: FeedbackRequest) -> dict:
-    return append_feedback(payload.model_dump())
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/api/history/feedback")
+def feedback_history(
+    limit: int | None = Query(default=None, ge=1, le=100_000),
+    cursor: str | None = None,
+    sentiment: Literal["positive", "neutral", "negative"] | None = None,
+    severity: Literal["low", "medium", "high"] | None = None,
+    feature: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format"),
+) -> Response:
+    return _history_response(
+        "feedback",
+        output,
+        limit,
+        cursor,
+        since,
+        until,
+        sentiment=sentiment,
+        severity=severity,
+        feature=feature,
+    )
+
+
+@router.get("/api/history/predictions")
+def prediction_history(
+    limit: int | None = Query(default=None, ge=1, le=100_000),
+    cursor: str | None = None,
+    account_id: str | None = None,
+    priority_band: Literal["low", "medium", "high"] | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format"),
+) -> Response:
+    return _history_response(
+        "predictions",
+        output,
+        limit,
+        cursor,
+        since,
+        until,
+        account_id=account_id,
+        priority_band=priority_band,
+    )
 
 
 @router.get("/api/metrics")
-def metrics() -> dict:
-    return compute_metrics()
+def metrics(request: Request) -> Response:
+    return conditional_json(request, etag_for("metrics", log_version()), compute_metrics)
+
+
+@router.get("/api/metrics/runtime")
+def runtime_metrics() -> dict:
+    return {
+        **persistence_stats(),
+        "dashboard_cache": dashboard_cache_stats(),
+        "score_cache": score_cache_stats(),
+    }
+
+
+@router.get("/api/pipeline/report")
+def pipeline_report(
+    runs: int = Query(default=5, ge=1, le=100),
+    threshold: float = Query(default=0.25, gt=0, le=10),
+) -> dict:
+    # Not cached: failed runs are reported too but do not move warehouse_version().
+    return get_pipeline_report(runs=runs, threshold=threshold)
+
+
+def _warehouse_response(request: Request, route: tuple, produce) -> Response:
+    # Cached dashboard results may lag warehouse_version() while they refresh, so the
+    # response is validated by the version `produce` reports, not the current one.
+    return versioned_json(
+        request,
+        warehouse_version(),
+        lambda version: (etag_for(*route, version), warehouse_last_modified(version)),
+        produce,
+    )
 
 
 @router.get("/api/dashboard/kpis")
-def dashboard_kpis(days: int = Query(default=30, ge=7, le=365)) -> dict:
-    return get_kpi_dashboard(days=days)
+def dashboard_kpis(request: Request, days: int = Query(default=30, ge=7, le=365)) -> Response:
+    return _warehouse_response(request, ("kpis", days), lambda: get_kpi_dashboard_versioned(days=days))
 
 
 @router.get("/api/dashboard/trends")
-def dashboard_trends(days: int = Query(default=30, ge=7, le=365)) -> dict:
-    return get_trend_analysis(days=days)
+def dashboard_trends(
+    request: Request,
+    days: int = Query(default=30, ge=7, le=365),
+    windows: list[int] = Query(default=list(TREND_WINDOWS)),
+    ewma_span: int = Query(default=TREND_EWMA_SPAN, ge=2, le=TREND_WINDOW_MAX),
+) -> Response:
+    if not windows or any(not 2 <= window <= TREND_WINDOW_MAX for window in windows):
+        raise HTTPException(
+            status_code=422,
+            detail=f"windows must be between 2 and {TREND_WINDOW_MAX} days",
+        )
+    selected = tuple(sorted(set(windows)))
+    return _warehouse_response(
+        request,
+        ("trends", days, selected, ewma_span),
+        lambda: get_trend_analysis_versioned(days=days, windows=selected, ewma_span=ewma_span),
+    )
 
 
 @router.get("/api/dashboard/performance")
-def dashboard_performance(days: int = Query(default=30, ge=7, le=365)) -> dict:
-    return get_performance_metrics(days=days)
+def dashboard_performance(request: Request, days: int = Query(default=30, ge=7, le=365)) -> Response:
+    return _warehouse_response(request, ("performance", days), lambda: get_performance_metrics_versioned(days=days))
+
+
+@router.get("/api/dashboard/anomalies")
+def dashboard_anomalies(
+    request: Request,
+    days: int = Query(default=30, ge=7, le=365),
+    metrics: list[Literal["revenue", "cac", "ctr", "roi"]] = Query(default=["revenue", "cac", "ctr", "roi"]),
+    granularity: Literal["segment", "campaign"] = "segment",
+    z_threshold: float = Query(default=2.5, gt=0, le=10),
+    mad_threshold: float = Query(default=3.5, gt=0, le=20),
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> Response:
+    selected = tuple(name for name in ANOMALY_METRICS if name in metrics)
+    return _warehouse_response(
+        request,
+        ("anomalies", days, selected, granularity, z_threshold, mad_threshold, limit),
+        lambda: get_segment_anomalies_versioned(
+            days=days,
+            metrics=selected,
+            granularity=granularity,
+            z_threshold=z_threshold,
+            mad_threshold=mad_threshold,
+            limit=limit,
+        ),
+    )
+
+
+@router.get("/api/dashboard/kpi-status")
+def dashboard_kpi_status(
+    request: Request,
+    days: int = Query(default=30, ge=7, le=365),
+    granularity: Literal["segment", "campaign"] = "segment",
+    limit: int = Query(default=200, ge=1, le=5000),
+) -> Response:
+    return _warehouse_response(
+        request,
+        ("kpi-status", days, granularity, limit, kpi_rules_version()),
+        lambda: get_kpi_status_versioned(days=days, granularity=granularity, limit=limit),
+    )
+
+
+@router.get("/api/dashboard/quantiles")
+def dashboard_quantiles(
+    request: Request,
+    days: int = Query(default=365, ge=1, le=365),
+    metrics: list[Literal["revenue", "spend", "cac", "ctr", "roi"]] = Query(default=["revenue"]),
+    channel: str | None = None,
+    region: str | None = None,
+    by_segment: bool = False,
+) -> Response:
+    selected = tuple(name for name in QUANTILE_METRICS if name in metrics)
+    return _warehouse_response(
+        request,
+        ("quantiles", days, selected, channel, region, by_segment),
+        lambda: get_metric_quantiles_versioned(
+            days=days,
+            metrics=selected,
+            channel=channel,
+            region=region,
+            by_segment=by_segment,
+        ),
+    )
+
+
+@router.get("/api/dashboard/bundle")
+def dashboard_bundle(
+    request: Request,
+    days: int = Query(default=30, ge=7, le=365),
+    sections: str = Query(default=",".join(BUNDLE_SECTIONS)),
+) -> Response:
+    requested = tuple(name.strip() for name in sections.split(",") if name.strip())
+    unknown = sorted(set(requested) - set(BUNDLE_SECTIONS))
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"sections must be a comma-separated subset of {', '.join(BUNDLE_SECTIONS)}",
+        )
+    if "metrics" not in requested:
+        return _warehouse_response(
+            request,
+            ("bundle", days, requested),
+            lambda: get_dashboard_bundle_versioned(days=days, sections=requested),
+        )
+    # Log metrics change independently of the warehouse, so these bundles are
+    # validated by ETag only.
+    logs = log_version()
+    return versioned_json(
+        request,
+        warehouse_version(),
+        lambda version: (etag_for("bundle", days, requested, version, logs), None),
+        lambda: get_dashboard_bundle_versioned(days=days, sections=requested),
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -8,11 +9,28 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from .api import router
+from .api.responses import FastJSONResponse
+from .services import PREDICTION_BUFFER, ensure_warehouse_schema
 
 ROOT = Path(__file__).resolve().parents[2]
 WEB_DIR = ROOT / "web"
 
-app = FastAPI(title="CittaAI Phase1 Beta API", version="2.0.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    ensure_warehouse_schema()
+    PREDICTION_BUFFER.start()
+    yield
+    # Persist any predictions still waiting in the write-behind queue.
+    PREDICTION_BUFFER.stop()
+
+
+app = FastAPI(
+    title="CittaAI Phase1 Beta API",
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
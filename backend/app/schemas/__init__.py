@@ -1,6 +1,9 @@
 from .models import (
     FeedbackRecord,
     FeedbackRequest,
+    PredictBatchColumns,
+    PredictBatchRequest,
+    PredictBatchResponse,
     PredictRequest,
     PredictResponse,
     RiskFactor,
@@ -8,7 +11,10 @@ from .models import (
 
 __all__ = [
     "PredictRequest",
+    "PredictBatchRequest",
+    "PredictBatchColumns",
     "PredictResponse",
+    "PredictBatchResponse",
     "RiskFactor",
     "FeedbackRequest",
     "FeedbackRecord",
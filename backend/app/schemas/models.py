@@ -1,22 +1,21 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import AfterValidator, BaseModel, Field, field_validator, model_validator
+
+# Shared by row and columnar requests: the length is checked before surrounding
+# whitespace is stripped.
+AccountId = Annotated[str, Field(min_length=2, max_length=64), AfterValidator(str.strip)]
 
 
 class PredictRequest(BaseModel):
-    account_id: str = Field(min_length=2, max_length=64)
+    account_id: AccountId
     events_last_7d: int = Field(ge=0, le=50_000)
     active_minutes_last_7d: int = Field(ge=0, le=10_080)
     error_rate: float = Field(ge=0, le=1)
     feedback_count_last_30d: int = Field(ge=0, le=500)
 
-    @field_validator("account_id")
-    @classmethod
-    def clean_account_id(cls, value: str) -> str:
-        return value.strip()
-
     @model_validator(mode="after")
     def require_any_signal(self) -> "PredictRequest":
         if (
@@ -28,6 +27,68 @@ class PredictRequest(BaseModel):
         return self
 
 
+PREDICT_BATCH_MAX_ROWS = 50_000
+
+
+class PredictBatchColumns(BaseModel):
+    """Columnar form of many PredictRequest rows; every list must share one length."""
+
+    account_id: list[AccountId]
+    events_last_7d: list[int]
+    active_minutes_last_7d: list[int]
+    error_rate: list[float]
+    feedback_count_last_30d: list[int]
+
+    @model_validator(mode="after")
+    def check_columns(self) -> "PredictBatchColumns":
+        size = len(self.account_id)
+        if size > PREDICT_BATCH_MAX_ROWS:
+            raise ValueError(f"A batch may contain at most {PREDICT_BATCH_MAX_ROWS} rows.")
+
+        bounds = {
+            "events_last_7d": 50_000,
+            "active_minutes_last_7d": 10_080,
+            "error_rate": 1,
+            "feedback_count_last_30d": 500,
+        }
+        for name, upper in bounds.items():
+            values = getattr(self, name)
+            if len(values) != size:
+                raise ValueError(f"Column '{name}' has {len(values)} values, expected {size}.")
+            if values and (min(values) < 0 or max(values) > upper):
+                raise ValueError(f"Column '{name}' values must be between 0 and {upper}.")
+
+        for events, minutes, feedback in zip(
+            self.events_last_7d,
+            self.active_minutes_last_7d,
+            self.feedback_count_last_30d,
+        ):
+            if events == 0 and minutes == 0 and feedback == 0:
+                raise ValueError("At least one behavioral signal must be greater than zero.")
+        return self
+
+
+class PredictBatchRequest(BaseModel):
+    """Batch scoring payload given either as row objects or as columns."""
+
+    rows: list[PredictRequest] | None = Field(default=None, max_length=PREDICT_BATCH_MAX_ROWS)
+    columns: PredictBatchColumns | None = None
+
+    @model_validator(mode="after")
+    def require_one_layout(self) -> "PredictBatchRequest":
+        if (self.rows is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'rows' or 'columns'.")
+        return self
+
+    def to_columns(self) -> dict[str, list]:
+        if self.columns is not None:
+            return self.columns.model_dump()
+        return {
+            name: [getattr(row, name) for row in self.rows]
+            for name in PredictRequest.model_fields
+        }
+
+
 class RiskFactor(BaseModel):
     name: str
     weight: float
@@ -45,6 +106,12 @@ class PredictResponse(BaseModel):
     recommended_actions: list[str]
 
 
+class PredictBatchResponse(BaseModel):
+    count: int
+    formula_version: str
+    predictions: list[PredictResponse]
+
+
 class FeedbackRequest(BaseModel):
     user_id: str = Field(min_length=2, max_length=64)
     feature: str = Field(min_length=2, max_length=128)
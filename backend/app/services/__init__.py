@@ -1,16 +1,48 @@
 from ..analytics import score_prediction
 from .dashboard_service import (
+    ANOMALY_GRANULARITIES,
+    ANOMALY_METRICS,
+    BUNDLE_SECTIONS,
+    QUANTILE_METRICS,
+    TREND_EWMA_SPAN,
+    TREND_WINDOW_MAX,
+    TREND_WINDOWS,
+    dashboard_cache_stats,
+    ensure_warehouse_schema,
+    get_dashboard_bundle,
+    get_dashboard_bundle_versioned,
     get_kpi_dashboard,
+    get_kpi_dashboard_versioned,
+    get_kpi_status,
+    get_kpi_status_versioned,
+    get_metric_quantiles,
+    get_metric_quantiles_versioned,
     get_performance_metrics,
+    get_performance_metrics_versioned,
+    get_pipeline_report,
+    get_segment_anomalies,
+    get_segment_anomalies_versioned,
     get_trend_analysis,
+    get_trend_analysis_versioned,
+    kpi_rules_version,
+    warehouse_last_modified,
+    warehouse_version,
 )
 from .storage_service import (
+    PREDICTION_BUFFER,
     append_feedback,
     append_prediction,
+    append_predictions,
     compute_metrics,
+    flush_pending_writes,
+    history_page,
+    iter_history,
     load_feedback,
     load_predictions,
     load_roadmap,
+    log_version,
+    persistence_stats,
+    queue_prediction,
 )
 
 __all__ = [
@@ -20,8 +52,40 @@ __all__ = [
     "load_predictions",
     "append_feedback",
     "append_prediction",
+    "append_predictions",
     "compute_metrics",
+    "queue_prediction",
+    "flush_pending_writes",
+    "persistence_stats",
+    "PREDICTION_BUFFER",
     "get_kpi_dashboard",
+    "get_kpi_dashboard_versioned",
     "get_trend_analysis",
+    "get_trend_analysis_versioned",
     "get_performance_metrics",
+    "get_performance_metrics_versioned",
+    "get_dashboard_bundle",
+    "get_dashboard_bundle_versioned",
+    "get_segment_anomalies",
+    "get_segment_anomalies_versioned",
+    "get_metric_quantiles",
+    "get_metric_quantiles_versioned",
+    "get_kpi_status",
+    "get_kpi_status_versioned",
+    "get_pipeline_report",
+    "kpi_rules_version",
+    "dashboard_cache_stats",
+    "ensure_warehouse_schema",
+    "BUNDLE_SECTIONS",
+    "ANOMALY_METRICS",
+    "ANOMALY_GRANULARITIES",
+    "QUANTILE_METRICS",
+    "TREND_WINDOWS",
+    "TREND_EWMA_SPAN",
+    "TREND_WINDOW_MAX",
+    "warehouse_version",
+    "warehouse_last_modified",
+    "log_version",
+    "history_page",
+    "iter_history",
 ]
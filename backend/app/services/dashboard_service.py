@@ -1,38 +1,336 @@
 from __future__ import annotations
 
-from pathlib import Path
+from datetime import datetime, timezone
+from statistics import fmean
 import sqlite3
 
+import numpy as np
+
+from amids.config import settings
+from amids.connections import get_manager
+from amids.rules import STATUS_LABELS, load_rule_set
+from amids.schema import migrate
+from amids.segment_metrics import metric_matrices
+from amids.sketches import QuantileSketch
+from amids.telemetry import REGRESSION_THRESHOLD, REPORT_RUNS, empty_report, run_report
+
 from ..analytics.metrics import (
     calculate_summary_statistics,
     detect_anomalies_mad,
     detect_anomalies_zscore,
-    monitor_kpis,
+    rowwise_mad_mask,
+    rowwise_zscore_mask,
 )
+from ..analytics.rolling import ewma, rolling_mean
 from ..analytics.sql_queries import (
+    CAMPAIGN_METRIC_INPUTS_QUERY,
     ENGAGEMENT_PERFORMANCE_QUERY,
-    REVENUE_TREND_QUERY,
-    RISK_DISTRIBUTION_QUERY,
-    SUMMARY_STATS_QUERY,
+    SEGMENT_METRIC_INPUTS_QUERY,
+    SEGMENT_SKETCHES_QUERY,
 )
+from .result_cache import VersionedResultCache
+from .storage_service import compute_metrics
 
-ROOT = Path(__file__).resolve().parents[3]
-AMIDS_DB_PATH = ROOT / "amids" / "amids.db"
+AMIDS_DB_PATH = settings.db_path
+WAREHOUSE_SECTIONS = ("kpis", "trends", "performance")
+BUNDLE_SECTIONS = WAREHOUSE_SECTIONS + ("metrics",)
+TREND_WINDOWS = (7, 14, 28)
+TREND_EWMA_SPAN = 7
+TREND_WINDOW_MAX = 90
+ANOMALY_METRICS = ("revenue", "cac", "ctr", "roi")
+ANOMALY_GRANULARITIES = ("segment", "campaign")
+QUANTILE_METRICS = ("revenue", "spend", "cac", "ctr", "roi")
 
 
 def _query(sql: str, params: tuple = ()) -> list[dict]:
     if not AMIDS_DB_PATH.exists():
         return []
 
-    with sqlite3.connect(AMIDS_DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(sql, params).fetchall()
+    with get_manager(AMIDS_DB_PATH).read() as conn:
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        rows = cur.execute(sql, params).fetchall()
         return [dict(row) for row in rows]
 
 
+def data_version() -> tuple:
+    """
+    Identify the warehouse state the dashboards are computed from.
+
+    The warehouse only changes when the AMIDS pipeline runs, so the latest
+    completed run row in execution_log (not a per-node row) is the version.
+    Databases without pipeline history fall back to the file's modification
+    time.
+    """
+    path = AMIDS_DB_PATH
+    if not path.exists():
+        return ("missing",)
+    try:
+        rows = _query(
+            """
+            select id, finished_at
+            from execution_log
+            where status = 'completed' and parent_id is null
+            order by id desc
+            limit 1
+            """
+        )
+    except sqlite3.OperationalError:
+        rows = []
+    if rows:
+        return ("run", rows[0]["id"], rows[0]["finished_at"])
+    return ("mtime", path.stat().st_mtime_ns)
+
+
+RESULT_CACHE = VersionedResultCache(data_version, max_entries=256)
+
+
+def ensure_warehouse_schema() -> None:
+    """Apply pending warehouse migrations; only a read-only version check once up to date."""
+    migrate(manager=get_manager(AMIDS_DB_PATH))
+
+
+def dashboard_cache_stats() -> dict:
+    return RESULT_CACHE.stats()
+
+
+def warehouse_version() -> tuple:
+    """Current (throttled) warehouse data version; cheap enough to call per request."""
+    return RESULT_CACHE.current_version()
+
+
+def warehouse_last_modified(version: tuple | None = None) -> datetime | None:
+    """Completion time of the pipeline run behind `version` (default: warehouse_version()), if known."""
+    version = version or warehouse_version()
+    if version[0] != "run" or not version[2]:
+        return None
+    finished = datetime.fromisoformat(version[2])
+    return finished if finished.tzinfo else finished.replace(tzinfo=timezone.utc)
+
+
+# The `*_versioned` getters return (data version, result); the version is the one
+# the result was computed from, which lags warehouse_version() during a refresh.
+# The plain getters return just the result.
+
+
+def get_kpi_dashboard_versioned(days: int = 30) -> tuple[tuple, dict]:
+    version, sections = _warehouse_sections(days, ("kpis",))
+    return version, sections["kpis"]
+
+
 def get_kpi_dashboard(days: int = 30) -> dict:
-    period = f"-{days} day"
-    rows = _query(ENGAGEMENT_PERFORMANCE_QUERY, (period,))
+    return get_kpi_dashboard_versioned(days)[1]
+
+
+def get_trend_analysis_versioned(
+    days: int = 30,
+    windows: tuple[int, ...] = TREND_WINDOWS,
+    ewma_span: int = TREND_EWMA_SPAN,
+) -> tuple[tuple, dict]:
+    """Daily revenue trend with trailing moving averages for each window plus an EWMA."""
+    trend_options = (tuple(sorted(set(windows))), ewma_span)
+    version, sections = _warehouse_sections(days, ("trends",), trend_options)
+    return version, sections["trends"]
+
+
+def get_trend_analysis(
+    days: int = 30,
+    windows: tuple[int, ...] = TREND_WINDOWS,
+    ewma_span: int = TREND_EWMA_SPAN,
+) -> dict:
+    return get_trend_analysis_versioned(days, windows, ewma_span)[1]
+
+
+def get_performance_metrics_versioned(days: int = 30) -> tuple[tuple, dict]:
+    version, sections = _warehouse_sections(days, ("performance",))
+    return version, sections["performance"]
+
+
+def get_performance_metrics(days: int = 30) -> dict:
+    return get_performance_metrics_versioned(days)[1]
+
+
+def get_segment_anomalies_versioned(
+    days: int = 30,
+    metrics: tuple[str, ...] = ANOMALY_METRICS,
+    granularity: str = "segment",
+    z_threshold: float = 2.5,
+    mad_threshold: float = 3.5,
+    limit: int = 100,
+) -> tuple[tuple, dict]:
+    """
+    Rank z-score and MAD outliers across every segment (or campaign) series.
+
+    One query returns the (series x day) inputs; each metric is scored for
+    all series at once along the time axis.
+    """
+    metrics = tuple(name for name in ANOMALY_METRICS if name in metrics)
+    key = ("anomalies", days, metrics, granularity, z_threshold, mad_threshold, limit)
+    return RESULT_CACHE.get(
+        key,
+        lambda: _segment_anomalies(days, metrics, granularity, z_threshold, mad_threshold, limit),
+    )
+
+
+def get_segment_anomalies(
+    days: int = 30,
+    metrics: tuple[str, ...] = ANOMALY_METRICS,
+    granularity: str = "segment",
+    z_threshold: float = 2.5,
+    mad_threshold: float = 3.5,
+    limit: int = 100,
+) -> dict:
+    return get_segment_anomalies_versioned(days, metrics, granularity, z_threshold, mad_threshold, limit)[1]
+
+
+def get_metric_quantiles_versioned(
+    days: int = 365,
+    metrics: tuple[str, ...] = ("revenue",),
+    channel: str | None = None,
+    region: str | None = None,
+    by_segment: bool = False,
+) -> tuple[tuple, dict]:
+    """
+    Median, p90, p99 and approximate MAD of campaign-level metrics over a window.
+
+    Answered by merging the per-day segment sketches written by the pipeline,
+    so the cost depends on the number of days and segments, not on the
+    number of campaign rows. Each result carries its normalized rank error.
+    """
+    metrics = tuple(name for name in QUANTILE_METRICS if name in metrics)
+    key = ("quantiles", days, metrics, channel, region, by_segment)
+    return RESULT_CACHE.get(key, lambda: _metric_quantiles(days, metrics, channel, region, by_segment))
+
+
+def get_metric_quantiles(
+    days: int = 365,
+    metrics: tuple[str, ...] = ("revenue",),
+    channel: str | None = None,
+    region: str | None = None,
+    by_segment: bool = False,
+) -> dict:
+    return get_metric_quantiles_versioned(days, metrics, channel, region, by_segment)[1]
+
+
+def kpi_rules_version() -> str:
+    """Fingerprint of the KPI rules file; part of the kpi-status ETag."""
+    return load_rule_set().fingerprint
+
+
+def get_kpi_status_versioned(days: int = 30, granularity: str = "segment", limit: int = 200) -> tuple[tuple, dict]:
+    """
+    Evaluate the configured KPI rules over every segment (or campaign) and day.
+
+    Returns a (series x day) status matrix of codes (see `status_codes`) plus
+    the most recent rule breaches.
+    """
+    rule_set = load_rule_set()
+    key = ("kpi_status", days, granularity, limit, rule_set.fingerprint)
+    return RESULT_CACHE.get(key, lambda: _kpi_status(rule_set, days, granularity, limit))
+
+
+def get_kpi_status(days: int = 30, granularity: str = "segment", limit: int = 200) -> dict:
+    return get_kpi_status_versioned(days, granularity, limit)[1]
+
+
+def get_pipeline_report(runs: int = REPORT_RUNS, threshold: float = REGRESSION_THRESHOLD) -> dict:
+    """Per-agent metrics of the latest pipeline runs; see amids.telemetry.run_report."""
+    if not AMIDS_DB_PATH.exists():
+        return empty_report(threshold)
+    try:
+        return run_report(runs=runs, threshold=threshold)
+    except sqlite3.OperationalError:
+        # Warehouse built before agent metrics were recorded.
+        return empty_report(threshold)
+
+
+def get_dashboard_bundle_versioned(days: int = 30, sections: tuple[str, ...] = BUNDLE_SECTIONS) -> tuple[tuple, dict]:
+    """
+    Return several dashboard panels computed from one warehouse snapshot.
+
+    Warehouse sections are derived from a single segment scan, so every
+    panel reflects the same data version. `metrics`
+    comes from the prediction/feedback log aggregates.
+    """
+    warehouse = tuple(name for name in WAREHOUSE_SECTIONS if name in sections)
+    version = RESULT_CACHE.current_version()
+    panels: dict = {}
+    if warehouse:
+        version, panels = _warehouse_sections(days, warehouse)
+    bundle: dict = {"window_days": days, "data_version": list(version), **panels}
+    if "metrics" in sections:
+        bundle["metrics"] = compute_metrics()
+    return version, bundle
+
+
+def get_dashboard_bundle(days: int = 30, sections: tuple[str, ...] = BUNDLE_SECTIONS) -> dict:
+    return get_dashboard_bundle_versioned(days, sections)[1]
+
+
+def _warehouse_sections(
+    days: int,
+    sections: tuple[str, ...],
+    trend_options: tuple = (TREND_WINDOWS, TREND_EWMA_SPAN),
+) -> tuple[tuple, dict]:
+    return RESULT_CACHE.get(
+        ("sections", days, sections, trend_options),
+        lambda: _build_sections(days, sections, trend_options),
+    )
+
+
+def _build_sections(days: int, sections: tuple[str, ...], trend_options: tuple) -> dict:
+    snapshot = _Snapshot(days)
+    builders = {
+        "kpis": _kpi_dashboard,
+        "trends": lambda snap: _trend_analysis(snap, *trend_options),
+        "performance": _performance_metrics,
+    }
+    return {name: builders[name](snapshot) for name in sections}
+
+
+class _Snapshot:
+    """Segment rows for one window, read once and shared by every panel."""
+
+    def __init__(self, days: int) -> None:
+        self.days = days
+        self.available = AMIDS_DB_PATH.exists()
+        self.segments = self._read_segments(days)
+        self._daily: list[dict] | None = None
+
+    @staticmethod
+    def _read_segments(days: int) -> list[dict]:
+        if not AMIDS_DB_PATH.exists():
+            return []
+        with get_manager(AMIDS_DB_PATH).read() as conn:
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            return [dict(row) for row in cur.execute(ENGAGEMENT_PERFORMANCE_QUERY, (f"-{days} day",))]
+
+    @property
+    def daily(self) -> list[dict]:
+        """Segment rows summed per run_date, oldest first."""
+        if self._daily is None:
+            totals: dict[str, dict] = {}
+            for row in self.segments:
+                day = totals.setdefault(
+                    row["run_date"],
+                    {
+                        "run_date": row["run_date"],
+                        "revenue": 0.0,
+                        "spend": 0.0,
+                        "clicks": 0,
+                        "impressions": 0,
+                        "leads": 0,
+                    },
+                )
+                for name in ("revenue", "spend", "clicks", "impressions", "leads"):
+                    day[name] += row[name]
+            self._daily = [totals[key] for key in sorted(totals)]
+        return self._daily
+
+
+def _kpi_dashboard(snapshot: _Snapshot) -> dict:
+    rows = snapshot.segments
 
     roi_values = [
         float(row["channel_roi"])
@@ -57,16 +355,30 @@ def get_kpi_dashboard(days: int = 30) -> dict:
 
     latest = rows[:25]
     return {
-        "window_days": days,
+        "window_days": snapshot.days,
         "summary_stats": summary,
         "latest_segments": latest,
     }
 
 
-def get_trend_analysis(days: int = 30) -> dict:
-    period = f"-{days} day"
-    rows = _query(REVENUE_TREND_QUERY, (period,))
-    revenue_values = [float(row["revenue"]) for row in rows if row.get("revenue") is not None]
+def _trend_analysis(
+    snapshot: _Snapshot,
+    windows: tuple[int, ...] = TREND_WINDOWS,
+    ewma_span: int = TREND_EWMA_SPAN,
+) -> dict:
+    revenue_values = [float(day["revenue"]) for day in snapshot.daily]
+    smoothed = {f"revenue_ma{window}": rolling_mean(revenue_values, window).tolist() for window in windows}
+    smoothed[f"revenue_ewma{ewma_span}"] = ewma(revenue_values, ewma_span).tolist()
+    rows = [
+        {
+            "run_date": day["run_date"],
+            "revenue": day["revenue"],
+            "spend": day["spend"],
+            "ctr": day["clicks"] * 1.0 / day["impressions"] if day["impressions"] > 0 else None,
+            **{name: series[idx] for name, series in smoothed.items()},
+        }
+        for idx, day in enumerate(snapshot.daily)
+    ]
 
     anomalies = []
     zscore_hits = detect_anomalies_zscore(revenue_values, threshold=2.2)
@@ -88,37 +400,210 @@ def get_trend_analysis(days: int = 30) -> dict:
         )
 
     return {
-        "window_days": days,
+        "window_days": snapshot.days,
+        "moving_average_windows": list(windows),
+        "ewma_span": ewma_span,
         "summary_stats": calculate_summary_statistics(revenue_values),
         "trends": rows,
         "anomalies": anomalies,
     }
 
 
-def get_performance_metrics(days: int = 30) -> dict:
-    period = f"-{days} day"
-    risk_distribution = _query(RISK_DISTRIBUTION_QUERY, (period,))
-    summary_rows = _query(SUMMARY_STATS_QUERY, (period,))
-    summary = summary_rows[0] if summary_rows else {}
+def _metric_inputs(days: int, granularity: str) -> list[tuple]:
+    if not AMIDS_DB_PATH.exists():
+        return []
+    sql = SEGMENT_METRIC_INPUTS_QUERY if granularity == "segment" else CAMPAIGN_METRIC_INPUTS_QUERY
+    with get_manager(AMIDS_DB_PATH).read() as conn:
+        return conn.execute(sql, (f"-{days} day",)).fetchall()
+
+
+def _segment_anomalies(
+    days: int,
+    metrics: tuple[str, ...],
+    granularity: str,
+    z_threshold: float,
+    mad_threshold: float,
+    limit: int,
+) -> dict:
+    dimensions = ("channel", "region") if granularity == "segment" else ("campaign_id", "channel", "region")
+    rows = _metric_inputs(days, granularity)
+    result: dict = {
+        "window_days": days,
+        "granularity": granularity,
+        "metrics": list(metrics),
+        "series_count": 0,
+        "period_count": 0,
+        "hit_count": 0,
+        "anomalies": [],
+    }
+    if not rows:
+        return result
+
+    layout = metric_matrices(rows, dimensions)
+    dates, labels = layout.dates, layout.series
+
+    hit_metric, hit_method, hit_series, hit_day, hit_value, hit_score = [], [], [], [], [], []
+    detectors = (("zscore", rowwise_zscore_mask, z_threshold), ("mad", rowwise_mad_mask, mad_threshold))
+    for name in metrics:
+        matrix = layout.matrices[name]
+        for method_idx, (_, detect, threshold) in enumerate(detectors):
+            scores, mask = detect(matrix, threshold)
+            series_hits, day_hits = np.nonzero(mask)
+            hit_metric.append(np.full(series_hits.size, metrics.index(name), dtype=np.intp))
+            hit_method.append(np.full(series_hits.size, method_idx, dtype=np.intp))
+            hit_series.append(series_hits)
+            hit_day.append(day_hits)
+            hit_value.append(matrix[series_hits, day_hits])
+            hit_score.append(scores[series_hits, day_hits])
+
+    if not hit_score:
+        return result
+    scores = np.concatenate(hit_score)
+    order = np.argsort(-np.abs(scores), kind="stable")[:limit]
+    columns = [np.concatenate(part)[order] for part in (hit_metric, hit_method, hit_series, hit_day, hit_value)]
+    anomalies = []
+    for metric_idx, method_idx, series_idx, day_idx, value, score in zip(
+        *(column.tolist() for column in columns), scores[order].tolist()
+    ):
+        method, _, threshold = detectors[method_idx]
+        anomalies.append(
+            {
+                "run_date": dates[day_idx],
+                **dict(zip(dimensions, labels[series_idx])),
+                "metric": metrics[metric_idx],
+                "value": round(value, 4),
+                "method": method,
+                "score": round(score, 4),
+                "threshold": threshold,
+            }
+        )
+
+    result.update(
+        series_count=len(labels),
+        period_count=len(dates),
+        hit_count=int(scores.size),
+        anomalies=anomalies,
+    )
+    return result
+
+
+def _kpi_status(rule_set, days: int, granularity: str, limit: int) -> dict:
+    dimensions = ("channel", "region") if granularity == "segment" else ("campaign_id", "channel", "region")
+    layout = metric_matrices(_metric_inputs(days, granularity), dimensions)
+    evaluation = rule_set.evaluate(layout.matrices)
+    series = layout.series_labels()
+    latest = evaluation.status[:, -1] if layout.dates else evaluation.status[:, :0]
+    breaches = evaluation.breach_records(series, layout.dates)
+    return {
+        "window_days": days,
+        "granularity": granularity,
+        "rules_version": rule_set.version,
+        "status_codes": {label: code - 1 for code, label in enumerate(STATUS_LABELS)},
+        "latest_status_counts": {
+            label: int((latest == code - 1).sum()) for code, label in enumerate(STATUS_LABELS)
+        },
+        "dates": layout.dates,
+        "series": series,
+        "status": evaluation.status.tolist(),
+        "breach_count": len(breaches),
+        "breaches": breaches[:limit],
+    }
+
+
+def _metric_quantiles(
+    days: int,
+    metrics: tuple[str, ...],
+    channel: str | None,
+    region: str | None,
+    by_segment: bool,
+) -> dict:
+    result: dict = {"window_days": days, "by_segment": by_segment, "quantiles": []}
+    if not AMIDS_DB_PATH.exists() or not metrics:
+        return result
 
-    monitored = monitor_kpis(
-        metrics={
+    filters = [f"and metric in ({', '.join('?' for _ in metrics)})"]
+    params: list = [f"-{days} day", *metrics]
+    for column, value in (("channel", channel), ("region", region)):
+        if value is not None:
+            filters.append(f"and {column} = ?")
+            params.append(value)
+    sql = SEGMENT_SKETCHES_QUERY.format(filters="\n".join(filters))
+
+    groups: dict[tuple, list[QuantileSketch]] = {}
+    with get_manager(AMIDS_DB_PATH).read() as conn:
+        for metric, row_channel, row_region, blob in conn.execute(sql, params):
+            group = (metric, row_channel, row_region) if by_segment else (metric,)
+            groups.setdefault(group, []).append(QuantileSketch.from_bytes(blob))
+
+    for group in sorted(groups, key=lambda name: (metrics.index(name[0]), name[1:])):
+        sketch = QuantileSketch.merged(groups[group])
+        median, p90, p99 = sketch.quantiles([0.5, 0.9, 0.99])
+        entry = {"metric": group[0]}
+        if by_segment:
+            entry.update(channel=group[1], region=group[2])
+        entry.update(
+            count=sketch.n,
+            sketches_merged=len(groups[group]),
+            min=round(sketch.min, 4),
+            max=round(sketch.max, 4),
+            median=round(median, 4),
+            p90=round(p90, 4),
+            p99=round(p99, 4),
+            mad=round(sketch.median_absolute_deviation(), 4),
+            rank_error=round(sketch.rank_error(), 4),
+        )
+        result["quantiles"].append(entry)
+    return result
+
+
+def _risk_distribution(segments: list[dict]) -> list[dict]:
+    bands: dict[str, list[float]] = {}
+    for row in segments:
+        cac = row["spend"] * 1.0 / row["leads"] if row["leads"] > 0 else 0.0
+        ltv = row["revenue"] * 1.0 / row["signups"] if row["signups"] > 0 else 1.0
+        risk_score = min(100.0, (cac / (ltv + 1.0)) * 120.0)
+        band = "low" if risk_score < 35 else "medium" if risk_score < 70 else "high"
+        bands.setdefault(band, []).append(risk_score)
+
+    distribution = [
+        {"risk_band": band, "segments": len(scores), "avg_risk_score": round(fmean(scores), 2)}
+        for band, scores in bands.items()
+    ]
+    return sorted(distribution, key=lambda row: row["avg_risk_score"])
+
+
+def _performance_metrics(snapshot: _Snapshot) -> dict:
+    daily = snapshot.daily
+    summary: dict = {}
+    if daily:
+        summary = {
+            "row_count": len(daily),
+            "avg_revenue": round(fmean(day["revenue"] for day in daily), 2),
+            "avg_spend": round(fmean(day["spend"] for day in daily), 2),
+            "avg_clicks": round(fmean(day["clicks"] for day in daily), 2),
+            "avg_leads": round(fmean(day["leads"] for day in daily), 2),
+        }
+    elif snapshot.available:
+        summary = {
+            "row_count": 0,
+            "avg_revenue": None,
+            "avg_spend": None,
+            "avg_clicks": None,
+            "avg_leads": None,
+        }
+
+    monitored = load_rule_set().summary_statuses(
+        {
             "avg_revenue": float(summary.get("avg_revenue") or 0.0),
             "avg_spend": float(summary.get("avg_spend") or 0.0),
             "avg_clicks": float(summary.get("avg_clicks") or 0.0),
             "avg_leads": float(summary.get("avg_leads") or 0.0),
-        },
-        thresholds={
-            "avg_revenue": (10_000.0, None),
-            "avg_spend": (None, 45_000.0),
-            "avg_clicks": (250.0, None),
-            "avg_leads": (40.0, None),
-        },
+        }
     )
 
     return {
-        "window_days": days,
+        "window_days": snapshot.days,
         "summary": summary,
-        "risk_distribution": risk_distribution,
+        "risk_distribution": _risk_distribution(snapshot.segments),
         "kpi_monitoring": monitored,
     }
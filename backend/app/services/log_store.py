@@ -0,0 +1,535 @@
+"""
+Append-only SQLite store for prediction and feedback history.
+
+Every write is a single-row (or single-batch) insert into a WAL-mode database,
+so appends stay O(1) and several API workers can share the same file. Records
+are retained for a configurable number of days instead of a fixed row count.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from amids.connections import get_manager
+
+ROOT = Path(__file__).resolve().parents[3]
+DATA_DIR = ROOT / "data"
+LOG_DB_PATH = Path(os.getenv("CITTAAI_LOG_DB_PATH", DATA_DIR / "activity_log.db"))
+LEGACY_FEEDBACK_PATH = DATA_DIR / "feedback_log.json"
+LEGACY_PREDICTION_PATH = DATA_DIR / "prediction_log.json"
+
+# Retention in days; 0 keeps history forever.
+PREDICTION_RETENTION_DAYS = int(os.getenv("CITTAAI_PREDICTION_RETENTION_DAYS", "0"))
+FEEDBACK_RETENTION_DAYS = int(os.getenv("CITTAAI_FEEDBACK_RETENTION_DAYS", "0"))
+PRUNE_INTERVAL_SECONDS = 3_600
+
+FEEDBACK_FIELDS = ("user_id", "feature", "sentiment", "severity", "message")
+
+SCHEMA = """
+create table if not exists store_meta (
+    key text primary key,
+    value text not null
+);
+
+create table if not exists prediction_log (
+    seq integer primary key autoincrement,
+    id text not null,
+    created_at text not null,
+    account_id text not null,
+    risk_score integer,
+    priority_band text,
+    payload text not null
+);
+
+create index if not exists idx_prediction_log_created_at
+    on prediction_log (created_at);
+
+create index if not exists idx_prediction_log_account_id
+    on prediction_log (account_id, seq);
+
+create index if not exists idx_prediction_log_priority_band
+    on prediction_log (priority_band, seq);
+
+create table if not exists feedback_log (
+    seq integer primary key autoincrement,
+    id text not null,
+    created_at text not null,
+    user_id text not null,
+    feature text not null,
+    sentiment text not null,
+    severity text not null,
+    message text not null
+);
+
+create index if not exists idx_feedback_log_created_at
+    on feedback_log (created_at);
+
+create index if not exists idx_feedback_log_severity
+    on feedback_log (severity, seq);
+
+create index if not exists idx_feedback_log_sentiment
+    on feedback_log (sentiment, seq);
+
+create index if not exists idx_feedback_log_feature
+    on feedback_log (feature, seq);
+
+create table if not exists log_aggregates (
+    id integer primary key check (id = 1),
+    version integer not null default 0,
+    prediction_count integer not null default 0,
+    risk_count integer not null default 0,
+    risk_mean real not null default 0,
+    risk_m2 real not null default 0,
+    feedback_total integer not null default 0,
+    feedback_negative integer not null default 0,
+    feedback_high_severity integer not null default 0
+);
+
+insert or ignore into log_aggregates (id) values (1);
+
+create table if not exists risk_score_histogram (
+    score integer primary key,
+    count integer not null
+);
+"""
+
+_init_lock = threading.Lock()
+_initialized: set[Path] = set()
+# -inf, not 0.0: monotonic() can be below the prune interval on a freshly booted host.
+_last_prune = float("-inf")
+
+
+def _read_legacy(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    try:
+        rows = json.loads(path.read_text(encoding="utf-8-sig"))
+    except json.JSONDecodeError:
+        return []
+    return rows if isinstance(rows, list) else []
+
+
+def _import_legacy(conn: sqlite3.Connection) -> None:
+    """Copy the old rewrite-whole-file JSON logs into the store exactly once."""
+    done = conn.execute("select value from store_meta where key = 'legacy_import'").fetchone()
+    if done:
+        return
+    # Legacy files are newest-first; insert oldest-first so seq follows time.
+    _insert_predictions(conn, _read_legacy(LEGACY_PREDICTION_PATH)[::-1])
+    _insert_feedback(conn, _read_legacy(LEGACY_FEEDBACK_PATH)[::-1])
+    conn.execute(
+        "insert into store_meta (key, value) values ('legacy_import', ?)",
+        (datetime.now(timezone.utc).isoformat(),),
+    )
+
+
+def _moments(values: list[float]) -> tuple[int, float, float]:
+    """Return (count, mean, sum of squared deviations) using Welford's update."""
+    count, mean, m2 = 0, 0.0, 0.0
+    for value in values:
+        count += 1
+        delta = value - mean
+        mean += delta / count
+        m2 += delta * (value - mean)
+    return count, mean, m2
+
+
+def _merge_moments(
+    total: tuple[int, float, float],
+    part: tuple[int, float, float],
+    sign: int = 1,
+) -> tuple[int, float, float]:
+    """Add (sign=1) or remove (sign=-1) a batch's moments from running moments."""
+    n, mean, m2 = total
+    nb, mean_b, m2_b = part
+    if nb == 0:
+        return total
+    if sign > 0:
+        n_new = n + nb
+        delta = mean_b - mean
+        return n_new, mean + delta * nb / n_new, m2 + m2_b + delta * delta * n * nb / n_new
+    n_new = n - nb
+    if n_new <= 0:
+        return 0, 0.0, 0.0
+    mean_new = (n * mean - nb * mean_b) / n_new
+    delta = mean_b - mean_new
+    return n_new, mean_new, max(0.0, m2 - m2_b - delta * delta * n_new * nb / n)
+
+
+def _risk_scores(rows: list[dict]) -> list[float]:
+    return [float(row["risk_score"]) for row in rows if row.get("risk_score") is not None]
+
+
+def _apply_prediction_aggregates(conn: sqlite3.Connection, scores: list[float], rows: int, sign: int) -> None:
+    count, mean, m2 = conn.execute(
+        "select risk_count, risk_mean, risk_m2 from log_aggregates where id = 1"
+    ).fetchone()
+    count, mean, m2 = _merge_moments((count, mean, m2), _moments(scores), sign)
+    conn.execute(
+        """
+        update log_aggregates
+        set version = version + 1,
+            prediction_count = prediction_count + ?,
+            risk_count = ?,
+            risk_mean = ?,
+            risk_m2 = ?
+        where id = 1
+        """,
+        (sign * rows, count, mean, m2),
+    )
+
+    histogram: dict[int, int] = {}
+    for score in scores:
+        histogram[int(score)] = histogram.get(int(score), 0) + 1
+    conn.executemany(
+        """
+        insert into risk_score_histogram (score, count) values (?, ?)
+        on conflict (score) do update set count = count + excluded.count
+        """,
+        [(score, sign * count) for score, count in histogram.items()],
+    )
+    if sign < 0:
+        conn.execute("delete from risk_score_histogram where count <= 0")
+
+
+def _apply_feedback_aggregates(conn: sqlite3.Connection, rows: list[dict], sign: int) -> None:
+    conn.execute(
+        """
+        update log_aggregates
+        set version = version + 1,
+            feedback_total = feedback_total + ?,
+            feedback_negative = feedback_negative + ?,
+            feedback_high_severity = feedback_high_severity + ?
+        where id = 1
+        """,
+        (
+            sign * len(rows),
+            sign * sum(1 for row in rows if row.get("sentiment") == "negative"),
+            sign * sum(1 for row in rows if row.get("severity") == "high"),
+        ),
+    )
+
+
+def _rebuild_aggregates(conn: sqlite3.Connection) -> None:
+    """Recompute running aggregates from the stored history (one-time scan)."""
+    conn.execute("delete from risk_score_histogram")
+    conn.execute(
+        """
+        update log_aggregates
+        set version = version + 1,
+            prediction_count = 0, risk_count = 0, risk_mean = 0, risk_m2 = 0,
+            feedback_total = 0, feedback_negative = 0, feedback_high_severity = 0
+        where id = 1
+        """
+    )
+    predictions = [
+        {"risk_score": score}
+        for (score,) in conn.execute("select risk_score from prediction_log")
+    ]
+    _apply_prediction_aggregates(conn, _risk_scores(predictions), len(predictions), 1)
+    feedback = [
+        {"sentiment": sentiment, "severity": severity}
+        for sentiment, severity in conn.execute("select sentiment, severity from feedback_log")
+    ]
+    _apply_feedback_aggregates(conn, feedback, 1)
+    conn.execute("insert or replace into store_meta (key, value) values ('aggregates', 'v1')")
+
+
+def _ensure_schema(path: Path) -> None:
+    if path in _initialized:
+        return
+    with _init_lock:
+        if path in _initialized:
+            return
+        manager = get_manager(path)
+        with manager.write() as conn:
+            conn.executescript(SCHEMA)
+        with manager.write(immediate=True) as conn:
+            _import_legacy(conn)
+            built = conn.execute("select 1 from store_meta where key = 'aggregates'").fetchone()
+            if not built:
+                _rebuild_aggregates(conn)
+        _initialized.add(path)
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+    """Write to the log store in one immediate transaction on the shared writer."""
+    path = LOG_DB_PATH
+    _ensure_schema(path)
+    with get_manager(path).write(immediate=True) as conn:
+        yield conn
+
+
+@contextmanager
+def connect_readonly() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled read-only connection to the log store."""
+    path = LOG_DB_PATH
+    _ensure_schema(path)
+    with get_manager(path).read() as conn:
+        yield conn
+
+
+def _insert_predictions(conn: sqlite3.Connection, rows: list[dict]) -> None:
+    conn.executemany(
+        """
+        insert into prediction_log (id, created_at, account_id, risk_score, priority_band, payload)
+        values (?,?,?,?,?,?)
+        """,
+        [
+            (
+                row["id"],
+                row["created_at"],
+                row.get("account_id", ""),
+                row.get("risk_score"),
+                row.get("priority_band"),
+                json.dumps(row),
+            )
+            for row in rows
+        ],
+    )
+    _apply_prediction_aggregates(conn, _risk_scores(rows), len(rows), 1)
+
+
+def _insert_feedback(conn: sqlite3.Connection, rows: list[dict]) -> None:
+    conn.executemany(
+        """
+        insert into feedback_log (id, created_at, user_id, feature, sentiment, severity, message)
+        values (?,?,?,?,?,?,?)
+        """,
+        [(row["id"], row["created_at"], *(row.get(name, "") for name in FEEDBACK_FIELDS)) for row in rows],
+    )
+    _apply_feedback_aggregates(conn, rows, 1)
+
+
+def _maybe_prune(conn: sqlite3.Connection) -> None:
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    prune(conn)
+
+
+def prune(conn: sqlite3.Connection, now: datetime | None = None) -> dict:
+    """Delete records older than the configured retention windows."""
+    now = now or datetime.now(timezone.utc)
+    removed = {"predictions": 0, "feedback": 0}
+
+    if PREDICTION_RETENTION_DAYS > 0:
+        cutoff = (now - timedelta(days=PREDICTION_RETENTION_DAYS)).isoformat()
+        expired = [
+            {"risk_score": score}
+            for (score,) in conn.execute(
+                "select risk_score from prediction_log where created_at < ?", (cutoff,)
+            )
+        ]
+        if expired:
+            conn.execute("delete from prediction_log where created_at < ?", (cutoff,))
+            _apply_prediction_aggregates(conn, _risk_scores(expired), len(expired), -1)
+        removed["predictions"] = len(expired)
+
+    if FEEDBACK_RETENTION_DAYS > 0:
+        cutoff = (now - timedelta(days=FEEDBACK_RETENTION_DAYS)).isoformat()
+        expired = [
+            {"sentiment": sentiment, "severity": severity}
+            for sentiment, severity in conn.execute(
+                "select sentiment, severity from feedback_log where created_at < ?", (cutoff,)
+            )
+        ]
+        if expired:
+            conn.execute("delete from feedback_log where created_at < ?", (cutoff,))
+            _apply_feedback_aggregates(conn, expired, -1)
+        removed["feedback"] = len(expired)
+
+    return removed
+
+
+def append_predictions(rows: list[dict]) -> None:
+    if not rows:
+        return
+    with connect() as conn:
+        _insert_predictions(conn, rows)
+        _maybe_prune(conn)
+
+
+def append_feedback(rows: list[dict]) -> None:
+    if not rows:
+        return
+    with connect() as conn:
+        _insert_feedback(conn, rows)
+        _maybe_prune(conn)
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"seq:{seq}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the seq encoded in a page cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Malformed cursor.") from exc
+    prefix, _, value = raw.partition(":")
+    if prefix != "seq" or not value.isdigit():
+        raise ValueError("Malformed cursor.")
+    return int(value)
+
+
+def _page(
+    table: str,
+    columns: str,
+    filters: dict[str, str | None],
+    limit: int,
+    before_seq: int | None,
+    since: str | None,
+    until: str | None,
+) -> list[tuple]:
+    # Keyset pagination: newest first, resuming strictly below the cursor's seq.
+    clauses: list[str] = []
+    params: list = []
+    for column, value in filters.items():
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if before_seq is not None:
+        clauses.append("seq < ?")
+        params.append(before_seq)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    where = f"where {' and '.join(clauses)}" if clauses else ""
+    with connect_readonly() as conn:
+        return conn.execute(
+            f"select seq, {columns} from {table} {where} order by seq desc limit ?",
+            (*params, limit),
+        ).fetchall()
+
+
+def page_predictions(
+    limit: int,
+    before_seq: int | None = None,
+    account_id: str | None = None,
+    priority_band: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> tuple[list[dict], int | None]:
+    """Return up to `limit` predictions older than `before_seq` and the next page's seq."""
+    rows = _page(
+        "prediction_log",
+        "payload",
+        {"account_id": account_id, "priority_band": priority_band},
+        limit,
+        before_seq,
+        since,
+        until,
+    )
+    items = [json.loads(payload) for _, payload in rows]
+    return items, (rows[-1][0] if len(rows) == limit else None)
+
+
+def page_feedback(
+    limit: int,
+    before_seq: int | None = None,
+    sentiment: str | None = None,
+    severity: str | None = None,
+    feature: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> tuple[list[dict], int | None]:
+    """Return up to `limit` feedback rows older than `before_seq` and the next page's seq."""
+    names = ("id", "created_at", *FEEDBACK_FIELDS)
+    rows = _page(
+        "feedback_log",
+        ", ".join(names),
+        {"sentiment": sentiment, "severity": severity, "feature": feature},
+        limit,
+        before_seq,
+        since,
+        until,
+    )
+    items = [dict(zip(names, row[1:])) for row in rows]
+    return items, (rows[-1][0] if len(rows) == limit else None)
+
+
+def fetch_predictions(limit: int | None = None) -> list[dict]:
+    """Return stored predictions newest first."""
+    with connect_readonly() as conn:
+        rows = conn.execute(
+            "select payload from prediction_log order by seq desc limit ?",
+            (-1 if limit is None else limit,),
+        ).fetchall()
+    return [json.loads(payload) for (payload,) in rows]
+
+
+def fetch_feedback(limit: int | None = None) -> list[dict]:
+    """Return stored feedback newest first."""
+    with connect_readonly() as conn:
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        rows = cur.execute(
+            """
+            select id, created_at, user_id, feature, sentiment, severity, message
+            from feedback_log
+            order by seq desc
+            limit ?
+            """,
+            (-1 if limit is None else limit,),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _histogram_median(histogram: list[tuple[int, int]], count: int) -> float | None:
+    if count <= 0:
+        return None
+    lower_rank, upper_rank = (count - 1) // 2, count // 2
+    lower = upper = None
+    seen = 0
+    for score, bucket in histogram:
+        seen += bucket
+        if lower is None and seen > lower_rank:
+            lower = score
+        if seen > upper_rank:
+            upper = score
+            break
+    return (lower + upper) / 2.0
+
+
+def fetch_aggregates() -> dict:
+    """
+    Return running counters and risk-score moments without scanning history.
+
+    Risk scores are integers in 0-100, so a 101-bucket histogram gives an
+    exact streaming median.
+    """
+    with connect_readonly() as conn:
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        row = dict(cur.execute("select * from log_aggregates where id = 1").fetchone())
+        histogram = conn.execute(
+            "select score, count from risk_score_histogram where count > 0 order by score"
+        ).fetchall()
+
+    count = row["risk_count"]
+    row["risk_median"] = _histogram_median([tuple(item) for item in histogram], count)
+    row["risk_variance"] = row["risk_m2"] / count if count else None
+    return row
+
+
+def fetch_version() -> int:
+    """Return a counter that changes whenever predictions or feedback change."""
+    with connect_readonly() as conn:
+        return conn.execute("select version from log_aggregates where id = 1").fetchone()[0]
@@ -0,0 +1,123 @@
+"""
+LRU result cache invalidated by a data version instead of a TTL.
+
+Each entry remembers the data version it was computed from. While the version
+is unchanged a hit is a dictionary lookup. Once the version moves on, the old
+result is still served and a single background refresh recomputes it, so no
+request waits on a full aggregation after the nightly pipeline lands.
+`get` returns the version a result was computed from alongside it, so
+callers can label a stale result (e.g. in an ETag) with its own version.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Hashable, TypeVar
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class VersionedResultCache:
+    def __init__(
+        self,
+        version: Callable[[], Hashable],
+        max_entries: int = 128,
+        version_check_interval: float = 1.0,
+    ) -> None:
+        self._version_fn = version
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+
+        self._entries: OrderedDict[Hashable, tuple[Hashable, object]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+        self._version: Hashable = None
+        self._version_checked_at = float("-inf")
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def current_version(self) -> Hashable:
+        # Version probes hit the database, so they are throttled.
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_check_interval:
+            self._version = self._version_fn()
+            self._version_checked_at = now
+        return self._version
+
+    def get(self, key: Hashable, compute: Callable[[], T]) -> tuple[Hashable, T]:
+        """
+        Return (data version, result) for `key`; results must be treated as read-only.
+
+        The version is the one the result was computed from, which lags
+        `current_version()` while a stale result is being refreshed.
+        """
+        version = self.current_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                cached_version, value = entry
+                if cached_version == version:
+                    self.hits += 1
+                    return cached_version, value  # type: ignore[return-value]
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(
+                        target=self._refresh,
+                        args=(key, version, compute),
+                        name="result-cache-refresh",
+                        daemon=True,
+                    ).start()
+                return cached_version, value  # type: ignore[return-value]
+            self.misses += 1
+
+        value = compute()
+        self._store(key, version, value)
+        return version, value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._version_checked_at = float("-inf")
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+            refreshing = len(self._refreshing)
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshing": refreshing,
+            "data_version": repr(self._version),
+        }
+
+    def _store(self, key: Hashable, version: Hashable, value: object) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _refresh(self, key: Hashable, version: Hashable, compute: Callable[[], object]) -> None:
+        try:
+            self._store(key, version, compute())
+        except Exception:
+            logger.exception("Background refresh failed for %r", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -2,16 +2,24 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
 import json
+import os
 import uuid
 
-from ..analytics import calculate_summary_statistics
+from . import log_store
+from .write_behind import WriteBehindBuffer
 
 ROOT = Path(__file__).resolve().parents[3]
 DATA_DIR = ROOT / "data"
 ROADMAP_PATH = DATA_DIR / "roadmap.json"
-FEEDBACK_PATH = DATA_DIR / "feedback_log.json"
-PREDICTION_PATH = DATA_DIR / "prediction_log.json"
+
+PREDICTION_BUFFER = WriteBehindBuffer(
+    log_store.append_predictions,
+    max_batch=int(os.getenv("CITTAAI_WRITE_BEHIND_BATCH", "500")),
+    max_delay=float(os.getenv("CITTAAI_WRITE_BEHIND_DELAY_MS", "250")) / 1000.0,
+    max_queue=int(os.getenv("CITTAAI_WRITE_BEHIND_QUEUE", "20000")),
+)
 
 
 DEFAULT_ROADMAP = {
@@ -80,57 +88,154 @@ def load_roadmap() -> dict:
     return _read_json(ROADMAP_PATH, DEFAULT_ROADMAP)
 
 
-def load_feedback() -> list[dict]:
-    return _read_json(FEEDBACK_PATH, [])
+def load_feedback(limit: int | None = None) -> list[dict]:
+    return log_store.fetch_feedback(limit)
 
 
-def load_predictions() -> list[dict]:
-    return _read_json(PREDICTION_PATH, [])
+def load_predictions(limit: int | None = None) -> list[dict]:
+    return log_store.fetch_predictions(limit)
 
 
-def append_feedback(payload: dict) -> dict:
-    row = {
+def _new_row(payload: dict, created_at: str | None = None) -> dict:
+    return {
         "id": str(uuid.uuid4())[:8],
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": created_at or datetime.now(timezone.utc).isoformat(),
         **payload,
     }
-    rows = load_feedback()
-    rows.insert(0, row)
-    _write_json(FEEDBACK_PATH, rows[:500])
+
+
+def append_feedback(payload: dict) -> dict:
+    row = _new_row(payload)
+    log_store.append_feedback([row])
     return row
 
 
 def append_prediction(payload: dict) -> dict:
-    row = {
-        "id": str(uuid.uuid4())[:8],
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        **payload,
-    }
-    rows = load_predictions()
-    rows.insert(0, row)
-    _write_json(PREDICTION_PATH, rows[:1_000])
+    row = _new_row(payload)
+    log_store.append_predictions([row])
     return row
 
 
+def queue_prediction(payload: dict) -> dict:
+    """Stamp a prediction and hand it to the write-behind buffer."""
+    row = _new_row(payload)
+    PREDICTION_BUFFER.submit(row)
+    return row
+
+
+def flush_pending_writes() -> None:
+    PREDICTION_BUFFER.flush()
+
+
+def persistence_stats() -> dict:
+    return {"write_behind": PREDICTION_BUFFER.stats()}
+
+
+def append_predictions(payloads: list[dict]) -> list[dict]:
+    """Persist many scored predictions in a single transaction."""
+    created_at = datetime.now(timezone.utc).isoformat()
+    rows = [_new_row(payload, created_at) for payload in payloads]
+    log_store.append_predictions(rows)
+    return rows
+
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_PAGE_MAX = 500
+HISTORY_STREAM_CHUNK = 500
+
+_HISTORY_PAGERS = {
+    "feedback": log_store.page_feedback,
+    "predictions": log_store.page_predictions,
+}
+
+
+def _as_utc_iso(value: datetime | None) -> str | None:
+    # Stored created_at values are UTC ISO strings, so filters compare lexically.
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def history_page(
+    kind: str,
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    **filters: str | None,
+) -> dict:
+    """
+    Return one newest-first page of feedback or prediction history.
+
+    Raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(limit, HISTORY_PAGE_MAX))
+    before_seq = log_store.decode_cursor(cursor) if cursor else None
+    items, next_seq = _HISTORY_PAGERS[kind](
+        limit,
+        before_seq,
+        since=_as_utc_iso(since),
+        until=_as_utc_iso(until),
+        **filters,
+    )
+    return {
+        "items": items,
+        "limit": limit,
+        "next_cursor": log_store.encode_cursor(next_seq) if next_seq is not None else None,
+    }
+
+
+def iter_history(
+    kind: str,
+    limit: int | None = None,
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    **filters: str | None,
+) -> Iterator[dict]:
+    """Yield matching history rows newest first, reading in fixed-size keyset chunks."""
+    before_seq = log_store.decode_cursor(cursor) if cursor else None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        chunk = HISTORY_STREAM_CHUNK if remaining is None else min(remaining, HISTORY_STREAM_CHUNK)
+        items, before_seq = _HISTORY_PAGERS[kind](
+            chunk,
+            before_seq,
+            since=_as_utc_iso(since),
+            until=_as_utc_iso(until),
+            **filters,
+        )
+        yield from items
+        if remaining is not None:
+            remaining -= len(items)
+        if before_seq is None:
+            return
+
+
+def log_version() -> int:
+    return log_store.fetch_version()
+
+
 def compute_metrics(prediction_count: int | None = None) -> dict:
-    feedback = load_feedback()
-    predictions = load_predictions()
-    prediction_total = len(predictions)
+    aggregates = log_store.fetch_aggregates()
+    prediction_total = aggregates["prediction_count"]
     if prediction_count is not None:
         prediction_total = max(prediction_total, int(prediction_count))
 
-    negative = sum(1 for row in feedback if row.get("sentiment") == "negative")
-    high_severity = sum(1 for row in feedback if row.get("severity") == "high")
-    risk_scores = [float(row.get("risk_score", 0)) for row in predictions if "risk_score" in row]
-    risk_stats = calculate_summary_statistics(risk_scores)
+    risk_count = aggregates["risk_count"]
+    variance = None
+    if risk_count:
+        variance = round(aggregates["risk_variance"], 4) if risk_count > 1 else 0.0
 
     return {
         "prediction_count": prediction_total,
-        "feedback_total": len(feedback),
-        "feedback_negative": negative,
-        "feedback_high_severity": high_severity,
+        "feedback_total": aggregates["feedback_total"],
+        "feedback_negative": aggregates["feedback_negative"],
+        "feedback_high_severity": aggregates["feedback_high_severity"],
         "feedback_response_sla_hours": 48,
-        "risk_score_mean": risk_stats["mean"],
-        "risk_score_median": risk_stats["median"],
-        "risk_score_variance": risk_stats["variance"],
+        "risk_score_mean": round(aggregates["risk_mean"], 4) if risk_count else None,
+        "risk_score_median": round(aggregates["risk_median"], 4) if risk_count else None,
+        "risk_score_variance": variance,
     }
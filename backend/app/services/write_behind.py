@@ -0,0 +1,241 @@
+"""
+In-process write-behind buffer for append-only records.
+
+Callers enqueue records and return immediately; a background thread flushes
+them in batches once `max_batch` records are waiting or the oldest record is
+`max_delay` seconds old. The queue is bounded: when it is full, callers block
+for up to `put_timeout` seconds and then write their record synchronously, so
+overload slows requests down instead of dropping data.
+
+A failed flush is retried with exponential backoff for up to `retry_timeout`
+seconds (a locked database usually clears well within that); meanwhile the
+queue fills and callers are slowed down the same way. Records are dropped
+only once the whole retry window has failed. After `stop()`, submitted records
+are written synchronously until the buffer is started again.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Callable
+import logging
+import queue
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        flush: Callable[[list[dict]], None],
+        max_batch: int = 500,
+        max_delay: float = 0.25,
+        max_queue: int = 20_000,
+        put_timeout: float = 2.0,
+        retry_timeout: float = 30.0,
+    ) -> None:
+        self._flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self.retry_timeout = retry_timeout
+
+        self._queue: queue.Queue[tuple[float, dict]] = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+
+        self.submitted = 0
+        self.flushed = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.sync_writes = 0
+        self.last_flush_at: str | None = None
+        self.last_flush_ms: float | None = None
+        self.last_flush_lag_seconds: float | None = None
+
+    def start(self) -> None:
+        with self._state_lock:
+            self._stopped = False
+            self._start_thread()
+
+    def _start_thread(self) -> None:
+        # Caller holds _state_lock.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the background thread and flush everything still queued."""
+        with self._state_lock:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def submit(self, record: dict) -> None:
+        item = (time.monotonic(), record)
+        with self._counter_lock:
+            self.submitted += 1
+        with self._state_lock:
+            stopped = self._stopped
+            if not stopped:
+                self._start_thread()
+        if stopped:
+            # Nothing would flush a thread started after shutdown.
+            with self._counter_lock:
+                self.sync_writes += 1
+            self._write([item], queued=False)
+            return
+        try:
+            self._queue.put_nowait(item)
+            self._flush_if_stopped()
+            return
+        except queue.Full:
+            with self._counter_lock:
+                self.backpressure_waits += 1
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+            self._flush_if_stopped()
+        except queue.Full:
+            # Still saturated: persist inline rather than lose the record.
+            with self._counter_lock:
+                self.sync_writes += 1
+            self._write([item], queued=False)
+
+    def flush(self) -> None:
+        """Synchronously write every queued record, including batches in flight."""
+        while True:
+            batch = self._drain(self.max_batch)
+            if not batch:
+                break
+            self._write(batch)
+        # Wait for batches the background thread already dequeued.
+        self._queue.join()
+
+    def _flush_if_stopped(self) -> None:
+        # stop() may have drained the queue between our state check and the put.
+        if self._stopped:
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._queue.mutex:
+            depth = len(self._queue.queue)
+            oldest = self._queue.queue[0][0] if depth else None
+        with self._counter_lock:
+            counters = {
+                "submitted": self.submitted,
+                "flushed": self.flushed,
+                "flush_count": self.flush_count,
+                "failed_flushes": self.failed_flushes,
+                "dropped": self.dropped,
+                "backpressure_waits": self.backpressure_waits,
+                "sync_writes": self.sync_writes,
+                "last_flush_at": self.last_flush_at,
+                "last_flush_ms": self.last_flush_ms,
+                "last_flush_lag_seconds": self.last_flush_lag_seconds,
+            }
+        return {
+            "queue_depth": depth,
+            "max_queue": self.max_queue,
+            "max_batch": self.max_batch,
+            "max_delay_seconds": self.max_delay,
+            "oldest_pending_age_seconds": round(time.monotonic() - oldest, 4) if oldest else 0.0,
+            **counters,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
+
+    def _drain(self, limit: int) -> list[tuple[float, dict]]:
+        batch: list[tuple[float, dict]] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        # Poll in short slices so stop() never waits a full max_delay.
+        poll = min(self.max_delay, 0.05)
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=poll)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = first[0] + self.max_delay
+            while len(batch) < self.max_batch and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, poll)))
+                except queue.Empty:
+                    continue
+            batch.extend(self._drain(self.max_batch - len(batch)))
+            self._write(batch)
+
+    def _write(self, batch: list[tuple[float, dict]], queued: bool = True) -> None:
+        try:
+            self._write_batch(batch)
+        finally:
+            if queued:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list[tuple[float, dict]]) -> None:
+        records = [record for _, record in batch]
+        give_up_at = time.monotonic() + self.retry_timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            try:
+                with self._write_lock:
+                    self._flush(records)
+            except Exception:
+                with self._counter_lock:
+                    self.failed_flushes += 1
+                backoff = min(0.05 * 2 ** (attempt - 1), 2.0)
+                if time.monotonic() + backoff > give_up_at:
+                    break
+                logger.warning(
+                    "Write-behind flush of %d records failed (attempt %d), retrying in %.2fs",
+                    len(records),
+                    attempt,
+                    backoff,
+                    exc_info=attempt == 1,
+                )
+                time.sleep(backoff)
+                continue
+
+            finished = time.monotonic()
+            with self._counter_lock:
+                self.flushed += len(records)
+                self.flush_count += 1
+                self.last_flush_at = datetime.now(timezone.utc).isoformat()
+                self.last_flush_ms = round((finished - started) * 1000.0, 3)
+                self.last_flush_lag_seconds = round(finished - min(ts for ts, _ in batch), 4)
+            return
+
+        with self._counter_lock:
+            self.dropped += len(records)
+        logger.error(
+            "Write-behind dropped %d records after %d attempts over %.0fs",
+            len(records),
+            attempt,
+            self.retry_timeout,
+        )
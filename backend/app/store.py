@@ -7,6 +7,7 @@ The canonical implementations now live in backend.app.services.storage_service.
 from .services.storage_service import (
     append_feedback,
     append_prediction,
+    append_predictions,
     compute_metrics,
     load_feedback,
     load_predictions,
@@ -19,5 +20,6 @@ __all__ = [
     "load_predictions",
     "append_feedback",
     "append_prediction",
+    "append_predictions",
     "compute_metrics",
 ]
@@ -0,0 +1,14 @@
+"""
+Micro-benchmarks for the analytics layer.
+
+Run from the repository root:
+
+    python -m benchmarks                              # all cases, 10^3..10^7 inputs
+    python -m benchmarks -k dashboard --sizes 1e3,1e5
+    python -m benchmarks --save-baseline              # write benchmarks/baseline.json
+    python -m benchmarks --compare --tolerance 0.25   # exit 1 on a regression
+
+Inputs are synthetic and seeded, so two runs on the same machine measure the
+same work. Dashboard cases run against a throwaway SQLite warehouse in a
+temporary directory, never the configured AMIDS database.
+"""
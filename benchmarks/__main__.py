@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = "1e3,1e4,1e5,1e6,1e7"
+
+
+def _sizes(text: str) -> list[int]:
+    try:
+        return [int(float(part)) for part in text.split(",") if part.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid sizes {text!r}") from exc
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Analytics micro-benchmarks.")
+    parser.add_argument("--sizes", type=_sizes, default=_sizes(DEFAULT_SIZES), help=f"default {DEFAULT_SIZES}")
+    parser.add_argument("-k", "--cases", default="", help="regex matched against 'group.case'")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-repeat", type=int, default=3)
+    parser.add_argument("--max-repeat", type=int, default=30)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds of timed calls per case and size")
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    parser.add_argument("--save-baseline", type=Path, nargs="?", const=DEFAULT_BASELINE, metavar="PATH")
+    parser.add_argument("--compare", type=Path, nargs="?", const=DEFAULT_BASELINE, metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median latency increase")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory increase")
+    parser.add_argument("--noise-floor-ms", type=float, default=0.05)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+
+    # Dashboard cases rebuild the warehouse; keep them away from real data.
+    workdir = Path(tempfile.mkdtemp(prefix="amids-bench-"))
+    os.environ["AMIDS_DB_PATH"] = str(workdir / "amids.db")
+    os.environ["CITTAAI_LOG_DB_PATH"] = str(workdir / "activity_log.db")
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+    from benchmarks import harness
+    from benchmarks.cases import CASES
+
+    pattern = re.compile(args.cases)
+    cases = [case for case in CASES if pattern.search(f"{case.group}.{case.name}")]
+    if not cases:
+        print(f"no cases match {args.cases!r}", file=sys.stderr)
+        return 2
+
+    def progress(result: dict) -> None:
+        print(
+            f"{result['group']}.{result['case']:<26} n={result['size']:<9,} "
+            f"p50={result['latency_ms']['p50']:10.3f} ms  "
+            f"peak={result['peak_memory_bytes'] / 2**20:8.2f} MiB",
+            file=sys.stderr,
+        )
+
+    report = harness.run(
+        cases,
+        args.sizes,
+        seed=args.seed,
+        progress=progress,
+        min_repeat=args.min_repeat,
+        max_repeat=args.max_repeat,
+        budget=args.budget,
+    )
+
+    status = 0
+    if args.compare:
+        findings = harness.compare(
+            harness.load_report(args.compare),
+            report,
+            tolerance=args.tolerance,
+            memory_tolerance=args.memory_tolerance,
+            noise_floor_ms=args.noise_floor_ms,
+        )
+        report["comparison"] = {"baseline": str(args.compare), "tolerance": args.tolerance, "findings": findings}
+        for finding in findings:
+            if finding["regressed"]:
+                status = 1
+                print(
+                    f"REGRESSION {finding['case']} n={finding['size']:,}: "
+                    f"latency x{finding['latency_ratio']}, memory x{finding['memory_ratio']}",
+                    file=sys.stderr,
+                )
+    if args.save_baseline:
+        harness.save_report(report, args.save_baseline)
+    if args.output:
+        harness.save_report(report, args.output)
+    elif not args.save_baseline:
+        print(json.dumps(report, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
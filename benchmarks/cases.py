@@ -0,0 +1,209 @@
+"""
+Benchmark cases for the analytics functions and dashboard services.
+
+Analytics cases take ``size`` values (or accounts / KPIs). Dashboard and agent cases
+take ``size`` raw campaign rows spread over `WAREHOUSE_DAYS` days ending
+today; they write that warehouse into the configured AMIDS database, so
+`benchmarks.__main__` points ``AMIDS_DB_PATH`` at a temporary file first.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from amids.agents import anomaly_agent
+from amids.agents.data_agent import CHANNELS, REGIONS, refresh_segment_rollup, refresh_segment_sketches
+from amids.db import get_connection
+from amids.schema import migrate
+from backend.app.analytics import (
+    calculate_summary_statistics,
+    detect_anomalies_mad,
+    detect_anomalies_zscore,
+    monitor_kpis,
+    score_prediction,
+    score_prediction_batch,
+)
+from backend.app.analytics.risk_model import SCORE_CACHE
+from backend.app.schemas import PredictRequest
+from backend.app.services.dashboard_service import (
+    RESULT_CACHE,
+    get_dashboard_bundle,
+    get_kpi_dashboard,
+    get_kpi_status,
+    get_metric_quantiles,
+    get_performance_metrics,
+    get_segment_anomalies,
+    get_trend_analysis,
+)
+
+from .harness import Case
+
+WAREHOUSE_DAYS = 90
+# Share of injected outliers in the anomaly detector inputs.
+OUTLIER_RATE = 0.001
+
+
+def _revenue_values(size: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(mean=8.0, sigma=1.0, size=size)
+
+
+def _values_with_outliers(size: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = rng.normal(loc=1_000.0, scale=50.0, size=size)
+    outliers = rng.random(size) < OUTLIER_RATE
+    values[outliers] *= rng.choice([0.2, 5.0], size=int(outliers.sum()))
+    return values
+
+
+def _account_signals(size: int, seed: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return {
+        "events_last_7d": rng.integers(1, 200, size=size),
+        "active_minutes_last_7d": rng.integers(0, 2_000, size=size),
+        "error_rate": np.round(rng.random(size) * 0.3, 4),
+        "feedback_count_last_30d": rng.integers(0, 30, size=size),
+    }
+
+
+def _summary_statistics(size: int, seed: int):
+    values = _revenue_values(size, seed)
+    return lambda: calculate_summary_statistics(values)
+
+
+def _zscore(size: int, seed: int):
+    values = _values_with_outliers(size, seed)
+    return lambda: detect_anomalies_zscore(values)
+
+
+def _mad(size: int, seed: int):
+    values = _values_with_outliers(size, seed)
+    return lambda: detect_anomalies_mad(values)
+
+
+def _monitor_kpis(size: int, seed: int):
+    rng = np.random.default_rng(seed)
+    names = [f"kpi_{idx}" for idx in range(size)]
+    metrics = dict(zip(names, rng.normal(100.0, 25.0, size=size).tolist()))
+    thresholds = {name: (60.0, 140.0) for name in names}
+    return lambda: monitor_kpis(metrics, thresholds)
+
+
+def _score_prediction(size: int, seed: int):
+    signals = _account_signals(size, seed)
+    requests = [
+        PredictRequest(account_id=f"acct_{idx}", **dict(zip(signals, values)))
+        for idx, values in enumerate(zip(*(column.tolist() for column in signals.values())))
+    ]
+    return lambda: [score_prediction(req) for req in requests]
+
+
+def _score_prediction_batch(size: int, seed: int):
+    columns = {"account_id": [f"acct_{idx}" for idx in range(size)], **_account_signals(size, seed)}
+    return lambda: score_prediction_batch(columns)
+
+
+_warehouse: tuple[int, int] | None = None
+
+
+def build_warehouse(rows: int, seed: int) -> None:
+    """Replace the warehouse with ~`rows` seeded campaign rows and refresh its rollups."""
+    global _warehouse
+    if _warehouse == (rows, seed):
+        return
+    rng = np.random.default_rng(seed)
+    campaigns = max(1, rows // WAREHOUSE_DAYS)
+    n = campaigns * WAREHOUSE_DAYS
+    today = date.today()
+    dates = [(today - timedelta(days=offset)).isoformat() for offset in range(WAREHOUSE_DAYS)]
+    campaign_idx = np.repeat(np.arange(campaigns), WAREHOUSE_DAYS)
+    day_idx = np.tile(np.arange(WAREHOUSE_DAYS), campaigns)
+
+    impressions = rng.integers(5_000, 50_000, size=n)
+    clicks = (impressions * rng.uniform(0.01, 0.08, size=n)).astype(int)
+    spend = np.round(rng.uniform(200.0, 5_000.0, size=n), 2)
+    leads = (clicks * rng.uniform(0.05, 0.25, size=n)).astype(int)
+    opportunities = (leads * rng.uniform(0.1, 0.4, size=n)).astype(int)
+    signups = (opportunities * rng.uniform(0.3, 0.7, size=n)).astype(int)
+    revenue = np.round(signups * rng.uniform(50.0, 300.0, size=n), 2)
+
+    channels = [CHANNELS[idx % len(CHANNELS)] for idx in range(campaigns)]
+    regions = [REGIONS[(idx // len(CHANNELS)) % len(REGIONS)] for idx in range(campaigns)]
+    records = zip(
+        (dates[idx] for idx in day_idx.tolist()),
+        (f"bench_{idx}" for idx in campaign_idx.tolist()),
+        (channels[idx] for idx in campaign_idx.tolist()),
+        (regions[idx] for idx in campaign_idx.tolist()),
+        impressions.tolist(),
+        clicks.tolist(),
+        spend.tolist(),
+        leads.tolist(),
+        opportunities.tolist(),
+        signups.tolist(),
+        revenue.tolist(),
+    )
+
+    migrate()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("delete from campaign_performance_daily")
+        cur.executemany(
+            """
+            insert into campaign_performance_daily (
+                run_date, campaign_id, channel, region, impressions, clicks,
+                spend, leads, opportunities, signups, revenue
+            )
+            values (?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            records,
+        )
+        refresh_segment_rollup(cur, "")
+        refresh_segment_sketches(cur, "")
+    RESULT_CACHE.invalidate()
+    _warehouse = (rows, seed)
+
+
+def _dashboard(call):
+    def setup(size: int, seed: int):
+        build_warehouse(size, seed)
+        return call
+
+    return setup
+
+
+ANALYTICS_CASES = [
+    Case("summary_statistics", "analytics", _summary_statistics),
+    Case("detect_anomalies_zscore", "analytics", _zscore),
+    Case("detect_anomalies_mad", "analytics", _mad),
+    Case("monitor_kpis", "analytics", _monitor_kpis, max_size=10**4),
+    Case("score_prediction", "analytics", _score_prediction, max_size=10**5, reset=SCORE_CACHE.clear),
+    Case("score_prediction_cached", "analytics", _score_prediction, max_size=10**5),
+    Case("score_prediction_batch", "analytics", _score_prediction_batch, max_size=10**5),
+]
+
+DASHBOARD_CASES = [
+    Case(name, "dashboard", _dashboard(call), max_size=10**6, reset=RESULT_CACHE.invalidate)
+    for name, call in (
+        ("kpi_dashboard", lambda: get_kpi_dashboard(days=WAREHOUSE_DAYS)),
+        ("trend_analysis", lambda: get_trend_analysis(days=WAREHOUSE_DAYS)),
+        ("performance_metrics", lambda: get_performance_metrics(days=WAREHOUSE_DAYS)),
+        ("segment_anomalies", lambda: get_segment_anomalies(days=WAREHOUSE_DAYS, granularity="campaign")),
+        ("metric_quantiles", lambda: get_metric_quantiles(days=WAREHOUSE_DAYS, by_segment=True)),
+        ("kpi_status", lambda: get_kpi_status(days=WAREHOUSE_DAYS, granularity="campaign")),
+        ("dashboard_bundle", lambda: get_dashboard_bundle(days=WAREHOUSE_DAYS)),
+    )
+]
+
+# Pipeline agents against the same warehouse; campaign granularity scores size / WAREHOUSE_DAYS series.
+AGENT_CASES = [
+    Case(
+        "anomaly_agent_campaigns",
+        "agents",
+        _dashboard(lambda: anomaly_agent.run(date.today(), granularity="campaign")),
+        max_size=10**6,
+    ),
+]
+
+CASES = ANALYTICS_CASES + DASHBOARD_CASES + AGENT_CASES
@@ -0,0 +1,182 @@
+"""
+Timing, memory and baseline comparison for benchmark cases.
+
+A case is measured in two passes: a timed pass (garbage collector disabled,
+repeated until ``max_repeat`` samples or until at least ``min_repeat`` samples
+and ``budget`` seconds) and a single pass under ``tracemalloc`` for the peak
+allocation. Setup work (input generation, warehouse loading) is outside both.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class Case:
+    """
+    One benchmarked operation.
+
+    `setup(size, seed)` builds the inputs and returns the zero-argument
+    workload to time; `size` is the number of values (or rows) it processes.
+    `reset`, when given, runs before every call without being timed, e.g. to
+    drop caches so each call does the full work.
+    """
+
+    name: str
+    group: str
+    setup: Callable[[int, int], Callable[[], object]]
+    max_size: int = 10**7
+    reset: Callable[[], None] | None = None
+
+
+def measure(
+    case: Case,
+    size: int,
+    seed: int = 7,
+    min_repeat: int = 3,
+    max_repeat: int = 30,
+    budget: float = 1.0,
+) -> dict:
+    workload = case.setup(size, seed)
+    reset = case.reset or (lambda: None)
+
+    reset()
+    workload()  # warm-up: imports, lazy compilation, page cache
+
+    samples: list[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(samples) < max_repeat:
+            reset()
+            t0 = time.perf_counter()
+            workload()
+            samples.append(time.perf_counter() - t0)
+            if len(samples) >= min_repeat and time.perf_counter() - started >= budget:
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    reset()
+    tracemalloc.start()
+    try:
+        workload()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = np.array(samples)
+    latency = {f"p{q}": float(np.percentile(seconds, q)) * 1e3 for q in PERCENTILES}
+    median = float(np.median(seconds))
+    return {
+        "case": case.name,
+        "group": case.group,
+        "size": size,
+        "samples": len(samples),
+        "throughput_per_s": size / median if median > 0 else None,
+        "latency_ms": {
+            "min": float(seconds.min()) * 1e3,
+            **latency,
+            "max": float(seconds.max()) * 1e3,
+            "mean": float(seconds.mean()) * 1e3,
+        },
+        "peak_memory_bytes": int(peak),
+    }
+
+
+def run(
+    cases: Iterable[Case],
+    sizes: Iterable[int],
+    seed: int = 7,
+    progress: Callable[[dict], None] | None = None,
+    **options,
+) -> dict:
+    """Measure every case at every size up to its `max_size`."""
+    results = []
+    for size in sorted(set(sizes)):
+        for case in cases:
+            if size > case.max_size:
+                continue
+            result = measure(case, size, seed=seed, **options)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict,
+    current: dict,
+    tolerance: float = 0.25,
+    memory_tolerance: float = 0.25,
+    noise_floor_ms: float = 0.05,
+) -> list[dict]:
+    """
+    Compare each (case, size) present in both reports.
+
+    A result regresses when its median latency exceeds the baseline's by more
+    than `tolerance` (a fraction) and by more than `noise_floor_ms`, or when
+    its peak memory exceeds the baseline's by more than `memory_tolerance`.
+    """
+    previous = {(item["case"], item["size"]): item for item in baseline.get("results", [])}
+    findings = []
+    for item in current.get("results", []):
+        base = previous.get((item["case"], item["size"]))
+        if base is None:
+            continue
+        base_ms = base["latency_ms"]["p50"]
+        current_ms = item["latency_ms"]["p50"]
+        latency_ratio = current_ms / base_ms if base_ms > 0 else 1.0
+        base_peak = base["peak_memory_bytes"]
+        memory_ratio = item["peak_memory_bytes"] / base_peak if base_peak > 0 else 1.0
+        slower = latency_ratio > 1.0 + tolerance and current_ms - base_ms > noise_floor_ms
+        heavier = memory_ratio > 1.0 + memory_tolerance
+        findings.append(
+            {
+                "case": item["case"],
+                "size": item["size"],
+                "baseline_p50_ms": base_ms,
+                "p50_ms": current_ms,
+                "latency_ratio": round(latency_ratio, 4),
+                "memory_ratio": round(memory_ratio, 4),
+                "regressed": slower or heavier,
+            }
+        )
+    return findings
+
+
+def load_report(path: Path) -> dict:
+    with Path(path).open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_report(report: dict, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+        handle.write("\n")
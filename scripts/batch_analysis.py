@@ -16,8 +16,8 @@ from backend.app.analytics.metrics import (  # noqa: E402
     calculate_summary_statistics,
     detect_anomalies_mad,
     detect_anomalies_zscore,
-    monitor_kpis,
 )
+from amids.rules import load_rule_set  # noqa: E402
 
 DB_PATH = ROOT / "amids" / "amids.db"
 FEATURE_PATH = ROOT / "data" / "engineered_campaign_features.csv"
@@ -33,9 +33,9 @@ def load_feature_data() -> pd.DataFrame:
 
 
 def run_batch_analysis(df: pd.DataFrame) -> dict:
-    roi_values = df.get("roi", pd.Series(dtype=float)).dropna().tolist()
-    revenue_values = df.get("revenue", pd.Series(dtype=float)).dropna().tolist()
-    spend_values = df.get("spend", pd.Series(dtype=float)).dropna().tolist()
+    roi_values = df.get("roi", pd.Series(dtype=float)).dropna().to_numpy()
+    revenue_values = df.get("revenue", pd.Series(dtype=float)).dropna().to_numpy()
+    spend_values = df.get("spend", pd.Series(dtype=float)).dropna().to_numpy()
 
     zscore_anomalies = detect_anomalies_zscore(revenue_values, threshold=2.2)
     mad_anomalies = detect_anomalies_mad(revenue_values, threshold=3.2)
@@ -45,17 +45,12 @@ def run_batch_analysis(df: pd.DataFrame) -> dict:
         "spend": calculate_summary_statistics(spend_values),
         "roi": calculate_summary_statistics(roi_values),
     }
-    kpi_monitor = monitor_kpis(
-        metrics={
+    kpi_monitor = load_rule_set().summary_statuses(
+        {
             "avg_revenue": summary["revenue"]["mean"] or 0.0,
             "avg_spend": summary["spend"]["mean"] or 0.0,
             "avg_roi": summary["roi"]["mean"] or 0.0,
-        },
-        thresholds={
-            "avg_revenue": (10_000.0, None),
-            "avg_spend": (None, 45_000.0),
-            "avg_roi": (1.2, None),
-        },
+        }
     )
 
     by_channel = (
@@ -1,7 +1,22 @@
 from pathlib import Path
+import os
 import sys
+import tempfile
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
+
+# Keep test writes out of the checked-in data directory.
+TEST_DATA_DIR = Path(tempfile.mkdtemp(prefix="cittaai-tests-"))
+os.environ.setdefault("CITTAAI_LOG_DB_PATH", str(TEST_DATA_DIR / "activity_log.db"))
+os.environ.setdefault("AMIDS_DB_PATH", str(TEST_DATA_DIR / "amids.db"))
+
+from amids.config import settings  # noqa: E402  (reads AMIDS_DB_PATH set above)
+
+# Pipeline runs write logs, executive summaries and the dashboard refresh marker.
+for _name in ("log_dir", "reports_dir", "dashboard_dir"):
+    _path = TEST_DATA_DIR / _name.removesuffix("_dir")
+    _path.mkdir()
+    setattr(settings, _name, _path)
@@ -1,10 +1,77 @@
+from datetime import datetime, timedelta, timezone
+import json
+import random
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
 
-from backend.app.analytics.metrics import calculate_summary_statistics, detect_anomalies_zscore
+from amids.agents import data_agent, monitoring_agent
+from amids.config import settings
+from amids.connections import get_manager
+from amids.db import get_connection
+from amids.schema import migrate
+from amids.segment_metrics import derive_metrics
+
+from backend.app.analytics.metrics import (
+    calculate_summary_statistics,
+    detect_anomalies_mad,
+    detect_anomalies_zscore,
+    mad_mask,
+    rowwise_mad_mask,
+    rowwise_zscore_mask,
+)
+from backend.app.analytics import risk_model
+from backend.app.analytics.risk_model import score_prediction, score_prediction_batch
 from backend.app.main import app
+from backend.app.schemas import PredictRequest
+from backend.app.services import dashboard_service
+from backend.app.services.result_cache import VersionedResultCache
 
 
 client = TestClient(app)
+AS_OF = datetime.now(timezone.utc).date() - timedelta(days=1)
+# Campaign ids rotate with the date; these are the ones active on AS_OF.
+OUTLIER_CAMPAIGN = f"paid_search_EMEA_{AS_OF.toordinal() % 5}"
+# Its leads collapse on the last day, a cac_spike breach for the email/NA segment.
+CAC_SPIKE_CAMPAIGN = f"email_NA_{AS_OF.toordinal() % 5}"
+
+
+@pytest.fixture(scope="module")
+def seeded_warehouse(tmp_path_factory):
+    """
+    A separate warehouse holding a month of simulated campaign data ending
+    yesterday (UTC), inside the dashboards' `date('now', ...)` windows, with
+    an injected revenue outlier and CAC spike. Returns the last day.
+    """
+    as_of = AS_OF
+    day = as_of.isoformat()
+    path = tmp_path_factory.mktemp("seeded") / "amids.db"
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "db_path", path)
+        patch.setattr(dashboard_service, "AMIDS_DB_PATH", path)
+        migrate()
+        random.seed(2026)
+        data_agent.run(as_of)
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "update campaign_performance_daily set revenue = revenue + 100000 where run_date = ? and campaign_id = ?",
+                (day, OUTLIER_CAMPAIGN),
+            )
+            cur.execute(
+                "update campaign_performance_daily set leads = 1 where run_date = ? and campaign_id = ?",
+                (day, CAC_SPIKE_CAMPAIGN),
+            )
+            data_agent.refresh_segment_rollup(cur, day, day)
+            data_agent.refresh_segment_sketches(cur, day, day)
+        monitoring_agent.run(as_of)
+        dashboard_service.RESULT_CACHE.invalidate()
+        yield as_of
+    get_manager(path).close()
+    dashboard_service.RESULT_CACHE.invalidate()
 
 
 def test_predict_response_contains_risk_factors():
@@ -34,6 +101,90 @@ def test_dashboard_endpoints():
         assert "window_days" in res.json()
 
 
+def test_trend_windows_are_configurable():
+    body = client.get("/api/dashboard/trends", params={"windows": [14, 7], "ewma_span": 10}).json()
+    assert body["moving_average_windows"] == [7, 14]
+    assert body["ewma_span"] == 10
+    for row in body["trends"]:
+        assert {"revenue_ma7", "revenue_ma14", "revenue_ewma10"} <= set(row)
+    assert client.get("/api/dashboard/trends", params={"windows": 1}).status_code == 422
+
+
+def test_dashboard_bundle_matches_individual_endpoints():
+    res = client.get("/api/dashboard/bundle", params={"days": 30})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["kpis"] == client.get("/api/dashboard/kpis").json()
+    assert body["trends"] == client.get("/api/dashboard/trends").json()
+    assert body["performance"] == client.get("/api/dashboard/performance").json()
+    assert "prediction_count" in body["metrics"]
+
+    partial = client.get("/api/dashboard/bundle", params={"sections": "trends"}).json()
+    assert set(partial) == {"window_days", "data_version", "trends"}
+    assert client.get("/api/dashboard/bundle", params={"sections": "bogus"}).status_code == 422
+
+
+def test_dashboard_and_metrics_support_conditional_get():
+    for path in ["/api/dashboard/kpis", "/api/dashboard/bundle", "/api/metrics"]:
+        first = client.get(path)
+        etag = first.headers["etag"]
+        assert etag.startswith('"')
+
+        cached = client.get(path, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        other = client.get(path, headers={"If-None-Match": '"stale"'})
+        assert other.status_code == 200
+
+
+def test_stale_dashboard_result_is_served_with_its_own_etag(monkeypatch):
+    version = {"value": ("run", 1, "2026-03-30 06:00:00")}
+    cache = VersionedResultCache(lambda: version["value"], version_check_interval=0.0)
+    monkeypatch.setattr(dashboard_service, "RESULT_CACHE", cache)
+
+    first = client.get("/api/dashboard/kpis")
+    version["value"] = ("run", 2, "2026-03-31 06:00:00")
+    stale = client.get("/api/dashboard/kpis")  # served from the old entry while it refreshes
+    assert stale.status_code == 200
+    assert stale.headers["etag"] == first.headers["etag"]
+    assert stale.headers["last-modified"] == first.headers["last-modified"]
+
+    deadline = time.monotonic() + 2.0
+    fresh = client.get("/api/dashboard/kpis", headers={"If-None-Match": first.headers["etag"]})
+    while fresh.headers["etag"] == first.headers["etag"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+        fresh = client.get("/api/dashboard/kpis", headers={"If-None-Match": first.headers["etag"]})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != first.headers["etag"]
+    assert client.get("/api/dashboard/kpis", headers={"If-None-Match": fresh.headers["etag"]}).status_code == 304
+
+
+def test_dashboard_getters_return_results_and_versioned_variants_add_the_version():
+    version, bundle = dashboard_service.get_dashboard_bundle_versioned(days=30, sections=("kpis",))
+    assert bundle["data_version"] == list(version)
+    assert dashboard_service.get_dashboard_bundle(days=30, sections=("kpis",)) == bundle
+    version, kpis = dashboard_service.get_kpi_dashboard_versioned(days=30)
+    assert isinstance(kpis, dict) and version == dashboard_service.warehouse_version()
+    assert dashboard_service.get_kpi_dashboard(days=30) == kpis
+    assert dashboard_service.get_kpi_status(days=30) == dashboard_service.get_kpi_status_versioned(days=30)[1]
+
+
+def test_metrics_etag_changes_after_feedback():
+    etag = client.get("/api/metrics").headers["etag"]
+    client.post(
+        "/api/feedback",
+        json={
+            "user_id": "u_etag",
+            "feature": "insight_dashboard",
+            "sentiment": "negative",
+            "severity": "high",
+            "message": "Metrics should refresh",
+        },
+    )
+    assert client.get("/api/metrics", headers={"If-None-Match": etag}).status_code == 200
+
+
 def test_summary_statistics_helpers():
     stats = calculate_summary_statistics([10, 20, 30, 40])
     assert stats["mean"] == 25.0
@@ -42,3 +193,182 @@ def test_summary_statistics_helpers():
 
     anomalies = detect_anomalies_zscore([10, 11, 12, 13, 200], threshold=1.7)
     assert anomalies
+
+
+def test_statistics_accept_arrays_and_series():
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 150.0]
+    expected = calculate_summary_statistics(values)
+    assert calculate_summary_statistics(np.array(values)) == expected
+    assert calculate_summary_statistics(pd.Series(values)) == expected
+    assert expected["median"] == 4.0
+    assert calculate_summary_statistics(np.array([]))["mean"] is None
+
+    scores, mask = mad_mask(np.array(values), threshold=3.5)
+    assert scores.shape == mask.shape == (len(values),)
+    assert np.flatnonzero(mask).tolist() == [8]
+    assert [hit["index"] for hit in detect_anomalies_mad(pd.Series(values))] == [8]
+
+
+def test_batch_scoring_matches_single_scoring():
+    requests = [
+        PredictRequest(
+            account_id=f"acct_{idx}",
+            events_last_7d=(idx * 7) % 60,
+            active_minutes_last_7d=(idx * 53) % 600,
+            error_rate=((idx * 13) % 30) / 100,
+            feedback_count_last_30d=1 + (idx * 5) % 20,
+        )
+        for idx in range(200)
+    ]
+    columns = {
+        name: [getattr(req, name) for req in requests]
+        for name in PredictRequest.model_fields
+    }
+    batch = score_prediction_batch(columns)
+    assert batch == [score_prediction(req).model_dump() for req in requests]
+
+
+def test_segment_anomaly_scan_ranks_hits(seeded_warehouse):
+    res = client.get(
+        "/api/dashboard/anomalies",
+        params={"metrics": ["revenue", "cac"], "granularity": "campaign", "limit": 5},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["metrics"] == ["revenue", "cac"]
+    assert body["series_count"] == 60
+    assert 1 <= len(body["anomalies"]) <= 5
+    top = body["anomalies"][0]
+    assert (top["run_date"], top["campaign_id"], top["metric"], top["method"]) == (
+        seeded_warehouse.isoformat(),
+        OUTLIER_CAMPAIGN,
+        "revenue",
+        "mad",
+    )
+    scores = [abs(hit["score"]) for hit in body["anomalies"]]
+    assert scores == sorted(scores, reverse=True)
+    assert client.get("/api/dashboard/anomalies", params={"metrics": "bogus"}).status_code == 422
+
+
+def test_rowwise_masks_score_each_series_independently():
+    matrix = np.array(
+        [
+            [10.0, 11.0, 9.0, 10.0, 10.5, 80.0],
+            [100.0, np.nan, 101.0, 99.0, 100.0, 100.5],
+            [5.0, 5.0, np.nan, np.nan, np.nan, np.nan],
+        ]
+    )
+    z_scores, z_mask = rowwise_zscore_mask(matrix, threshold=2.0)
+    mad_scores, mad_mask_2d = rowwise_mad_mask(matrix, threshold=3.5)
+    assert z_mask.tolist()[0] == [False] * 5 + [True]
+    assert not z_mask[1:].any()
+    assert np.isnan(z_scores[1, 1])
+    assert mad_mask_2d[0, 5] and not mad_mask_2d[1:].any()
+    assert np.allclose(mad_scores[2, :2], 0.0)
+
+
+def test_metric_quantiles_endpoint(seeded_warehouse):
+    res = client.get("/api/dashboard/quantiles", params={"metrics": ["revenue", "cac"], "days": 90})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["window_days"] == 90
+    assert [entry["metric"] for entry in body["quantiles"]] == ["revenue", "cac"]
+
+    with get_connection() as conn:
+        counters = conn.execute(
+            "select impressions, clicks, leads, spend, revenue from campaign_performance_daily"
+        ).fetchall()
+    exact = derive_metrics(np.array(counters))
+    for entry in body["quantiles"]:
+        values = np.sort(exact[entry["metric"]][~np.isnan(exact[entry["metric"]])])
+        assert entry["count"] == values.size
+        assert (entry["min"], entry["max"]) == (round(values[0], 4), round(values[-1], 4))
+        assert entry["median"] <= entry["p90"] <= entry["p99"] <= entry["max"]
+        # Each estimate lies within the sketch's rank error of the exact quantile.
+        tolerance = entry["rank_error"] + 1 / values.size
+        for fraction, name in ((0.5, "median"), (0.9, "p90"), (0.99, "p99")):
+            below = np.searchsorted(values, entry[name] - 1e-4, side="left") / values.size
+            at_or_below = np.searchsorted(values, entry[name] + 1e-4, side="right") / values.size
+            assert below - tolerance <= fraction <= at_or_below + tolerance
+
+
+def test_score_cache_reuses_results_and_tracks_weights(monkeypatch):
+    signals = {
+        "events_last_7d": 17,
+        "active_minutes_last_7d": 95,
+        "error_rate": 0.09,
+        "feedback_count_last_30d": 4,
+    }
+    risk_model.SCORE_CACHE.clear()
+    before = risk_model.score_cache_stats()
+    first = score_prediction(PredictRequest(account_id="acct_a", **signals))
+    second = score_prediction(PredictRequest(account_id="acct_b", **signals))
+    stats = risk_model.score_cache_stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+    assert second.account_id == "acct_b"
+    assert {**first.model_dump(), "account_id": "acct_b"} == second.model_dump()
+    assert risk_model.score_prediction_row(PredictRequest(account_id="acct_b", **signals)) == second.model_dump()
+
+    # Cache hits share no mutable state between responses.
+    row_a = risk_model.score_prediction_row(PredictRequest(account_id="acct_a", **signals))
+    row_b = risk_model.score_prediction_row(PredictRequest(account_id="acct_b", **signals))
+    row_a["risk_factors"][0]["weight"] = -1.0
+    row_a["recommended_actions"].append("mutated")
+    first.risk_factors[0].weight = -1.0
+    first.recommended_actions.clear()
+    assert {**row_b, "account_id": "acct_b"} == second.model_dump()
+    assert score_prediction(PredictRequest(account_id="acct_b", **signals)).model_dump() == second.model_dump()
+
+    monkeypatch.setitem(risk_model.WEIGHTS, "engagement_drop", 0.70)
+    reweighted = score_prediction(PredictRequest(account_id="acct_a", **signals))
+    assert reweighted.risk_score != first.risk_score
+    assert risk_model.score_cache_stats()["misses"] == stats["misses"] + 1
+    assert client.get("/api/metrics/runtime").json()["score_cache"]["entries"] >= 2
+
+
+def test_kpi_status_endpoint_returns_status_matrix(seeded_warehouse):
+    day = seeded_warehouse.isoformat()
+    res = client.get("/api/dashboard/kpi-status")
+    assert res.status_code == 200
+    body = res.json()
+    assert len(body["series"]) == 12
+    assert body["dates"][-1] == day
+    assert len(body["status"]) == len(body["series"])
+    assert all(len(row) == len(body["dates"]) for row in body["status"])
+
+    # The latest column matches what monitoring_agent stored for the day.
+    labels = {code: label for label, code in body["status_codes"].items()}
+    latest = {
+        (series["channel"], series["region"]): labels[row[-1]]
+        for series, row in zip(body["series"], body["status"])
+    }
+    with get_connection() as conn:
+        stored = conn.execute(
+            "select channel, region, status, breached_rules from kpi_rule_status where run_date = ?", (day,)
+        ).fetchall()
+    assert latest == {(channel, region): status for channel, region, status, _ in stored}
+    assert sum(body["latest_status_counts"].values()) == 12
+
+    breached = {(channel, region): json.loads(rules) for channel, region, _, rules in stored}
+    assert latest[("email", "NA")] == "critical"
+    assert "cac_spike" in breached[("email", "NA")]
+    assert (day, "email", "NA", "cac_spike") in {
+        (breach["run_date"], breach["channel"], breach["region"], breach["rule"]) for breach in body["breaches"]
+    }
+
+    params = {"granularity": "campaign"}
+    res = client.get("/api/dashboard/kpi-status", params=params)
+    assert res.status_code == 200
+    assert len(res.json()["series"]) == 60
+    cached = client.get("/api/dashboard/kpi-status", params=params, headers={"If-None-Match": res.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_pipeline_report_endpoint():
+    res = client.get("/api/pipeline/report", params={"runs": 3})
+    assert res.status_code == 200
+    body = res.json()
+    assert set(body) >= {"runs", "agents", "slowest", "regressions"}
+    assert len(body["runs"]) <= 3
+    assert client.get("/api/pipeline/report", params={"runs": 0}).status_code == 422
@@ -1,5 +1,7 @@
-﻿from fastapi.testclient import TestClient
+﻿import numpy as np
+from fastapi.testclient import TestClient
 
+from backend.app.api.responses import FastJSONResponse
 from backend.app.main import app
 
 
@@ -28,6 +30,41 @@ def test_predict():
     assert 0 <= body["risk_score"] <= 100
 
 
+def test_predict_batch_rows_and_columns():
+    rows = [
+        {
+            "account_id": f"acct_{idx}",
+            "events_last_7d": idx * 3,
+            "active_minutes_last_7d": 40 + idx * 20,
+            "error_rate": 0.05 * idx,
+            "feedback_count_last_30d": idx,
+        }
+        for idx in range(1, 5)
+    ]
+    by_rows = client.post("/api/predict/batch", json={"rows": rows})
+    assert by_rows.status_code == 200
+    assert by_rows.json()["count"] == 4
+
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    by_columns = client.post("/api/predict/batch", json={"columns": columns})
+    assert by_columns.status_code == 200
+    assert [p["risk_score"] for p in by_columns.json()["predictions"]] == [
+        p["risk_score"] for p in by_rows.json()["predictions"]
+    ]
+
+    columns["error_rate"] = columns["error_rate"][:2]
+    assert client.post("/api/predict/batch", json={"columns": columns}).status_code == 422
+
+
+def test_row_and_column_batches_validate_account_ids_alike():
+    signals = {"events_last_7d": 5, "active_minutes_last_7d": 30, "error_rate": 0.1, "feedback_count_last_30d": 1}
+    for account_id, status in ((" a ", 200), ("x" * 65, 422), ("a", 422)):
+        row = {"account_id": account_id, **signals}
+        columns = {name: [value] for name, value in row.items()}
+        assert client.post("/api/predict/batch", json={"rows": [row]}).status_code == status
+        assert client.post("/api/predict/batch", json={"columns": columns}).status_code == status
+
+
 def test_feedback_roundtrip():
     payload = {
         "user_id": "u_test",
@@ -43,3 +80,9 @@ def test_feedback_roundtrip():
     assert get_res.status_code == 200
     rows = get_res.json()
     assert any(r["user_id"] == "u_test" for r in rows)
+
+
+def test_fast_json_response_encodes_numpy_payloads():
+    res = FastJSONResponse({"series": np.array([1.5, 2.0]), "count": np.int64(2)})
+    assert res.body == b'{"series":[1.5,2.0],"count":2}'
+    assert res.media_type == "application/json"
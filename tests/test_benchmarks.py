@@ -0,0 +1,36 @@
+from benchmarks import harness
+from benchmarks.cases import ANALYTICS_CASES
+
+
+def test_harness_reports_latency_throughput_and_memory():
+    cases = [case for case in ANALYTICS_CASES if case.name in ("summary_statistics", "monitor_kpis")]
+    report = harness.run(cases, [1_000, 10**8], min_repeat=2, max_repeat=2, budget=0.0)
+
+    # Sizes above a case's max_size are skipped.
+    assert [(item["case"], item["size"]) for item in report["results"]] == [
+        ("summary_statistics", 1_000),
+        ("monitor_kpis", 1_000),
+    ]
+    result = report["results"][0]
+    assert result["samples"] == 2
+    assert result["throughput_per_s"] > 0
+    assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"] <= result["latency_ms"]["max"]
+    assert result["peak_memory_bytes"] > 0
+    assert report["meta"]["seed"] == 7
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    def report(p50_ms: float, peak: int) -> dict:
+        return {
+            "results": [
+                {"case": "summary_statistics", "size": 1_000, "latency_ms": {"p50": p50_ms}, "peak_memory_bytes": peak}
+            ]
+        }
+
+    baseline = report(10.0, 1_000)
+    assert not harness.compare(baseline, report(12.0, 1_100), tolerance=0.25)[0]["regressed"]
+    assert harness.compare(baseline, report(13.0, 1_000), tolerance=0.25)[0]["regressed"]
+    assert harness.compare(baseline, report(10.0, 2_000), memory_tolerance=0.25)[0]["regressed"]
+    # Sub-noise-floor slowdowns on tiny timings are not regressions.
+    assert not harness.compare(report(0.01, 1_000), report(0.03, 1_000))[0]["regressed"]
+    assert harness.compare(baseline, {"results": []}) == []
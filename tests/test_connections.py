@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+
+from amids.connections import ConnectionManager, RowCounters, row_counters
+
+
+def test_writer_and_pooled_readers_share_tuned_connections(tmp_path):
+    manager = ConnectionManager(tmp_path / "warehouse.db")
+    with manager.write() as conn:
+        conn.execute("create table t (x integer)")
+        conn.execute("insert into t values (1)")
+        assert conn.execute("pragma journal_mode").fetchone()[0] == "wal"
+
+    with manager.read() as first:
+        assert first.execute("select count(*) from t").fetchone()[0] == 1
+        assert first.execute("pragma temp_store").fetchone()[0] == 2
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("insert into t values (2)")
+    with manager.read() as second:
+        assert second is first
+    # Unmeasured readers (the API pool) are plain connections without per-row overhead.
+    assert type(first) is sqlite3.Connection
+
+    with pytest.raises(RuntimeError):
+        with manager.write() as conn:
+            conn.execute("insert into t values (3)")
+            raise RuntimeError("boom")
+    with manager.read() as conn:
+        assert conn.execute("select count(*) from t").fetchone()[0] == 1
+    manager.close()
+
+
+def test_bound_row_counters_count_fetched_and_changed_rows(tmp_path):
+    manager = ConnectionManager(tmp_path / "warehouse.db")
+    with manager.write() as conn:
+        conn.execute("create table t (x integer)")
+
+    counters = RowCounters()
+    token = row_counters.set(counters)
+    try:
+        with manager.write() as conn:
+            conn.executemany("insert into t values (?)", [(i,) for i in range(5)])
+            conn.execute("delete from t where x = 0")
+        with manager.read() as conn:
+            conn.execute("select x from t").fetchall()
+            cur = conn.cursor()
+            cur.execute("select x from t order by x")
+            assert cur.fetchone() == (1,)
+            assert list(cur) == [(2,), (3,), (4,)]
+    finally:
+        row_counters.reset(token)
+    assert (counters.read, counters.written) == (8, 6)
+
+    with manager.read() as conn:
+        conn.execute("select x from t").fetchall()
+        assert type(conn.cursor()) is sqlite3.Cursor
+    with manager.write() as conn:
+        assert type(conn.cursor()) is sqlite3.Cursor
+    assert counters.read == 8
+    manager.close()
@@ -0,0 +1,69 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.services import flush_pending_writes
+
+
+client = TestClient(app)
+
+
+def _submit_feedback(idx: int, severity: str) -> None:
+    res = client.post(
+        "/api/feedback",
+        json={
+            "user_id": f"u_page_{idx}",
+            "feature": "history_paging",
+            "sentiment": "neutral",
+            "severity": severity,
+            "message": f"Paging feedback {idx}",
+        },
+    )
+    assert res.status_code == 200
+
+
+def test_feedback_history_pages_with_cursor_and_filters():
+    for idx in range(5):
+        _submit_feedback(idx, "high" if idx % 2 else "low")
+
+    params = {"feature": "history_paging", "limit": 2}
+    first = client.get("/api/history/feedback", params=params).json()
+    assert [row["user_id"] for row in first["items"]] == ["u_page_4", "u_page_3"]
+
+    second = client.get(
+        "/api/history/feedback", params={**params, "cursor": first["next_cursor"]}
+    ).json()
+    assert [row["user_id"] for row in second["items"]] == ["u_page_2", "u_page_1"]
+
+    high = client.get(
+        "/api/history/feedback", params={"feature": "history_paging", "severity": "high"}
+    ).json()
+    assert {row["user_id"] for row in high["items"]} == {"u_page_1", "u_page_3"}
+
+    assert client.get("/api/history/feedback", params={"cursor": "%%%"}).status_code == 422
+
+
+def test_prediction_history_streams_ndjson():
+    for idx in range(3):
+        client.post(
+            "/api/predict",
+            json={
+                "account_id": "acct_stream",
+                "events_last_7d": 5 + idx,
+                "active_minutes_last_7d": 100,
+                "error_rate": 0.05,
+                "feedback_count_last_30d": 2,
+            },
+        )
+    flush_pending_writes()
+
+    res = client.get(
+        "/api/history/predictions",
+        params={"account_id": "acct_stream", "format": "ndjson"},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert len(rows) == 3
+    assert all(row["account_id"] == "acct_stream" for row in rows)
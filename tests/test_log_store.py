@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+import sqlite3
+import time
+
+from backend.app.analytics import calculate_summary_statistics
+from backend.app.services import log_store, storage_service
+
+
+def test_appends_are_newest_first_and_keep_history():
+    for idx in range(3):
+        storage_service.append_prediction({"account_id": f"acct_hist_{idx}", "risk_score": idx})
+
+    rows = storage_service.load_predictions(limit=3)
+    assert [row["account_id"] for row in rows] == ["acct_hist_2", "acct_hist_1", "acct_hist_0"]
+    assert all("created_at" in row and "id" in row for row in rows)
+
+
+def test_legacy_feedback_is_imported_once():
+    seeded = [row for row in storage_service.load_feedback() if row["id"] == "fb001"]
+    assert len(seeded) == 1
+
+
+def test_prune_respects_retention(monkeypatch):
+    log_store.append_feedback(
+        [
+            {
+                "id": "old00001",
+                "created_at": "2000-01-01T00:00:00+00:00",
+                "user_id": "u_old",
+                "feature": "retention",
+                "sentiment": "neutral",
+                "severity": "low",
+                "message": "Old feedback",
+            }
+        ]
+    )
+    monkeypatch.setattr(log_store, "FEEDBACK_RETENTION_DAYS", 30)
+    with log_store.connect() as conn:
+        removed = log_store.prune(conn, now=datetime(2000, 2, 15, tzinfo=timezone.utc))
+    assert removed["feedback"] == 1
+    assert all(row["id"] != "old00001" for row in storage_service.load_feedback())
+
+
+
+def test_first_prune_runs_however_long_the_host_has_been_up(monkeypatch):
+    pruned: list[sqlite3.Connection] = []
+    monkeypatch.setattr(log_store, "prune", pruned.append)
+    monkeypatch.setattr(log_store, "_last_prune", float("-inf"))  # never pruned in this process
+    # An interval longer than the current uptime, as on a host booted minutes ago.
+    monkeypatch.setattr(log_store, "PRUNE_INTERVAL_SECONDS", time.monotonic() + 3_600)
+    with log_store.connect() as conn:
+        log_store._maybe_prune(conn)
+        log_store._maybe_prune(conn)
+    assert len(pruned) == 1
+
+def test_running_aggregates_match_full_recompute():
+    storage_service.append_predictions(
+        [{"account_id": f"acct_agg_{score}", "risk_score": score} for score in (12, 55, 55, 91)]
+    )
+    metrics = storage_service.compute_metrics()
+    predictions = storage_service.load_predictions()
+    feedback = storage_service.load_feedback()
+    expected = calculate_summary_statistics([row["risk_score"] for row in predictions])
+
+    assert metrics["prediction_count"] == len(predictions)
+    assert metrics["feedback_total"] == len(feedback)
+    assert metrics["feedback_negative"] == sum(1 for row in feedback if row["sentiment"] == "negative")
+    assert metrics["risk_score_mean"] == expected["mean"]
+    assert metrics["risk_score_median"] == expected["median"]
+    assert abs(metrics["risk_score_variance"] - expected["variance"]) < 1e-3
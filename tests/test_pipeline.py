@@ -0,0 +1,345 @@
+from datetime import date
+import json
+import mmap
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from amids import main_orchestrator
+from amids.agents import (
+    anomaly_agent,
+    data_agent,
+    forecast_agent,
+    kpi_agent,
+    monitoring_agent,
+    rootcause_agent,
+    validation_agent,
+)
+from amids.dag import Node, dependencies, execute
+from amids.db import get_connection
+from amids.schema import migrate
+from amids.sketches import QuantileSketch
+from amids.config import settings
+from amids.telemetry import format_report, measure, run_report
+
+
+RUN_DATE = date(2026, 3, 31)
+
+
+def _prepare_warehouse() -> None:
+    migrate()
+    data_agent.run(RUN_DATE)
+
+
+def test_data_agent_maintains_segment_rollup():
+    _prepare_warehouse()
+    with get_connection() as conn:
+        raw = conn.execute(
+            """
+            select run_date, channel, region, count(*), sum(clicks), sum(revenue)
+            from campaign_performance_daily
+            group by run_date, channel, region
+            order by run_date, channel, region
+            """
+        ).fetchall()
+        rollup = conn.execute(
+            """
+            select run_date, channel, region, campaign_count, clicks, revenue
+            from campaign_daily_segment
+            order by run_date, channel, region
+            """
+        ).fetchall()
+    assert rollup == raw
+    assert rollup
+
+
+def test_data_agent_persists_segment_sketches():
+    _prepare_warehouse()
+    with get_connection() as conn:
+        raw_count = conn.execute("select count(*) from campaign_performance_daily").fetchone()[0]
+        rows = conn.execute(
+            "select value_count, sketch from segment_metric_sketch where metric = 'revenue'"
+        ).fetchall()
+    assert sum(count for count, _ in rows) == raw_count
+    assert all(QuantileSketch.from_bytes(blob).n == count for count, blob in rows)
+
+
+def test_monitoring_agent_stores_rule_status_per_segment_and_campaign():
+    _prepare_warehouse()
+    monitoring_agent.run(RUN_DATE)
+    with get_connection() as conn:
+        segments = conn.execute(
+            "select count(*) from campaign_daily_segment where run_date = ?", (RUN_DATE.isoformat(),)
+        ).fetchone()[0]
+        campaigns = conn.execute(
+            "select count(distinct campaign_id) from campaign_performance_daily where run_date = ?",
+            (RUN_DATE.isoformat(),),
+        ).fetchone()[0]
+        rows = conn.execute(
+            "select status, breached_rules from kpi_rule_status where run_date = ?", (RUN_DATE.isoformat(),)
+        ).fetchall()
+        campaign_rows = conn.execute(
+            "select status, breached_rules from kpi_campaign_rule_status where run_date = ?",
+            (RUN_DATE.isoformat(),),
+        ).fetchall()
+    assert len(rows) == segments
+    assert len(campaign_rows) == campaigns > 0
+    for status, breached in rows + campaign_rows:
+        assert status in {"healthy", "warning", "critical"}
+        assert (status == "healthy") == (json.loads(breached) == [])
+
+
+def test_pipeline_dependencies_follow_declared_tables():
+    deps = dependencies(main_orchestrator.pipeline_nodes(RUN_DATE))
+    assert deps["validation_agent"] == {"data_agent"}
+    assert deps["summary_stats_agent"] == {"data_agent"}
+    assert deps["forecast_agent"] == {"data_agent"}
+    assert deps["anomaly_agent"] == {"data_agent", "kpi_agent"}
+    assert {"anomaly_agent", "forecast_agent"} <= deps["ai_insight_agent"]
+
+
+def test_dag_runs_independent_nodes_concurrently_and_skips_dependents():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    nodes = [
+        Node("source", lambda: None, writes=frozenset({"a"})),
+        Node("left", barrier.wait, reads=frozenset({"a"}), writes=frozenset({"b"})),
+        Node("right", barrier.wait, reads=frozenset({"a"}), writes=frozenset({"c"})),
+        Node("broken", fail, reads=frozenset({"b"}), writes=frozenset({"d"})),
+        Node("after_broken", lambda: None, reads=frozenset({"d"})),
+        Node("after_right", lambda: None, reads=frozenset({"c"})),
+    ]
+    skipped = []
+    results = execute(nodes, max_workers=2, on_skip=lambda node, blocked: skipped.append((node.name, blocked)))
+    assert {name: result.status for name, result in results.items()} == {
+        "source": "completed",
+        "left": "completed",
+        "right": "completed",
+        "broken": "failed",
+        "after_broken": "skipped",
+        "after_right": "completed",
+    }
+    assert skipped == [("after_broken", ["broken"])]
+    assert str(results["broken"].error) == "boom"
+
+
+def test_run_daily_records_node_outcomes(monkeypatch):
+    def fail(run_date=None):
+        raise RuntimeError("forecast backend unavailable")
+
+    monkeypatch.setattr(forecast_agent, "run", fail)
+    with pytest.raises(main_orchestrator.PipelineError):
+        main_orchestrator.run_daily(RUN_DATE, max_workers=3)
+    with get_connection() as conn:
+        run_id, status, details = conn.execute(
+            "select id, status, details from execution_log where parent_id is null order by id desc limit 1"
+        ).fetchone()
+        nodes = dict(conn.execute("select node, status from execution_log where parent_id = ?", (run_id,)))
+    assert status == "failed"
+    assert "forecast_agent" in details
+    assert nodes["forecast_agent"] == "failed"
+    assert nodes["ai_insight_agent"] == nodes["dashboard_agent"] == "skipped"
+    assert nodes["data_agent"] == nodes["anomaly_agent"] == nodes["rootcause_agent"] == "completed"
+
+
+def _kpi_rows() -> list[tuple]:
+    with get_connection() as conn:
+        return conn.execute(
+            """
+            select run_date, channel, region, cac, ltv, revenue_growth, campaign_rank
+            from kpi_summary_daily
+            order by run_date, channel, region
+            """
+        ).fetchall()
+
+
+def test_incremental_kpi_refresh_matches_full_rebuild():
+    _prepare_warehouse()
+    kpi_agent.run(RUN_DATE, full_rebuild=True)
+    later = date.fromordinal(RUN_DATE.toordinal() + 10)
+    untouched_before = date.fromordinal(later.toordinal() - 30).isoformat()
+    with get_connection() as conn:
+        kept_ids = conn.execute(
+            "select id from kpi_summary_daily where run_date < ? order by id", (untouched_before,)
+        ).fetchall()
+
+    data_agent.run(later)
+    kpi_agent.run(later)
+    incremental = _kpi_rows()
+    with get_connection() as conn:
+        # Dates outside the re-ingested window were not rewritten.
+        assert conn.execute(
+            "select id from kpi_summary_daily where run_date < ? order by id", (untouched_before,)
+        ).fetchall() == kept_ids
+    assert kept_ids
+
+    kpi_agent.run(later, full_rebuild=True)
+    assert incremental == _kpi_rows()
+    assert incremental[-1][0] == later.isoformat()
+
+
+def test_generated_campaign_ids_depend_only_on_the_date():
+    def ids(run_date, days_back):
+        return {(day, campaign_id) for day, campaign_id, *_ in data_agent._generate_campaign_rows(run_date, days_back)}
+
+    short, long = ids(date(2025, 1, 4), 4), ids(date(2025, 1, 10), 10)
+    assert short <= long
+
+
+def test_run_range_checkpoints_dates_and_resumes_after_failure(monkeypatch):
+    start, end = date(2025, 1, 1), date(2025, 1, 10)
+    ingested: list[tuple[date, int]] = []
+    original_ingest = data_agent.run
+    original_validate = validation_agent.run
+
+    def spy_ingest(run_date=None, days_back=30):
+        ingested.append((run_date, days_back))
+        original_ingest(run_date, days_back)
+
+    def flaky_validate(run_date=None):
+        if run_date == date(2025, 1, 6):
+            raise RuntimeError("validation store unavailable")
+        original_validate(run_date)
+
+    monkeypatch.setattr(data_agent, "run", spy_ingest)
+    monkeypatch.setattr(validation_agent, "run", flaky_validate)
+    with pytest.raises(main_orchestrator.PipelineError):
+        main_orchestrator.run_range(start, end, max_workers=3, chunk_days=4, resume=False)
+    assert sorted(ingested) == [(date(2025, 1, 4), 4), (date(2025, 1, 8), 4), (date(2025, 1, 10), 2)]
+
+    ingested.clear()
+    monkeypatch.setattr(validation_agent, "run", original_validate)
+    main_orchestrator.run_range(start, end, max_workers=3, chunk_days=4)
+    # Only the dates without a completed checkpoint are ingested again.
+    assert ingested == [(date(2025, 1, 8), 3)]
+
+    with get_connection() as conn:
+        checkpoints = conn.execute(
+            """
+            select node, count(distinct run_date)
+            from execution_log
+            where node like 'backfill.%' and status = 'completed' and run_date between ? and ?
+            group by node
+            """,
+            (start.isoformat(), end.isoformat()),
+        ).fetchall()
+        kpi_days = conn.execute(
+            "select count(distinct run_date) from kpi_summary_daily where run_date between ? and ?",
+            (start.isoformat(), end.isoformat()),
+        ).fetchone()[0]
+    assert dict(checkpoints) == {"backfill.analyze": 10, "backfill.ingest": 10}
+    assert kpi_days == 10
+
+
+def test_agent_metrics_are_recorded_and_regressions_reported(monkeypatch):
+    for _ in range(2):
+        main_orchestrator.run_daily(RUN_DATE, max_workers=2)
+    original_rootcause = rootcause_agent.run
+
+    def slow_rootcause():
+        time.sleep(0.2)
+        original_rootcause()
+
+    monkeypatch.setattr(rootcause_agent, "run", slow_rootcause)
+    main_orchestrator.run_daily(RUN_DATE, max_workers=2)
+
+    report = run_report(runs=3)
+    agents = {agent["agent"]: agent for agent in report["agents"]}
+    assert len(report["runs"]) == 3
+    assert set(agents) == {node.name for node in main_orchestrator.pipeline_nodes(RUN_DATE)}
+    assert report["regressions"] == ["rootcause_agent"]
+    assert report["slowest"] == [agent["agent"] for agent in report["agents"][:3]]
+    assert agents["rootcause_agent"]["wall_seconds"] >= 0.2
+    assert agents["data_agent"]["rows_written"] > 0
+    assert agents["anomaly_agent"]["rows_read"] > 0
+    # Allocation tracing is opt-in; the per-call RSS delta and process max RSS are always recorded.
+    assert agents["data_agent"]["max_rss_bytes"] > 0
+    assert agents["data_agent"]["rss_delta_bytes"] is not None
+    assert agents["data_agent"]["peak_memory_bytes"] is None
+    assert "Process max RSS" in format_report(report)
+
+    with measure("rss_probe") as record:
+        buffer = bytearray(8 << 20)
+        buffer[:: mmap.PAGESIZE] = b"\x01" * len(buffer[:: mmap.PAGESIZE])
+    del buffer
+    assert record.rss_delta_bytes >= 4 << 20
+
+    monkeypatch.setattr(settings, "pipeline_trace_memory", True)
+    with measure("traced_probe") as record:
+        buffer = bytearray(1 << 20)
+    del buffer
+    assert record.peak_memory_bytes >= 1 << 20
+
+
+def test_anomaly_agent_scores_trailing_window_per_series():
+    migrate()
+    run_date = date(2030, 1, 31)
+    days = [date.fromordinal(run_date.toordinal() - offset).isoformat() for offset in range(39, -1, -1)]
+    rng = np.random.default_rng(7)
+    steady = rng.normal(50.0, 2.0, len(days))
+    spiking = steady.copy()
+    spiking[-1] = 90.0
+    # An outlier older than the window must not mask today's spike.
+    spiking[-25] = 10_000.0
+    kpis = [
+        (day, "anomaly_test", region, float(values[i]), 0.0)
+        for region, values in (("steady", steady), ("spiking", spiking))
+        for i, day in enumerate(days)
+    ]
+    spend = [1_000.0 + 10 * (i % 4) for i in range(len(days) - 1)] + [4_000.0]
+    campaigns = [
+        (day, "camp_1", "anomaly_test", "spiking", 10_000, 500, spend[i], 20, 5, 2, 500.0)
+        for i, day in enumerate(days)
+    ]
+    with get_connection() as conn:
+        conn.executemany(
+            "insert into kpi_summary_daily (run_date, channel, region, cac, revenue_growth) values (?,?,?,?,?)",
+            kpis,
+        )
+        conn.executemany(
+            """
+            insert into campaign_performance_daily (
+                run_date, campaign_id, channel, region, impressions, clicks,
+                spend, leads, opportunities, signups, revenue
+            )
+            values (?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            campaigns,
+        )
+    try:
+        anomaly_agent.run(run_date)
+        anomaly_agent.run(run_date, granularity="campaign")
+        with get_connection() as conn:
+            rows = conn.execute(
+                """
+                select granularity, dimension, anomaly_type, current_value, expected_value, z_score
+                from anomaly_log
+                where run_date = ? and dimension like 'anomaly_test:%'
+                order by granularity, anomaly_type
+                """,
+                (run_date.isoformat(),),
+            ).fetchall()
+    finally:
+        with get_connection() as conn:
+            conn.execute("delete from kpi_summary_daily where channel = 'anomaly_test'")
+            conn.execute("delete from campaign_performance_daily where channel = 'anomaly_test'")
+            conn.execute("delete from anomaly_log where dimension like 'anomaly_test:%'")
+
+    window = pd.Series(spiking[-anomaly_agent.WINDOW:])
+    expected_z = (window.iloc[-1] - window.mean()) / window.std()
+    assert [row[:3] for row in rows] == [
+        ("campaign", "anomaly_test:spiking:camp_1", "cac_spike_mad"),
+        ("campaign", "anomaly_test:spiking:camp_1", "cac_spike_zscore"),
+        ("segment", "anomaly_test:spiking", "cac_spike_mad"),
+        ("segment", "anomaly_test:spiking", "cac_spike_zscore"),
+    ]
+    segment_z = rows[-1]
+    assert segment_z[3] == 90.0
+    assert segment_z[4] == pytest.approx(window.mean())
+    assert segment_z[5] == pytest.approx(expected_z)
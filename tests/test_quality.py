@@ -0,0 +1,81 @@
+import pytest
+
+from amids.connections import ConnectionManager
+from amids.quality import QUALITY_CHECKS, QualityCheck, compile_checks, evaluate, tables, violations
+from amids.schema import migrate
+
+DAY = "2026-03-31"
+
+
+def _warehouse(tmp_path) -> ConnectionManager:
+    manager = ConnectionManager(tmp_path / "warehouse.db")
+    migrate(manager=manager)
+    with manager.write() as conn:
+        conn.executemany(
+            """
+            insert into campaign_performance_daily (
+                run_date, campaign_id, channel, region, impressions, clicks,
+                spend, leads, opportunities, signups, revenue
+            )
+            values (?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            [
+                (DAY, "a", "email", "NA", 1000, 50, 100.0, 10, 4, 2, 300.0),
+                (DAY, "b", "email", "NA", 1000, 1200, 100.0, 10, 4, 5, 300.0),
+                (DAY, "b", "email", "NA", 1000, 50, 100.0, 10, 4, 2, 300.0),
+                ("2026-03-30", "c", "email", "NA", 10, 50, 100.0, 100, 4, 5, 0.0),
+            ],
+        )
+        conn.executemany(
+            "insert into crm_leads_daily (run_date, segment, leads, opportunities, customers, revenue) values (?,?,?,?,?,?)",
+            [(DAY, "smb", 10, 12, 3, -5.0), (DAY, "enterprise", 10, 5, 2, 100.0)],
+        )
+    return manager
+
+
+def test_checks_compile_to_one_scan_per_table():
+    compiled = compile_checks()
+    assert list(compiled) == list(tables()) == ["campaign_performance_daily", "crm_leads_daily", "revenue_daily"]
+    assert sum(len(selected) for _, selected in compiled.values()) == len(QUALITY_CHECKS)
+    with pytest.raises(ValueError):
+        compile_checks([QUALITY_CHECKS[0], QUALITY_CHECKS[0]])
+    with pytest.raises(ValueError):
+        QualityCheck("bad", "t", "count(*)", severity="critical")
+
+
+def test_evaluate_records_every_check_for_the_day(tmp_path):
+    manager = _warehouse(tmp_path)
+    statements: list[str] = []
+    with manager.read() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            rows = evaluate(conn, DAY)
+        finally:
+            conn.set_trace_callback(None)
+    assert len(statements) == 3
+
+    results = {name: (status, observed) for _, name, status, observed, _, _ in rows}
+    assert results == {
+        "null_check_spend": ("pass", 0.0),
+        "null_check_revenue": ("pass", 0.0),
+        "duplicate_campaign_day": ("fail", 1.0),
+        "funnel_consistency": ("fail", 2.0),
+        "roi_sanity": ("pass", 3.0),
+        "crm_duplicate_segment_day": ("pass", 0.0),
+        "crm_funnel_consistency": ("fail", 1.0),
+        "crm_negative_revenue": ("fail", 1.0),
+        "revenue_duplicate_segment_day": ("pass", 0.0),
+        "revenue_negative": ("pass", 0.0),
+    }
+
+    extra = QUALITY_CHECKS + (
+        violations("low_impressions", "campaign_performance_daily", "impressions < 5000", "Tiny campaigns.", "warn"),
+    )
+    with manager.read() as conn:
+        statements.clear()
+        conn.set_trace_callback(statements.append)
+        rows = evaluate(conn, DAY, extra)
+        conn.set_trace_callback(None)
+    assert len(statements) == 3
+    assert {row[1]: row[2:4] for row in rows}["low_impressions"] == ("warn", 3.0)
+    manager.close()
@@ -0,0 +1,36 @@
+import time
+
+from backend.app.services.result_cache import VersionedResultCache
+
+
+def test_cache_hits_until_version_changes_then_refreshes_in_background():
+    version = {"value": 1}
+    calls = {"count": 0}
+
+    def compute():
+        calls["count"] += 1
+        return {"version": version["value"]}
+
+    cache = VersionedResultCache(lambda: version["value"], version_check_interval=0.0)
+    assert cache.get("kpis", compute) == (1, {"version": 1})
+    assert cache.get("kpis", compute) == (1, {"version": 1})
+    assert calls["count"] == 1
+
+    version["value"] = 2
+    # Stale while refreshing, and labelled with the version it was computed from.
+    assert cache.get("kpis", compute) == (1, {"version": 1})
+    deadline = time.monotonic() + 2.0
+    while cache.get("kpis", compute)[0] != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("kpis", compute) == (2, {"version": 2})
+    assert cache.stats()["stale_hits"] >= 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = VersionedResultCache(lambda: 1, max_entries=2, version_check_interval=0.0)
+    cache.get("a", lambda: "a")
+    cache.get("b", lambda: "b")
+    cache.get("a", lambda: "a")
+    cache.get("c", lambda: "c")
+    assert cache.get("b", lambda: "b2") == (1, "b2")
+    assert cache.stats()["evictions"] >= 1
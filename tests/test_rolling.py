@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.analytics import rolling
+from backend.app.analytics.rolling import delta, ewma, lag, rolling_mean, rolling_median, rolling_std
+
+
+def _series() -> np.ndarray:
+    values = np.random.default_rng(7).normal(100.0, 15.0, size=(3, 120))
+    values[1, [4, 5, 60]] = np.nan
+    return values
+
+
+def test_rolling_kernels_match_pandas_across_series():
+    values = _series()
+    frame = pd.DataFrame(values.T)
+    for window in (1, 7, 28):
+        expected_mean = frame.rolling(window, min_periods=1).mean().T.to_numpy()
+        expected_std = frame.rolling(window, min_periods=min(2, window)).std().T.to_numpy()
+        expected_median = frame.rolling(window, min_periods=1).median().T.to_numpy()
+        assert np.allclose(rolling_mean(values, window), expected_mean, equal_nan=True)
+        assert np.allclose(rolling_std(values, window), expected_std, equal_nan=True)
+        assert np.allclose(rolling_median(values, window), expected_median, equal_nan=True)
+    for span in (2, 7, 28):
+        expected = frame.ewm(span=span).mean().T.to_numpy()
+        assert np.allclose(ewma(values, span), expected, equal_nan=True)
+
+
+def test_rolling_median_blocks_match_a_single_pass(monkeypatch):
+    values = _series()
+    expected = rolling_median(values, 28, min_periods=3)
+    # Force blocks smaller than one series' windows, so both block loops run.
+    monkeypatch.setattr(rolling, "_MEDIAN_BLOCK_CELLS", 100)
+    assert np.allclose(rolling_median(values, 28, min_periods=3), expected, equal_nan=True)
+
+
+def test_lag_and_delta_shift_along_time_axis():
+    assert np.allclose(lag([1.0, 2.0, 3.0]), [np.nan, 1.0, 2.0], equal_nan=True)
+    assert np.allclose(lag([1.0, 2.0, 3.0], -1), [2.0, 3.0, np.nan], equal_nan=True)
+    assert np.allclose(delta([[1.0, 3.0, 6.0]]), [[np.nan, 2.0, 3.0]], equal_nan=True)
+    assert rolling_mean([], 7).shape == (0,)
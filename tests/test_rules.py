@@ -0,0 +1,56 @@
+import numpy as np
+
+from amids.rules import RuleSet, load_rule_set
+from amids.segment_metrics import derive_metrics
+from backend.app.analytics.metrics import monitor_kpis
+
+
+RULES = RuleSet.from_dict(
+    {
+        "rules": [
+            {"name": "roi_floor", "metric": "roi", "kind": "min", "threshold": 1.0, "severity": "warning"},
+            {"name": "roi_run", "metric": "roi", "kind": "consecutive_breach", "threshold": 1.0, "periods": 3},
+            {"name": "cac_cap", "metric": "cac", "kind": "max", "threshold": 100.0, "severity": "warning"},
+            {"name": "cac_spike", "metric": "cac", "kind": "pct_change", "threshold": 1.0, "direction": "above"},
+        ]
+    }
+)
+
+
+def test_rules_produce_status_matrix_for_every_series():
+    roi = np.array([[1.5, 0.9, 0.8, 0.7, 1.2], [np.nan, 2.0, 2.0, 2.0, 2.0]])
+    cac = np.array([[10.0, 25.0, 30.0, 31.0, 90.0], [np.nan, 50.0, 50.0, 50.0, 120.0]])
+    evaluation = RULES.evaluate({"roi": roi, "cac": cac})
+
+    assert evaluation.status_labels() == [
+        ["healthy", "critical", "warning", "critical", "critical"],
+        ["no_data", "healthy", "healthy", "healthy", "critical"],
+    ]
+    records = evaluation.breach_records([{"segment": "a"}, {"segment": "b"}], ["d1", "d2", "d3", "d4", "d5"])
+    assert records[0]["run_date"] == "d5"
+    assert {(row["segment"], row["run_date"], row["rule"]) for row in records} >= {
+        ("a", "d4", "roi_run"),
+        ("a", "d2", "cac_spike"),
+        ("b", "d5", "cac_cap"),
+        ("b", "d5", "cac_spike"),
+    }
+    assert not any(row["rule"] == "roi_run" and row["run_date"] == "d3" for row in records)
+
+
+def test_summary_statuses_match_monitor_kpis():
+    rule_set = load_rule_set()
+    metrics = {"avg_revenue": 9_500.0, "avg_spend": 50_000.0, "avg_clicks": 300.0}
+    assert rule_set.summary_statuses(metrics) == monitor_kpis(
+        metrics,
+        {"avg_revenue": (10_000.0, None), "avg_spend": (None, 45_000.0), "avg_clicks": (250.0, None)},
+    )
+    assert [row["status"] for row in rule_set.summary_statuses(metrics)] == ["critical", "critical", "healthy"]
+
+
+def test_roi_is_defined_without_leads_and_cac_is_not():
+    # impressions, clicks, leads, spend, revenue
+    metrics = derive_metrics(np.array([[1000, 50, 0, 200.0, 300.0], [1000, 50, 4, 0.0, 300.0]]))
+    assert metrics["roi"][0] == 1.5
+    assert np.isnan(metrics["cac"][0])
+    assert np.isnan(metrics["roi"][1])
+    assert metrics["cac"][1] == 0.0
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from amids.connections import ConnectionManager
+from amids.schema import MIGRATIONS_DIR, applied_versions, discover, migrate
+
+
+def _columns(manager: ConnectionManager, table: str) -> set[str]:
+    with manager.read() as conn:
+        return {row[1] for row in conn.execute(f"pragma table_info({table})")}
+
+
+def test_migrations_apply_once_and_up_to_date_check_is_read_only(tmp_path):
+    manager = ConnectionManager(tmp_path / "warehouse.db")
+    applied = migrate(manager=manager)
+    assert [m.version for m in applied] == [m.version for m in discover()]
+    assert applied_versions(manager) == {m.version for m in applied}
+    assert {"parent_id", "node", "run_date"} <= _columns(manager, "execution_log")
+    manager.close()
+
+    # A fresh process against an up-to-date warehouse never opens the writer.
+    restarted = ConnectionManager(tmp_path / "warehouse.db")
+    assert migrate(manager=restarted) == []
+    assert restarted._writer is None
+    restarted.close()
+
+
+def test_unversioned_warehouse_is_brought_up_to_date(tmp_path):
+    manager = ConnectionManager(tmp_path / "warehouse.db")
+    with manager.write() as conn:
+        conn.executescript((MIGRATIONS_DIR / "0001_baseline.sql").read_text(encoding="utf-8"))
+        # Columns added on the fly by older orchestrator versions.
+        conn.execute("alter table execution_log add column parent_id integer")
+        conn.execute("insert into execution_log (status, details) values ('completed', 'legacy run')")
+
+    migrate(manager=manager)
+    assert {"parent_id", "node", "run_date"} <= _columns(manager, "execution_log")
+    with manager.read() as conn:
+        assert conn.execute("select details from execution_log").fetchall() == [("legacy run",)]
+        indexes = {row[0] for row in conn.execute("select name from sqlite_master where type = 'index'")}
+    assert {"idx_execution_log_parent", "idx_campaign_daily_segment_series"} <= indexes
+    manager.close()
+
+
+def test_failed_migration_is_rolled_back_and_retried(tmp_path):
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+    (migrations / "0001_first.sql").write_text("create table a (x integer);\n", encoding="utf-8")
+    (migrations / "0002_broken.sql").write_text(
+        "create table b (x integer);\ncreate index idx_b on missing_table (x);\n",
+        encoding="utf-8",
+    )
+    manager = ConnectionManager(tmp_path / "warehouse.db")
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(manager=manager, directory=migrations)
+    assert applied_versions(manager) == {1}
+    with manager.read() as conn:
+        assert conn.execute("select count(*) from sqlite_master where name = 'b'").fetchone()[0] == 0
+
+    (migrations / "0002_broken.sql").write_text(
+        "create table b (x integer);\ncreate index idx_b on b (x);\n",
+        encoding="utf-8",
+    )
+    assert [m.name for m in migrate(manager=manager, directory=migrations)] == ["broken"]
+    assert applied_versions(manager) == {1, 2}
+    manager.close()
@@ -0,0 +1,32 @@
+import numpy as np
+
+from amids.sketches import QuantileSketch
+
+
+def _rank(values: np.ndarray, estimate: float) -> float:
+    return float((values <= estimate).mean())
+
+
+def test_sketch_is_exact_below_k():
+    sketch = QuantileSketch(k=200).update([5.0, 1.0, 3.0, np.nan, 4.0, 2.0])
+    assert sketch.n == 5
+    assert sketch.quantiles([0.0, 0.5, 1.0]) == [1.0, 3.0, 5.0]
+    assert sketch.median_absolute_deviation() == 1.0
+    assert sketch.rank_error() == 0.0
+
+
+def test_merged_sketches_stay_within_rank_error():
+    values = np.random.default_rng(3).lognormal(4.0, 1.0, size=200_000)
+    parts = [QuantileSketch(seed=idx).update(chunk) for idx, chunk in enumerate(np.array_split(values, 365))]
+    merged = QuantileSketch.merged(QuantileSketch.from_bytes(part.to_bytes()) for part in parts)
+
+    assert merged.n == values.size
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    bound = merged.rank_error()
+    assert 0 < bound < 0.02
+    for fraction, estimate in zip((0.5, 0.9, 0.99), merged.quantiles([0.5, 0.9, 0.99])):
+        assert abs(_rank(values, estimate) - fraction) <= bound
+
+    median = np.median(values)
+    exact_mad = np.median(np.abs(values - median))
+    assert abs(merged.median_absolute_deviation() - exact_mad) / exact_mad < 0.05
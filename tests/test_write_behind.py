@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+import time
+
+from backend.app.services.write_behind import WriteBehindBuffer
+
+
+def test_buffer_batches_and_flushes_on_stop():
+    batches: list[list[dict]] = []
+    buffer = WriteBehindBuffer(batches.append, max_batch=10, max_delay=5.0)
+    for idx in range(25):
+        buffer.submit({"idx": idx})
+    buffer.stop()
+
+    assert [row["idx"] for batch in batches for row in batch] == list(range(25))
+    assert all(len(batch) <= 10 for batch in batches)
+    stats = buffer.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["flushed"] == 25
+
+
+def test_full_queue_falls_back_to_synchronous_write():
+    release = threading.Event()
+    written: list[dict] = []
+
+    def slow_flush(rows: list[dict]) -> None:
+        release.wait(5.0)
+        written.extend(rows)
+
+    buffer = WriteBehindBuffer(slow_flush, max_batch=1, max_delay=0.01, max_queue=1, put_timeout=0.01)
+    threading.Timer(0.2, release.set).start()
+    for idx in range(4):
+        buffer.submit({"idx": idx})
+    buffer.stop()
+
+    assert sorted(row["idx"] for row in written) == [0, 1, 2, 3]
+    assert buffer.stats()["sync_writes"] >= 1
+
+
+def test_counters_stay_exact_under_concurrent_synchronous_writes():
+    written: list[dict] = []
+    # A queue of one with no wait sends most records down the synchronous path.
+    buffer = WriteBehindBuffer(written.extend, max_batch=1, max_delay=0.01, max_queue=1, put_timeout=0.0)
+    threads = [
+        threading.Thread(target=lambda base=base: [buffer.submit({"idx": base + i}) for i in range(200)])
+        for base in range(0, 1600, 200)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buffer.stop()
+
+    stats = buffer.stats()
+    assert len(written) == stats["submitted"] == stats["flushed"] == stats["flush_count"] == 1600
+    assert stats["sync_writes"] > 0
+
+
+def test_transient_flush_failures_are_retried_not_dropped():
+    locked_until = time.monotonic() + 0.3
+    written: list[dict] = []
+
+    def locked_flush(rows: list[dict]) -> None:
+        if time.monotonic() < locked_until:
+            raise sqlite3.OperationalError("database is locked")
+        written.extend(rows)
+
+    buffer = WriteBehindBuffer(locked_flush, max_batch=5, max_delay=0.01)
+    for idx in range(12):
+        buffer.submit({"idx": idx})
+    buffer.stop()
+
+    stats = buffer.stats()
+    assert sorted(row["idx"] for row in written) == list(range(12))
+    assert stats["dropped"] == 0
+    assert stats["failed_flushes"] >= 1
+
+
+def test_submit_after_stop_writes_synchronously():
+    written: list[dict] = []
+    buffer = WriteBehindBuffer(written.extend, max_delay=5.0)
+    buffer.submit({"idx": 0})
+    buffer.stop()
+
+    buffer.submit({"idx": 1})
+    assert [row["idx"] for row in written] == [0, 1]
+    stats = buffer.stats()
+    assert not stats["running"]
+    assert stats["sync_writes"] == 1
@@ -1,12 +1,29 @@
 const API = "";
 
+// Last body and ETag per GET path, revalidated with If-None-Match.
+const etagCache = new Map();
+
 async function getJson(path, options) {
-  const res = await fetch(`${API}${path}`, options);
+  const isGet = !options || !options.method || options.method === "GET";
+  const cached = isGet ? etagCache.get(path) : undefined;
+  const headers = { ...(options?.headers || {}) };
+  if (cached) {
+    headers["If-None-Match"] = cached.etag;
+  }
+  const res = await fetch(`${API}${path}`, { ...options, headers, cache: "no-store" });
+  if (res.status === 304 && cached) {
+    return cached.body;
+  }
   if (!res.ok) {
     const text = await res.text();
     throw new Error(`${path} failed: ${text}`);
   }
-  return res.json();
+  const body = await res.json();
+  const etag = res.headers.get("ETag");
+  if (isGet && etag) {
+    etagCache.set(path, { etag, body });
+  }
+  return body;
 }
 
 function metricCard(label, value) {
@@ -105,15 +122,19 @@ function renderTopMetrics(metrics) {
   ].join("");
 }
 
+function renderBundle(bundle) {
+  renderTopMetrics(bundle.metrics);
+  renderKpiSummary(bundle.kpis);
+  renderTrendSummary(bundle.trends);
+  renderPerformanceSummary(bundle.performance);
+}
+
 async function boot() {
-  const [health, roadmap, metrics, feedback, kpis, trends, performance] = await Promise.all([
+  const [health, roadmap, feedback, bundle] = await Promise.all([
     getJson("/api/health"),
     getJson("/api/roadmap"),
-    getJson("/api/metrics"),
-    getJson("/api/feedback"),
-    getJson("/api/dashboard/kpis"),
-    getJson("/api/dashboard/trends"),
-    getJson("/api/dashboard/performance")
+    getJson("/api/history/feedback?limit=8"),
+    getJson("/api/dashboard/bundle")
   ]);
 
   document.getElementById("title").textContent = roadmap.project;
@@ -122,27 +143,18 @@ async function boot() {
   document.getElementById("date").textContent = `Date: ${roadmap.date}`;
   document.getElementById("health").textContent = `Service: ${health.status}`;
 
-  renderTopMetrics(metrics);
   renderMilestones(roadmap.milestones || []);
-  renderFeedback(feedback || []);
-  renderKpiSummary(kpis);
-  renderTrendSummary(trends);
-  renderPerformanceSummary(performance);
+  renderFeedback(feedback?.items || []);
+  renderBundle(bundle);
 }
 
 async function refreshPanels() {
-  const [metrics, feedback, kpis, trends, performance] = await Promise.all([
-    getJson("/api/metrics"),
-    getJson("/api/feedback"),
-    getJson("/api/dashboard/kpis"),
-    getJson("/api/dashboard/trends"),
-    getJson("/api/dashboard/performance")
+  const [feedback, bundle] = await Promise.all([
+    getJson("/api/history/feedback?limit=8"),
+    getJson("/api/dashboard/bundle")
   ]);
-  renderTopMetrics(metrics);
-  renderFeedback(feedback || []);
-  renderKpiSummary(kpis);
-  renderTrendSummary(trends);
-  renderPerformanceSummary(performance);
+  renderFeedback(feedback?.items || []);
+  renderBundle(bundle);
 }
 
 document.getElementById("predictForm").addEventListener("submit", async (e) => {